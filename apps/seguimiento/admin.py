@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import SeguimientoPago
+
+@admin.register(SeguimientoPago)
+class SeguimientoPagoAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'cliente_nombre', 'cliente_dni', 'periodo', 'fecha_instalacion',
+        'estado_servicio', 'venta'
+    ]
+    list_filter = ['periodo', 'cliente_genero', 'estado_servicio', 'tecnologia']
+    search_fields = ['=cliente_dni', 'cliente_nombre']
+    raw_id_fields = ['venta']
+    readonly_fields = ['fecha_actualizacion']
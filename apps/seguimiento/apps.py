@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class SeguimientoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.seguimiento'
+    verbose_name = 'Seguimiento de Pagos'
@@ -0,0 +1,148 @@
+"""
+Lectura de las hojas mensuales del Excel de seguimiento de pagos.
+
+Cada hoja mensual ("SETIEMBRE 2024", ...) es una tabla dinámica exportada:
+arriba los filtros AÑO INST. / MES INST., luego la cabecera y, agrupados por
+fecha de instalación, una fila por cliente. Este módulo no usa la base de
+datos para que ``leer_hoja`` pueda ejecutarse en otro proceso.
+"""
+import re
+import unicodedata
+from datetime import date
+
+from apps.ventas.xlsx import LibroXlsx, fecha_excel
+
+
+# Posición de los datos del cliente en cada fila (la cabecera de la tabla
+# dinámica no coincide con estas columnas, por eso no se leen por nombre)
+COLUMNA_DNI = 1
+COLUMNA_CLIENTE = 2
+COLUMNA_TIPO = 3
+COLUMNA_TECNOLOGIA = 4
+COLUMNA_ESTADO_SOT = 5
+COLUMNA_CELULAR = 7
+
+# Valores de las columnas VALID. que cuentan como confirmados
+VALIDADO = {'conf', 'u', 'si', 'ok', 'x'}
+
+ESTADOS_SERVICIO = {
+    'b': 'BAJA',
+    's': 'SUSPENDIDO',
+}
+
+
+def normalizar(texto):
+    sin_tildes = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in sin_tildes if not unicodedata.combining(c)).strip().lower()
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).replace('\xa0', ' ').strip()
+
+
+def _celda(fila, posicion):
+    return fila[posicion] if posicion is not None and posicion < len(fila) else None
+
+
+def ubicar_validaciones(cabecera):
+    """
+    Devuelve {campo del modelo: columna} para las columnas VALID.
+
+    En la cabecera cada "SEG." o "N° PAGO" va seguido de su columna VALID.:
+    el primer SEG. es el seguimiento inicial, cada SEG. siguiente es el
+    seguimiento de la cuota que viene después y cada PAGO es la cuota.
+    """
+    columnas = {}
+    seguimientos = 0
+    pagos = 0
+    for posicion, titulo in enumerate(cabecera):
+        titulo = normalizar(titulo)
+        if titulo.startswith('seg'):
+            campo = 'seguimiento_inicial' if seguimientos == 0 else f'seguimiento_pago_{seguimientos}'
+            seguimientos += 1
+        elif re.match(r'^\d+\D*\s+pago$', titulo):
+            pagos += 1
+            campo = f'pago_{pagos}'
+        else:
+            continue
+        columnas[campo] = posicion + 1
+
+    if columnas:
+        columnas['estado_servicio'] = max(columnas.values()) + 1
+    return columnas
+
+
+def _es_validado(valor):
+    return normalizar(valor) in VALIDADO
+
+
+def _periodo(filtros):
+    año = filtros.get('ano inst.')
+    mes = filtros.get('mes inst.')
+    if isinstance(año, int) and isinstance(mes, int) and 1 <= mes <= 12:
+        return date(año, mes, 1)
+    return None
+
+
+def leer_hoja(ruta, hoja):
+    """
+    Lee una hoja completa y devuelve un dict serializable (para enviarlo
+    entre procesos) con el periodo y la lista de filas de seguimiento.
+
+    Las hojas sin filtros de periodo o sin cabecera de seguimiento (hojas
+    auxiliares o copias vacías) devuelven ``periodo`` None y ninguna fila.
+    """
+    resultado = {'hoja': hoja, 'periodo': None, 'filas': [], 'omitidas': 0}
+    filtros = {}
+    validaciones = None
+    fecha_instalacion = None
+
+    with LibroXlsx(ruta) as libro:
+        for fila in libro.filas(hoja):
+            if validaciones is None:
+                # Zona de filtros y cabecera
+                if fila and isinstance(fila[0], str) and len(fila) > 1:
+                    filtros[normalizar(fila[0])] = fila[1]
+                if normalizar(_celda(fila, COLUMNA_DNI)) == 'dni':
+                    validaciones = ubicar_validaciones(fila)
+                    resultado['periodo'] = _periodo(filtros)
+                    if resultado['periodo'] is None or not validaciones:
+                        return resultado
+                continue
+
+            dni = re.sub(r'\D', '', _texto(_celda(fila, COLUMNA_DNI)))
+            if not dni:
+                # Fila de agrupación: trae la fecha de instalación de los clientes que siguen
+                if isinstance(_celda(fila, 0), (int, float)):
+                    fecha_instalacion = fecha_excel(fila[0]).date()
+                elif _celda(fila, 0) is not None:
+                    fecha_instalacion = None
+                continue
+
+            cliente = ' '.join(_texto(_celda(fila, COLUMNA_CLIENTE)).split())
+            if not cliente or len(dni) > 8:
+                resultado['omitidas'] += 1
+                continue
+
+            registro = {
+                'cliente_dni': dni.zfill(8),
+                'cliente_nombre': cliente[:200],
+                'celular': re.sub(r'\D', '', _texto(_celda(fila, COLUMNA_CELULAR))).lstrip('0')[:20],
+                'tipo': _texto(_celda(fila, COLUMNA_TIPO))[:30],
+                'tecnologia': _texto(_celda(fila, COLUMNA_TECNOLOGIA))[:20],
+                'estado_sot': _texto(_celda(fila, COLUMNA_ESTADO_SOT))[:30],
+                'fecha_instalacion': fecha_instalacion,
+                'estado_servicio': ESTADOS_SERVICIO.get(
+                    normalizar(_celda(fila, validaciones['estado_servicio'])), 'ACTIVO'
+                ),
+            }
+            for campo, posicion in validaciones.items():
+                if campo != 'estado_servicio':
+                    registro[campo] = _es_validado(_celda(fila, posicion))
+            resultado['filas'].append(registro)
+
+    return resultado
@@ -0,0 +1,127 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.seguimiento.lectura import leer_hoja
+from apps.seguimiento.models import SeguimientoPago
+from apps.ventas.models import Venta
+from apps.ventas.xlsx import LibroXlsx
+
+
+CAMPOS_ACTUALIZABLES = [
+    campo.name for campo in SeguimientoPago._meta.concrete_fields
+    if campo.name not in ('id', 'cliente_dni', 'periodo')
+]
+
+
+def genero_del_archivo(ruta):
+    """'... - HOMBRES.xlsx' -> 'M', '... - MUJERES.xlsx' -> 'F'"""
+    nombre = os.path.basename(ruta).upper()
+    if 'MUJER' in nombre:
+        return 'F'
+    if 'HOMBRE' in nombre:
+        return 'M'
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Importa el Excel de seguimiento de pagos (una hoja por mes) en SeguimientoPago'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archivo', nargs='?', default=str(settings.BASE_DIR / '1.SEGUIMIENTO DE PAGOS - HOMBRES.xlsx'),
+        )
+        parser.add_argument(
+            '--genero', choices=['M', 'F'],
+            help='Género de los clientes del archivo (por defecto se deduce del nombre: HOMBRES / MUJERES)',
+        )
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--lote', type=int, default=500, help='Filas por transacción')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        genero = options['genero'] or genero_del_archivo(ruta)
+        if genero is None:
+            raise CommandError('No se pudo deducir el género de los clientes; use --genero M o --genero F')
+
+        try:
+            with LibroXlsx(ruta) as libro:
+                hojas = [nombre for nombre, _ in libro.hojas()]
+        except (OSError, ValueError) as error:
+            raise CommandError(f'No se pudo abrir {ruta}: {error}')
+
+        inicio = time.perf_counter()
+        total = vinculadas = 0
+        procesos = max(1, min(options['procesos'], len(hojas)))
+
+        # Cada hoja se analiza en su propio proceso; el proceso principal
+        # solo escribe en la base de datos, a medida que llegan los resultados
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            pendientes = [pool.submit(leer_hoja, ruta, hoja) for hoja in hojas]
+            for futuro in as_completed(pendientes):
+                resultado = futuro.result()
+                if resultado['periodo'] is None:
+                    self.stdout.write(f'{resultado["hoja"]}: sin datos de seguimiento, se omite')
+                    continue
+
+                guardadas, con_venta = self.guardar(resultado, genero, options['lote'])
+                total += guardadas
+                vinculadas += con_venta
+                self.stdout.write(
+                    f'{resultado["hoja"]}: {guardadas} clientes ({resultado["periodo"]:%m/%Y}), '
+                    f'{resultado["omitidas"]} filas omitidas'
+                )
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} seguimientos importados ({vinculadas} vinculados a una venta) '
+            f'en {duracion:.2f} s con {procesos} proceso(s)'
+        ))
+
+    def guardar(self, resultado, genero, tamaño_lote):
+        # Un cliente repetido en la hoja se queda con su última fila
+        por_dni = {fila['cliente_dni']: fila for fila in resultado['filas']}
+        filas = list(por_dni.values())
+        vinculadas = 0
+
+        for inicio in range(0, len(filas), tamaño_lote):
+            lote = filas[inicio:inicio + tamaño_lote]
+            ventas = self.ventas_por_dni([fila['cliente_dni'] for fila in lote])
+            seguimientos = [
+                SeguimientoPago(
+                    periodo=resultado['periodo'],
+                    cliente_genero=genero,
+                    venta_id=ventas.get(fila['cliente_dni']),
+                    **fila,
+                )
+                for fila in lote
+            ]
+            vinculadas += sum(1 for seguimiento in seguimientos if seguimiento.venta_id)
+
+            with transaction.atomic():
+                SeguimientoPago.objects.bulk_create(
+                    seguimientos,
+                    update_conflicts=True,
+                    unique_fields=['cliente_dni', 'periodo'],
+                    update_fields=CAMPOS_ACTUALIZABLES,
+                )
+
+        return len(filas), vinculadas
+
+    @staticmethod
+    def ventas_por_dni(dnis):
+        """DNI -> id de su venta más reciente, prefiriendo las instaladas"""
+        ventas = {}
+        # Se filtra por el índice de búsqueda (DNI indexado), no por Venta.cliente_dni
+        for dni, venta_id, estado in (
+            Venta.objects.filter(indice_busqueda__dni__in=dnis)
+            .order_by('cliente_dni', '-fecha_creacion')
+            .values_list('cliente_dni', 'id', 'estado')
+        ):
+            if dni not in ventas or (estado == 'INSTALADA' and ventas[dni][1] != 'INSTALADA'):
+                ventas[dni] = (venta_id, estado)
+        return {dni: venta_id for dni, (venta_id, _) in ventas.items()}
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('ventas', '0004_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeguimientoPago',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField(help_text='Primer día del mes de instalación', verbose_name='Periodo')),
+                ('cliente_dni', models.CharField(max_length=8, verbose_name='DNI')),
+                ('cliente_nombre', models.CharField(max_length=200, verbose_name='Nombre del Cliente')),
+                ('cliente_genero', models.CharField(choices=[('M', 'Masculino'), ('F', 'Femenino')], max_length=1, verbose_name='Género')),
+                ('celular', models.CharField(blank=True, max_length=20, verbose_name='Celular')),
+                ('tipo', models.CharField(blank=True, max_length=30, verbose_name='Tipo')),
+                ('tecnologia', models.CharField(blank=True, max_length=20, verbose_name='Tecnología')),
+                ('estado_sot', models.CharField(blank=True, max_length=30, verbose_name='Estado SOT')),
+                ('fecha_instalacion', models.DateField(blank=True, null=True, verbose_name='Fecha Instalación')),
+                ('estado_servicio', models.CharField(choices=[('ACTIVO', 'Activo'), ('BAJA', 'Baja'), ('SUSPENDIDO', 'Suspendido')], default='ACTIVO', max_length=20)),
+                ('seguimiento_inicial', models.BooleanField(default=False, verbose_name='Seguimiento inicial')),
+                ('seguimiento_pago_1', models.BooleanField(default=False, verbose_name='Seguimiento 1er pago')),
+                ('pago_1', models.BooleanField(default=False, verbose_name='1er pago')),
+                ('seguimiento_pago_2', models.BooleanField(default=False, verbose_name='Seguimiento 2do pago')),
+                ('pago_2', models.BooleanField(default=False, verbose_name='2do pago')),
+                ('seguimiento_pago_3', models.BooleanField(default=False, verbose_name='Seguimiento 3er pago')),
+                ('pago_3', models.BooleanField(default=False, verbose_name='3er pago')),
+                ('seguimiento_pago_4', models.BooleanField(default=False, verbose_name='Seguimiento 4to pago')),
+                ('pago_4', models.BooleanField(default=False, verbose_name='4to pago')),
+                ('seguimiento_pago_5', models.BooleanField(default=False, verbose_name='Seguimiento 5to pago')),
+                ('pago_5', models.BooleanField(default=False, verbose_name='5to pago')),
+                ('seguimiento_pago_6', models.BooleanField(default=False, verbose_name='Seguimiento 6to pago')),
+                ('pago_6', models.BooleanField(default=False, verbose_name='6to pago')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('venta', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seguimientos_pago', to='ventas.venta')),
+            ],
+            options={
+                'verbose_name': 'Seguimiento de Pago',
+                'verbose_name_plural': 'Seguimientos de Pago',
+                'ordering': ['-periodo', 'fecha_instalacion', 'id'],
+                'indexes': [models.Index(fields=['cliente_genero', '-periodo', 'fecha_instalacion'], name='seguimiento_genero_periodo_idx'), models.Index(fields=['-periodo', 'fecha_instalacion'], name='seguimiento_periodo_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='seguimientopago',
+            constraint=models.UniqueConstraint(fields=('cliente_dni', 'periodo'), name='seguimiento_dni_periodo_unico'),
+        ),
+    ]
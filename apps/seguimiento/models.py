@@ -0,0 +1,86 @@
+from django.db import models
+
+from apps.ventas.models import Venta
+
+
+class SeguimientoPago(models.Model):
+    """Seguimiento de los pagos mensuales de un cliente instalado"""
+
+    ESTADOS_SERVICIO = [
+        ('ACTIVO', 'Activo'),
+        ('BAJA', 'Baja'),
+        ('SUSPENDIDO', 'Suspendido'),
+    ]
+
+    CUOTAS = 6
+
+    venta = models.ForeignKey(
+        Venta,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='seguimientos_pago'
+    )
+    periodo = models.DateField('Periodo', help_text='Primer día del mes de instalación')
+
+    # Datos del cliente
+    cliente_dni = models.CharField('DNI', max_length=8)
+    cliente_nombre = models.CharField('Nombre del Cliente', max_length=200)
+    cliente_genero = models.CharField('Género', max_length=1, choices=Venta.GENEROS)
+    celular = models.CharField('Celular', max_length=20, blank=True)
+
+    # Datos del servicio
+    tipo = models.CharField('Tipo', max_length=30, blank=True)
+    tecnologia = models.CharField('Tecnología', max_length=20, blank=True)
+    estado_sot = models.CharField('Estado SOT', max_length=30, blank=True)
+    fecha_instalacion = models.DateField('Fecha Instalación', null=True, blank=True)
+    estado_servicio = models.CharField(max_length=20, choices=ESTADOS_SERVICIO, default='ACTIVO')
+
+    # Llamada de bienvenida tras la instalación
+    seguimiento_inicial = models.BooleanField('Seguimiento inicial', default=False)
+
+    # Por cada cuota: llamada de seguimiento confirmada y pago validado
+    seguimiento_pago_1 = models.BooleanField('Seguimiento 1er pago', default=False)
+    pago_1 = models.BooleanField('1er pago', default=False)
+    seguimiento_pago_2 = models.BooleanField('Seguimiento 2do pago', default=False)
+    pago_2 = models.BooleanField('2do pago', default=False)
+    seguimiento_pago_3 = models.BooleanField('Seguimiento 3er pago', default=False)
+    pago_3 = models.BooleanField('3er pago', default=False)
+    seguimiento_pago_4 = models.BooleanField('Seguimiento 4to pago', default=False)
+    pago_4 = models.BooleanField('4to pago', default=False)
+    seguimiento_pago_5 = models.BooleanField('Seguimiento 5to pago', default=False)
+    pago_5 = models.BooleanField('5to pago', default=False)
+    seguimiento_pago_6 = models.BooleanField('Seguimiento 6to pago', default=False)
+    pago_6 = models.BooleanField('6to pago', default=False)
+
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Seguimiento de Pago'
+        verbose_name_plural = 'Seguimientos de Pago'
+        ordering = ['-periodo', 'fecha_instalacion', 'id']
+        constraints = [
+            # También sirve de índice para buscar por DNI (con o sin periodo)
+            models.UniqueConstraint(fields=['cliente_dni', 'periodo'], name='seguimiento_dni_periodo_unico'),
+        ]
+        indexes = [
+            # Listado de cada encargado: sus clientes del periodo, por fecha de instalación
+            models.Index(
+                fields=['cliente_genero', '-periodo', 'fecha_instalacion'],
+                name='seguimiento_genero_periodo_idx',
+            ),
+            models.Index(fields=['-periodo', 'fecha_instalacion'], name='seguimiento_periodo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.cliente_nombre} ({self.periodo:%m/%Y})"
+
+    def cuotas(self):
+        """Lista de (número, seguimiento confirmado, pagada) para cada cuota"""
+        return [
+            (n, getattr(self, f'seguimiento_pago_{n}'), getattr(self, f'pago_{n}'))
+            for n in range(1, self.CUOTAS + 1)
+        ]
+
+    def pagos_realizados(self):
+        return sum(1 for _, _, pagada in self.cuotas() if pagada)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.ventas.xlsx import generar_xlsx
+
+from .models import SeguimientoPago
+
+
+CABECERA = [
+    'FECHA INST.', 'DNI', 'CLIENTE', 'TIPO', 'TECNOLOGIA', 'ESTADO SOT', 'OBS.', 'CELULAR',
+    'SEG.', 'VALID.', '1ER PAGO', 'VALID.', 'ESTADO',
+]
+
+
+def hoja_mensual(año, mes, clientes):
+    """Filas de una hoja mensual como la tabla dinámica exportada: filtros, cabecera y clientes"""
+    relleno = [None] * (len(CABECERA) - 2)
+    filas = [['MES INST.', mes] + relleno, CABECERA, [date(año, mes, 5)]]
+    for dni, nombre, pago, estado in clientes:
+        filas.append([
+            None, dni, nombre, 'ALTA', 'FTTH', 'ATENDIDA', None, '999 888 777',
+            'SEG.', 'CONF', '1ER PAGO', 'CONF' if pago else None, estado,
+        ])
+    # La primera fila es la cabecera de generar_xlsx
+    return ['AÑO INST.', año] + relleno, filas
+
+
+class ImportarSeguimientoTests(TestCase):
+
+    def setUp(self):
+        descriptor, self.ruta = tempfile.mkstemp(suffix=' - HOMBRES.xlsx')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.ruta)
+
+    def importar(self, clientes):
+        primera, filas = hoja_mensual(2024, 9, clientes)
+        with open(self.ruta, 'wb') as archivo:
+            for bloque in generar_xlsx(primera, filas, nombre_hoja='SETIEMBRE 2024'):
+                archivo.write(bloque)
+        call_command('importar_seguimiento', self.ruta, procesos=1, stdout=StringIO())
+
+    def test_importa_hoja_mensual(self):
+        self.importar([('12345678', 'Juan Pérez', False, None), ('1234567', 'Ana Díaz', True, 'B')])
+
+        juan, ana = SeguimientoPago.objects.order_by('-cliente_dni')
+        self.assertEqual((juan.periodo, juan.fecha_instalacion), (date(2024, 9, 1), date(2024, 9, 5)))
+        self.assertEqual((juan.cliente_genero, juan.celular), ('M', '999888777'))
+        self.assertEqual((juan.seguimiento_inicial, juan.pago_1, juan.estado_servicio), (True, False, 'ACTIVO'))
+        self.assertEqual((ana.cliente_dni, ana.pago_1, ana.estado_servicio), ('01234567', True, 'BAJA'))
+
+    def test_reimportar_actualiza_sin_duplicar(self):
+        self.importar([('12345678', 'Juan Pérez', False, None), ('87654321', 'Ana Díaz', False, None)])
+        ids = dict(SeguimientoPago.objects.values_list('cliente_dni', 'id'))
+
+        self.importar([
+            ('12345678', 'Juan Pérez', True, 'S'),
+            ('87654321', 'Ana Díaz', False, None),
+            ('11223344', 'Luis Soto', False, None),
+        ])
+
+        self.assertEqual(SeguimientoPago.objects.count(), 3)
+        juan = SeguimientoPago.objects.get(cliente_dni='12345678', periodo=date(2024, 9, 1))
+        self.assertEqual(juan.id, ids['12345678'])
+        self.assertEqual((juan.pago_1, juan.estado_servicio), (True, 'SUSPENDIDO'))
+        self.assertEqual(SeguimientoPago.objects.get(cliente_dni='87654321').id, ids['87654321'])
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'seguimiento'
+
+urlpatterns = [
+    path('', views.lista_seguimiento, name='lista_seguimiento'),
+]
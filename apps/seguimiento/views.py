@@ -0,0 +1,85 @@
+from datetime import date
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.shortcuts import redirect, render
+from django.utils.http import urlencode
+
+from .models import SeguimientoPago
+
+
+# Cada encargado de seguimiento atiende a los clientes de un género
+GENERO_POR_ROL = {
+    'ENCARGADO_SEGUIMIENTO_M': 'M',
+    'ENCARGADO_SEGUIMIENTO_F': 'F',
+}
+
+
+def _leer_periodo(valor):
+    """'2024-09' -> date(2024, 9, 1); None si el valor no es válido"""
+    try:
+        año, mes = (int(parte) for parte in valor.split('-'))
+        return date(año, mes, 1)
+    except ValueError:
+        return None
+
+
+@login_required
+def lista_seguimiento(request):
+    """Clientes instalados y el estado de sus pagos, por periodo"""
+    usuario = request.user
+    if not (usuario.es_encargado_seguimiento() or usuario.es_supervisor() or usuario.es_dueño()):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('dashboard')
+
+    # Filtros
+    periodo = request.GET.get('periodo', '')
+    dni = request.GET.get('dni', '').strip()
+    venta_id = request.GET.get('venta', '').strip()
+    estado_servicio = request.GET.get('estado_servicio', '')
+    genero = GENERO_POR_ROL.get(usuario.rol) or request.GET.get('genero', '')
+
+    seguimientos = SeguimientoPago.objects.all()
+
+    if genero:
+        seguimientos = seguimientos.filter(cliente_genero=genero)
+
+    periodos = seguimientos.dates('periodo', 'month', order='DESC')
+
+    fecha_periodo = _leer_periodo(periodo) if periodo else None
+    if fecha_periodo:
+        seguimientos = seguimientos.filter(periodo=fecha_periodo)
+
+    # Búsquedas exactas: usan la restricción única (cliente_dni, periodo) y el índice de venta
+    if dni:
+        seguimientos = seguimientos.filter(cliente_dni=dni.zfill(8))
+
+    if venta_id.isdigit():
+        seguimientos = seguimientos.filter(venta_id=venta_id)
+
+    if estado_servicio:
+        seguimientos = seguimientos.filter(estado_servicio=estado_servicio)
+
+    paginator = Paginator(seguimientos, 50)
+    page = request.GET.get('page')
+    seguimientos_paginados = paginator.get_page(page)
+
+    filtros = {
+        'periodo': periodo,
+        'dni': dni,
+        'venta': venta_id,
+        'estado_servicio': estado_servicio,
+        'genero': '' if usuario.rol in GENERO_POR_ROL else genero,
+    }
+
+    context = {
+        'seguimientos': seguimientos_paginados,
+        'periodos': periodos,
+        'estados_servicio': SeguimientoPago.ESTADOS_SERVICIO,
+        'puede_elegir_genero': usuario.rol not in GENERO_POR_ROL,
+        'filtros': filtros,
+        'filtros_query': urlencode({k: v for k, v in filtros.items() if v}),
+    }
+
+    return render(request, 'seguimiento/lista_seguimiento.html', context)
@@ -0,0 +1,50 @@
+"""
+Backend de autenticación que guarda en caché al usuario de cada sesión.
+
+``AuthenticationMiddleware`` carga al usuario en cada request; con este
+backend lo saca de la caché ``sesiones`` (la misma de las sesiones) y solo
+consulta la base de datos si no está. El objeto guardado es el Usuario
+completo (rol, modalidad, turno, activo, y la contraseña con la que Django
+valida el hash de la sesión), así que las verificaciones de rol de las
+vistas tampoco consultan nada.
+
+Se borra de la caché cada vez que el usuario se guarda o se elimina
+(signals.py); los cambios con ``update()`` deben llamar a
+``olvidar_usuario``.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Usuario
+
+
+def _cache():
+    return caches[getattr(settings, 'SESSION_CACHE_ALIAS', 'default')]
+
+
+def _clave(usuario_id):
+    return f'usuario:{usuario_id}'
+
+
+def olvidar_usuario(usuario_id):
+    """Saca al usuario de la caché, ahora y al confirmar la transacción"""
+    clave = _clave(usuario_id)
+    _cache().delete(clave)
+    # Por si otra request lo volvió a cargar antes de que se confirmara el cambio
+    transaction.on_commit(lambda: _cache().delete(clave))
+
+
+class BackendUsuariosEnCache(ModelBackend):
+
+    def get_user(self, user_id):
+        clave = _clave(user_id)
+        usuario = _cache().get(clave)
+        if usuario is None:
+            try:
+                usuario = Usuario._default_manager.get(pk=user_id)
+            except Usuario.DoesNotExist:
+                return None
+            _cache().set(clave, usuario, getattr(settings, 'USUARIOS_CACHE_SEGUNDOS', 300))
+        return usuario if self.user_can_authenticate(usuario) else None
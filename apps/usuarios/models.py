@@ -50,4 +50,7 @@ class Usuario(AbstractUser):
         return self.rol == 'SUPERVISOR'
     
     def es_dueño(self):
-        return self.rol == 'DUEÑO'
\ No newline at end of file
+        return self.rol == 'DUEÑO'
+    
+    def es_encargado_seguimiento(self):
+        return self.rol in ('ENCARGADO_SEGUIMIENTO_M', 'ENCARGADO_SEGUIMIENTO_F')
\ No newline at end of file
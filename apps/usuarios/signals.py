@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import olvidar_usuario
+from .models import Usuario
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def olvidar_usuario_guardado(sender, instance, **kwargs):
+    """La caché de la sesión debe ver el rol, el estado y la contraseña nuevos"""
+    olvidar_usuario(instance.pk)
@@ -1,3 +1,42 @@
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Usuario
+
+
+class UsuariosEnCacheTests(TestCase):
+
+    def setUp(self):
+        caches['sesiones'].clear()
+        self.usuario = Usuario.objects.create_user('ana', password='x', rol='BACK_OFFICE')
+        self.client.force_login(self.usuario)
+
+    def usuario_del_pedido(self):
+        return self.client.get(reverse('dashboard')).wsgi_request.user
+
+    def test_segundo_pedido_no_consulta_el_usuario(self):
+        self.usuario_del_pedido()
+
+        with CaptureQueriesContext(connection) as consultas:
+            usuario = self.usuario_del_pedido()
+
+        self.assertEqual(usuario.pk, self.usuario.pk)
+        tabla = Usuario._meta.db_table
+        self.assertEqual([consulta['sql'] for consulta in consultas if tabla in consulta['sql']], [])
+
+    def test_guardar_el_usuario_lo_saca_de_la_cache(self):
+        self.assertEqual(self.usuario_del_pedido().rol, 'BACK_OFFICE')
+
+        self.usuario.rol = 'SUPERVISOR'
+        self.usuario.save()
+        self.assertEqual(self.usuario_del_pedido().rol, 'SUPERVISOR')
+
+    def test_usuario_desactivado_pierde_la_sesion(self):
+        self.assertTrue(self.usuario_del_pedido().is_authenticated)
+
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertFalse(self.usuario_del_pedido().is_authenticated)
@@ -52,6 +52,8 @@ def dashboard_view(request):
         return redirect('ventas:supervisor_dashboard')
     elif user.es_dueño():
         return redirect('ventas:dueño_dashboard')
+    elif user.es_encargado_seguimiento():
+        return redirect('seguimiento:lista_seguimiento')
 
     # Si es superuser/admin sin rol asignado, va a gestión de usuarios
     if user.is_superuser:
@@ -1,5 +1,21 @@
 from django.contrib import admin
-from .models import Venta, NotificacionVenta
+from django.utils import timezone
+from .busqueda import buscar_ventas
+from .exportacion import exportar_csv, exportar_xlsx
+from .models import Venta, NotificacionVenta, NotificacionVentaArchivada, NotificacionDifusion, Tarea, VentaTransicion
+
+
+class VentaTransicionInline(admin.TabularInline):
+    """Historial de estados (solo lectura: el registro no se edita)"""
+    model = VentaTransicion
+    fields = ['fecha', 'estado_anterior', 'estado_nuevo', 'usuario', 'segundos_en_estado']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Venta)
 class VentaAdmin(admin.ModelAdmin):
@@ -9,7 +25,8 @@ class VentaAdmin(admin.ModelAdmin):
     ]
     list_filter = ['estado', 'modalidad', 'turno', 'fecha_creacion']
     search_fields = ['cliente_nombre', 'cliente_dni', 'cliente_telefono']
-    readonly_fields = ['fecha_creacion', 'fecha_modificacion']
+    readonly_fields = ['fecha_creacion', 'fecha_modificacion', 'fecha_estado']
+    inlines = [VentaTransicionInline]
     
     fieldsets = (
         ('Información del Asesor', {
@@ -23,20 +40,76 @@ class VentaAdmin(admin.ModelAdmin):
             'fields': ('producto_servicio', 'monto', 'observaciones')
         }),
         ('Datos de Back Office', {
-            'fields': ('sec', 'sot', 'fecha_instalacion_programada', 'fecha_instalacion_real')
+            'fields': ('sec', 'sot', 'fecha_instalacion_programada', 'fecha_instalacion_real',
+                      'asignada_a', 'asignada_hasta')
         }),
         ('Estado', {
-            'fields': ('estado', 'motivo_rechazo')
+            'fields': ('estado', 'fecha_estado', 'motivo_rechazo')
         }),
         ('Auditoría', {
             'fields': ('fecha_creacion', 'fecha_modificacion', 'modificado_por'),
             'classes': ('collapse',)
         }),
     )
+    
+    actions = ['exportar_csv', 'exportar_xlsx']
+
+    def save_model(self, request, obj, form, change):
+        # El registro de transiciones toma el usuario de modificado_por
+        obj.modificado_por = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description='Exportar seleccionadas a CSV')
+    def exportar_csv(self, request, queryset):
+        return exportar_csv(queryset)
+
+    @admin.action(description='Exportar seleccionadas a Excel')
+    def exportar_xlsx(self, request, queryset):
+        return exportar_xlsx(queryset)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Usa el índice de búsqueda en lugar de icontains sobre la tabla de ventas
+        if not search_term:
+            return queryset, False
+        return buscar_ventas(queryset, search_term), False
 
 
 @admin.register(NotificacionVenta)
 class NotificacionVentaAdmin(admin.ModelAdmin):
     list_display = ['id', 'venta', 'usuario_destinatario', 'leida', 'fecha_creacion']
     list_filter = ['leida', 'fecha_creacion']
-    search_fields = ['venta__cliente_nombre', 'usuario_destinatario__username']
\ No newline at end of file
+    search_fields = ['venta__cliente_nombre', 'usuario_destinatario__username']
+
+
+@admin.register(NotificacionVentaArchivada)
+class NotificacionVentaArchivadaAdmin(admin.ModelAdmin):
+    """Historial (solo lectura)"""
+    list_display = ['id', 'venta', 'usuario_destinatario', 'fecha_creacion', 'fecha_archivado']
+    list_filter = ['fecha_creacion']
+    search_fields = ['venta__cliente_nombre', 'usuario_destinatario__username']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(NotificacionDifusion)
+class NotificacionDifusionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'venta', 'rol_destinatario', 'fecha_creacion']
+    list_filter = ['rol_destinatario', 'fecha_creacion']
+    search_fields = ['venta__cliente_nombre']
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'nombre', 'estado', 'intentos', 'disponible_desde', 'fecha_creacion']
+    list_filter = ['estado', 'nombre']
+    readonly_fields = ['fecha_creacion']
+    actions = ['reintentar']
+
+    @admin.action(description='Reintentar seleccionadas')
+    def reintentar(self, request, queryset):
+        actualizadas = queryset.update(estado='PENDIENTE', intentos=0, disponible_desde=timezone.now())
+        self.message_user(request, f'{actualizadas} tarea(s) vuelven a la cola')
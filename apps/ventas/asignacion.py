@@ -0,0 +1,113 @@
+"""
+Reparto de ventas pendientes entre los usuarios de Back Office.
+
+Cada usuario toma ventas con una reserva que vence a los
+``BACK_OFFICE_RESERVA_MINUTOS``: mientras está vigente nadie más la toma, y
+si el usuario la abandona vuelve sola a la cola. Una venta está libre si no
+tiene reserva o si la suya ya venció.
+
+``tomar_siguientes`` reparte las más antiguas primero. Donde la base de datos
+lo permite (PostgreSQL, MySQL 8, Oracle) bloquea las candidatas con
+``SELECT ... FOR UPDATE SKIP LOCKED``, así dos usuarios nunca esperan por las
+mismas filas. En el resto (SQLite) reserva con un UPDATE condicional que
+vuelve a comprobar que la venta siga libre: si otro usuario la tomó primero,
+la fila simplemente no se actualiza.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Venta
+from .versiones import cambio_registrado
+
+
+def duracion_reserva():
+    return timedelta(minutes=getattr(settings, 'BACK_OFFICE_RESERVA_MINUTOS', 15))
+
+
+def libres(ahora):
+    """Ventas pendientes sin reserva vigente"""
+    return Q(estado='PENDIENTE_BO') & (Q(asignada_a__isnull=True) | Q(asignada_hasta__lte=ahora))
+
+
+def disponibles_para(usuario, ahora):
+    """Ventas pendientes que ningún otro usuario tiene reservadas"""
+    return libres(ahora) | Q(estado='PENDIENTE_BO', asignada_a=usuario)
+
+
+def tomar_siguientes(usuario, cantidad, pendientes=None):
+    """
+    Reserva para ``usuario`` hasta ``cantidad`` ventas de ``pendientes``.
+
+    Primero renueva las reservas vigentes que ya tenía y completa el resto
+    con las ventas libres más antiguas. Devuelve sus reservas.
+    """
+    if pendientes is None:
+        pendientes = Venta.objects.filter(estado='PENDIENTE_BO')
+    ahora = timezone.now()
+    hasta = ahora + duracion_reserva()
+
+    with transaction.atomic():
+        propias = pendientes.filter(asignada_a=usuario, asignada_hasta__gt=ahora).update(asignada_hasta=hasta)
+        faltan = cantidad - propias
+        tomadas = 0
+        candidatas = pendientes.filter(libres(ahora)).order_by('fecha_creacion', 'id').values('id')
+
+        if faltan > 0 and connection.features.has_select_for_update_skip_locked:
+            # Las filas que otro usuario está reservando en este momento se saltan
+            bloqueo = candidatas.select_for_update(
+                skip_locked=True, of=('self',) if connection.features.has_select_for_update_of else (),
+            )
+            ids = [fila['id'] for fila in bloqueo[:faltan]]
+            tomadas = Venta.objects.filter(id__in=ids).update(asignada_a=usuario, asignada_hasta=hasta)
+        elif faltan > 0:
+            # Sin bloqueo de filas: el UPDATE repite la condición de libre, así
+            # que de dos usuarios con las mismas candidatas solo uno se queda
+            # con cada venta; el otro vuelve a intentar con las siguientes
+            for _ in range(3):
+                seleccion = candidatas[:faltan - tomadas]
+                if not connection.features.update_can_self_select:
+                    # La subconsulta sobre la misma tabla del UPDATE no se admite
+                    seleccion = [fila['id'] for fila in seleccion]
+                tomadas += Venta.objects.filter(libres(ahora), id__in=seleccion).update(
+                    asignada_a=usuario, asignada_hasta=hasta,
+                )
+                if tomadas >= faltan or not candidatas.exists():
+                    break
+
+        if propias or tomadas:
+            cambio_registrado('asignaciones')
+
+    return list(
+        pendientes.filter(asignada_a=usuario, asignada_hasta__gt=ahora)
+        .order_by('fecha_creacion', 'id')[:cantidad]
+    )
+
+
+def reservar(venta, usuario):
+    """Reserva (o renueva) la venta para el usuario si nadie más la tiene; True si quedó suya"""
+    ahora = timezone.now()
+    hasta = ahora + duracion_reserva()
+    reservada = Venta.objects.filter(disponibles_para(usuario, ahora), pk=venta.pk).update(
+        asignada_a=usuario, asignada_hasta=hasta,
+    )
+    if reservada:
+        venta.asignada_a = usuario
+        venta.asignada_hasta = hasta
+        cambio_registrado('asignaciones')
+    return bool(reservada)
+
+
+def liberar(usuario, ids=None):
+    """Devuelve a la cola las reservas del usuario (todas o solo ``ids``)"""
+    reservas = Venta.objects.filter(asignada_a=usuario)
+    if ids is not None:
+        reservas = reservas.filter(id__in=ids)
+    liberadas = reservas.update(asignada_a=None, asignada_hasta=None)
+    if liberadas:
+        cambio_registrado('asignaciones')
+    return liberadas
+
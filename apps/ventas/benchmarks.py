@@ -0,0 +1,162 @@
+"""
+Utilidades compartidas por los comandos de benchmark.
+
+Los datos sintéticos se crean dentro de ``datos_temporales()`` para que la
+base de datos quede igual que antes de ejecutar la medición.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.usuarios.models import Usuario
+from .fechas import sin_fechas_automaticas
+from .models import Venta
+
+
+# Proporción aproximada de estados en producción
+MEZCLA_ESTADOS = [
+    ('PENDIENTE_BO', 8),
+    ('PENDIENTE_AUDIO', 6),
+    ('AUDIO_REVISION', 4),
+    ('AUDIO_NO_CONFORME', 2),
+    ('PENDIENTE_INSTALACION', 10),
+    ('EN_EJECUCION', 5),
+    ('INSTALADA', 55),
+    ('RECHAZADA', 10),
+]
+
+NOMBRES = ['Juan', 'María', 'José', 'Rosa', 'Luis', 'Ana', 'Carlos', 'Lucía', 'Jorge', 'Carmen']
+APELLIDOS = ['Quispe', 'Flores', 'Sánchez', 'Rodríguez', 'García', 'Núñez', 'Mamani', 'Torres']
+PRODUCTOS = ['Internet 100 Mbps', 'Internet 200 Mbps', 'Dúo Internet + TV', 'Trío', 'Telefonía fija']
+
+
+@contextmanager
+def datos_temporales():
+    """Descarta al salir todo lo que se haya escrito dentro del bloque"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def crear_asesores(cantidad, prefijo='bench_asesor'):
+    """Crea asesores sintéticos repartidos entre modalidades y turnos"""
+    Usuario.objects.bulk_create([
+        Usuario(
+            username=f'{prefijo}_{i}',
+            first_name=random.choice(NOMBRES),
+            last_name=random.choice(APELLIDOS),
+            rol='ASESOR',
+            modalidad=random.choice(['CALL_CENTER', 'CAMPO']),
+            turno=random.choice(['MAÑANA', 'TARDE']),
+        )
+        for i in range(cantidad)
+    ])
+    return list(Usuario.objects.filter(username__startswith=f'{prefijo}_'))
+
+
+def generar_ventas(asesores, cantidad, dias=365, lote=5000, al_crear=None):
+    """
+    Inserta ``cantidad`` ventas sintéticas con bulk_create (sin señales).
+
+    ``al_crear`` recibe cada lote insertado, dentro de su misma transacción.
+    """
+    estados = [estado for estado, _ in MEZCLA_ESTADOS]
+    pesos = [peso for _, peso in MEZCLA_ESTADOS]
+    ahora = timezone.now()
+    creadas = 0
+
+    with sin_fechas_automaticas(Venta):
+        while creadas < cantidad:
+            tamaño = min(lote, cantidad - creadas)
+            ventas = []
+            for estado in random.choices(estados, pesos, k=tamaño):
+                asesor = random.choice(asesores)
+                fecha = ahora - timedelta(seconds=random.randint(0, dias * 86400))
+                ventas.append(Venta(
+                    asesor=asesor,
+                    modalidad=asesor.modalidad or 'CALL_CENTER',
+                    turno=asesor.turno or 'MAÑANA',
+                    cliente_nombre=f'{random.choice(NOMBRES)} {random.choice(APELLIDOS)}',
+                    cliente_dni=f'{random.randint(10000000, 99999999)}',
+                    cliente_telefono=f'9{random.randint(10000000, 99999999)}',
+                    cliente_direccion='Av. Siempre Viva 123',
+                    cliente_correo='cliente@example.com',
+                    cliente_genero=random.choice(['M', 'F']),
+                    producto_servicio=random.choice(PRODUCTOS),
+                    monto=Decimal(random.randint(5000, 25000)) / 100,
+                    estado=estado,
+                    fecha_creacion=fecha,
+                    fecha_modificacion=fecha,
+                    fecha_estado=fecha,
+                ))
+            with transaction.atomic():
+                Venta.objects.bulk_create(ventas, batch_size=lote)
+                if al_crear:
+                    al_crear(ventas)
+            creadas += tamaño
+
+    return creadas
+
+
+class ContadorConsultas:
+    """Cuenta las consultas ejecutadas dentro del bloque ``with``
+
+    No depende de ``connection.queries``, que deja de crecer al llegar a su
+    límite cuando DEBUG=True.
+    """
+
+    def __init__(self, conexion=connection):
+        self.conexion = conexion
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._contexto = self.conexion.execute_wrapper(self)
+        self._contexto.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._contexto.__exit__(*exc)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def medir(funcion, repeticiones=10):
+    """Cuenta las consultas de una ejecución y mide la latencia de varias"""
+    with ContadorConsultas() as consultas:
+        funcion()
+
+    latencias = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'consultas': consultas.total,
+        'p50_ms': percentil(latencias, 50),
+        'p95_ms': percentil(latencias, 95),
+        'max_ms': max(latencias) if latencias else 0.0,
+    }
+
+
+def formatear_resultado(nombre, resultado):
+    return (
+        f"{nombre:<45} consultas={resultado['consultas']:<3} "
+        f"p50={resultado['p50_ms']:8.2f} ms  p95={resultado['p95_ms']:8.2f} ms  "
+        f"max={resultado['max_ms']:8.2f} ms"
+    )
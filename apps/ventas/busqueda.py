@@ -0,0 +1,113 @@
+"""
+Búsqueda de ventas por cliente (nombre, DNI, teléfono).
+
+Cada venta tiene una fila en IndiceBusquedaVenta con los datos normalizados.
+En SQLite esa tabla alimenta un índice FTS5 (``ventas_busqueda_fts``) que
+resuelve la búsqueda por prefijo sin recorrer la tabla de ventas; en otros
+motores se usa una consulta equivalente sobre la tabla del índice.
+"""
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import IndiceBusquedaVenta
+
+
+TABLA_FTS = 'ventas_busqueda_fts'
+
+# Campos de Venta que alimentan el índice
+CAMPOS_INDEXADOS = ('cliente_nombre', 'cliente_dni', 'cliente_telefono')
+
+
+def normalizar(texto):
+    """'Núñez  PÉREZ' -> 'nunez perez'"""
+    sin_tildes = unicodedata.normalize('NFKD', texto or '')
+    sin_tildes = ''.join(c for c in sin_tildes if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.lower().split())
+
+
+def solo_digitos(texto):
+    return re.sub(r'\D', '', texto or '')
+
+
+def fila_indice(venta):
+    return IndiceBusquedaVenta(
+        venta_id=venta.pk,
+        nombre=normalizar(venta.cliente_nombre),
+        dni=solo_digitos(venta.cliente_dni),
+        telefono=solo_digitos(venta.cliente_telefono),
+    )
+
+
+def indexar_ventas(ventas, lote=1000):
+    """Crea o actualiza la fila de índice de cada venta (un upsert por lote)"""
+    IndiceBusquedaVenta.objects.bulk_create(
+        [fila_indice(venta) for venta in ventas],
+        batch_size=lote,
+        update_conflicts=True,
+        unique_fields=['venta'],
+        update_fields=['nombre', 'dni', 'telefono'],
+    )
+
+
+def registrar_datos_indexados(venta):
+    """Recuerda los datos del cliente con los que se cargó la venta (de ``__dict__``, sin consultar)"""
+    valores = venta.__dict__
+    if venta.pk is None or any(campo not in valores for campo in CAMPOS_INDEXADOS):
+        venta._indexados_original = None
+    else:
+        venta._indexados_original = tuple(valores[campo] for campo in CAMPOS_INDEXADOS)
+
+
+def cambiaron_datos_indexados(venta, created, update_fields=None):
+    """True si el último save puede haber cambiado la fila de índice de la venta"""
+    if created:
+        return True
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_INDEXADOS):
+        return False
+    original = getattr(venta, '_indexados_original', None)
+    # Si se cargó sin esos campos no se sabe: se reindexa
+    return original is None or original != tuple(getattr(venta, campo) for campo in CAMPOS_INDEXADOS)
+
+
+def usa_fts(alias='default'):
+    return connections[alias].vendor == 'sqlite'
+
+
+def _terminos(texto):
+    return re.findall(r'\w+', normalizar(texto))
+
+
+def buscar_ventas(queryset, texto, campos=('nombre', 'dni', 'telefono')):
+    """
+    Filtra un queryset de Venta por el texto buscado.
+
+    Cada palabra se busca como prefijo en cualquiera de los ``campos``
+    ("nunez" encuentra "Núñez"; "9876" encuentra el teléfono 987654321).
+    """
+    terminos = _terminos(texto)
+    if not terminos:
+        return queryset
+
+    if usa_fts(queryset.db):
+        columnas = ' '.join(campos)
+        consulta = ' AND '.join(f'"{termino}"*' for termino in terminos)
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s',
+            (f'{{{columnas}}} : ({consulta})',),
+        ))
+
+    condicion = Q()
+    for termino in terminos:
+        coincide = Q()
+        for campo in campos:
+            coincide |= Q(**{f'{campo}__startswith': termino})
+            if campo == 'nombre':
+                coincide |= Q(nombre__contains=f' {termino}')
+        condicion &= coincide
+
+    return queryset.filter(id__in=IndiceBusquedaVenta.objects.filter(condicion).values('venta_id'))
+
@@ -0,0 +1,71 @@
+"""
+Consultas independientes en paralelo para las vistas async.
+
+Los métodos async del ORM de Django 4.2 (``aget``, ``acount``...) corren
+todos en un mismo hilo, una consulta detrás de otra. ``en_paralelo`` reparte
+funciones síncronas (que consultan y devuelven datos ya evaluados) en un pool
+de hilos acotado por ``CONSULTAS_HILOS``, así una vista tarda lo que su
+consulta más lenta. Cada hilo del pool tiene su conexión, que se revisa antes
+y después de cada función como al empezar y terminar una request (vence con
+``CONN_MAX_AGE``, se descarta si quedó inutilizable).
+
+Las vistas calculan solo lo que falta: ``fragmentos_en_cache`` dice qué
+fragmentos ``{% cache %}`` de la plantilla ya están guardados.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import close_old_connections
+
+_pool = None
+_candado = threading.Lock()
+
+
+def pool():
+    global _pool
+    with _candado:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CONSULTAS_HILOS', 4), thread_name_prefix='consultas',
+            )
+    return _pool
+
+
+def _en_hilo(funcion):
+    close_old_connections()
+    try:
+        return funcion()
+    finally:
+        close_old_connections()
+
+
+async def en_paralelo(**funciones):
+    """Corre cada función en el pool y devuelve {nombre: resultado}"""
+    if not getattr(settings, 'CONSULTAS_HILOS', 4):
+        # Sin pool: una tras otra en el hilo de sync_to_async (la conexión de la request)
+        return {nombre: await sync_to_async(funcion)() for nombre, funcion in funciones.items()}
+    loop = asyncio.get_running_loop()
+    tareas = [
+        # Con el contexto de la request (métricas por vista, réplica)
+        loop.run_in_executor(pool(), functools.partial(contextvars.copy_context().run, _en_hilo, funcion))
+        for funcion in funciones.values()
+    ]
+    return dict(zip(funciones, await asyncio.gather(*tareas)))
+
+
+def fragmentos_en_cache(*fragmentos):
+    """
+    Nombres de los fragmentos que ya están en la caché ``fragmentos``.
+
+    Cada fragmento es ``(nombre, partes)``, con las mismas partes que su
+    ``{% cache %}`` después del nombre.
+    """
+    claves = {make_template_fragment_key(nombre, partes): nombre for nombre, partes in fragmentos}
+    return {claves[clave] for clave in caches['fragmentos'].get_many(list(claves))}
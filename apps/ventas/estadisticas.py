@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+from .models import Venta
+
+
+class ResumenVentas:
+    """Conteos y montos por estado de un conjunto de ventas"""
+
+    def __init__(self, por_estado):
+        self.por_estado = por_estado
+
+    @property
+    def total(self):
+        return sum(fila['cantidad'] for fila in self.por_estado.values())
+
+    @property
+    def monto_total(self):
+        return sum((fila['monto'] for fila in self.por_estado.values()), Decimal('0'))
+
+    def cantidad(self, *estados):
+        """Cantidad de ventas en cualquiera de los estados indicados"""
+        return sum(self.por_estado[estado]['cantidad'] for estado in estados)
+
+    def monto(self, *estados):
+        """Suma del monto de las ventas en cualquiera de los estados indicados"""
+        return sum((self.por_estado[estado]['monto'] for estado in estados), Decimal('0'))
+
+    def excluyendo(self, *estados):
+        """Cantidad de ventas que no están en los estados indicados"""
+        return self.total - self.cantidad(*estados)
+
+
+def resumen_vacio():
+    return {estado: {'cantidad': 0, 'monto': Decimal('0')} for estado, _ in Venta.ESTADOS}
+
+
+def resumen_por_estado(ventas):
+    """
+    Agrupa cualquier queryset de Venta por estado en una sola consulta.
+
+    Sirve para todos los dashboards: el alcance (asesor, fechas, turno...)
+    lo define el queryset que se recibe.
+    """
+    por_estado = resumen_vacio()
+    filas = (
+        ventas.order_by()
+        .values_list('estado')
+        .annotate(cantidad=Count('id'), monto=Sum('monto'))
+    )
+    for estado, cantidad, monto in filas:
+        fila = por_estado.setdefault(estado, {'cantidad': 0, 'monto': Decimal('0')})
+        fila['cantidad'] += cantidad
+        fila['monto'] += monto or Decimal('0')
+
+    return ResumenVentas(por_estado)
+
+
+def resumen_desde_rollups(resumenes):
+    """
+    Igual que ``resumen_por_estado`` pero sumando filas de ResumenDiarioVenta.
+
+    El costo depende de la cantidad de días/asesores del rango, no de la
+    cantidad de ventas: un mes de un asesor son a lo sumo unos cientos de filas.
+    """
+    por_estado = resumen_vacio()
+    filas = (
+        resumenes.order_by()
+        .values_list('estado')
+        .annotate(total=Sum('cantidad'), suma=Sum('monto'))
+    )
+    for estado, cantidad, monto in filas:
+        fila = por_estado.setdefault(estado, {'cantidad': 0, 'monto': Decimal('0')})
+        fila['cantidad'] += cantidad or 0
+        fila['monto'] += monto or Decimal('0')
+
+    return ResumenVentas(por_estado)
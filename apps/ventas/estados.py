@@ -0,0 +1,203 @@
+"""
+Máquina de estados de las ventas.
+
+``cambiar_estado`` valida el cambio contra ``Venta.TRANSICIONES`` y guarda
+la venta. Las señales de Venta (ver signals.py) llaman a ``antes_de_guardar``
+y ``despues_de_guardar`` en cada save, así que todo cambio de estado, incluso
+desde el admin, mantiene ``Venta.fecha_estado`` y deja su fila en
+VentaTransicion con el tiempo que la venta pasó en el estado anterior.
+
+Las métricas de tiempo por estado (``tiempo_en_estados``) suman ese tiempo
+sobre las salidas de un rango de fechas usando el índice del registro.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+from . import rollups
+from .models import Venta, VentaTransicion
+from .versiones import cambio_registrado
+
+
+class TransicionInvalida(Exception):
+    pass
+
+
+def cambiar_estado(venta, estado, usuario, **campos):
+    """Pasa la venta a ``estado`` (y asigna ``campos``) si la transición está permitida"""
+    if not venta.puede_pasar_a(estado):
+        raise TransicionInvalida(
+            f'La venta #{venta.pk} no puede pasar de {venta.get_estado_display()} '
+            f'a {dict(Venta.ESTADOS).get(estado, estado)}'
+        )
+    for campo, valor in campos.items():
+        setattr(venta, campo, valor)
+    venta.estado = estado
+    venta.modificado_por = usuario
+    venta.save()
+    return venta
+
+
+def cambiar_estado_en_lote(ventas, estado, usuario, campos=(), condicion=None):
+    """
+    cambiar_estado para muchas ventas con un UPDATE (bulk_update) y un INSERT.
+
+    bulk_update no emite señales, así que aquí se hace lo mismo que harían
+    en cada save: registro de transiciones, resúmenes y versiones. El UPDATE
+    solo toca ventas que siguen en su estado de origen; si otro usuario
+    cambió alguna mientras tanto (o alguna ya no cumple ``condicion``), no
+    se aplica nada y se lanza TransicionInvalida.
+    """
+    ventas = list(ventas)
+    for venta in ventas:
+        if not venta.puede_pasar_a(estado):
+            raise TransicionInvalida(
+                f'La venta #{venta.pk} no puede pasar de {venta.get_estado_display()} '
+                f'a {dict(Venta.ESTADOS).get(estado, estado)}'
+            )
+
+    ahora = timezone.now()
+    por_origen = defaultdict(list)
+    transiciones = []
+    for venta in ventas:
+        rollups.antes_de_guardar(venta)
+        por_origen[venta.estado].append(venta)
+        transiciones.append(VentaTransicion(
+            venta=venta,
+            estado_anterior=venta.estado,
+            estado_nuevo=estado,
+            usuario=usuario,
+            fecha=ahora,
+            segundos_en_estado=max(0, int((ahora - venta.fecha_estado).total_seconds())) if venta.fecha_estado else None,
+        ))
+        venta.estado = estado
+        venta.fecha_estado = ahora
+        venta.fecha_modificacion = ahora
+        venta.modificado_por = usuario
+
+    campos = [*campos, 'estado', 'fecha_estado', 'fecha_modificacion', 'modificado_por']
+    with transaction.atomic():
+        for origen, grupo in por_origen.items():
+            filas = Venta.objects.filter(estado=origen)
+            if condicion is not None:
+                filas = filas.filter(condicion)
+            if filas.bulk_update(grupo, campos) != len(grupo):
+                raise TransicionInvalida('Otro usuario cambió alguna de estas ventas; recarga la página e inténtalo de nuevo')
+        VentaTransicion.objects.bulk_create(transiciones)
+
+        cambios = defaultdict(lambda: [0, Decimal('0')])
+        for venta in ventas:
+            for clave, (cantidad, monto) in rollups.cambios_al_guardar(venta, False).items():
+                cambios[clave][0] += cantidad
+                cambios[clave][1] += monto
+        rollups.aplicar_cambios({clave: tuple(valores) for clave, valores in cambios.items()})
+
+        cambio_registrado('ventas')
+        for asesor_id in {venta.asesor_id for venta in ventas}:
+            cambio_registrado('ventas', 'asesor', asesor_id)
+
+    for venta in ventas:
+        rollups.registrar_original(venta)
+        registrar_estado_original(venta)
+    return ventas
+
+
+# ==================== SEÑALES ====================
+
+def registrar_estado_original(venta):
+    """Recuerda el estado con el que se cargó la venta (sin consultar si fue diferido)"""
+    venta._estado_original = venta.__dict__.get('estado')
+
+
+def antes_de_guardar(venta, update_fields=None):
+    """Detecta el cambio de estado y mueve ``fecha_estado`` al momento del cambio"""
+    venta._cambio_estado = None
+    if update_fields is not None and 'estado' not in update_fields:
+        return
+    ahora = timezone.now()
+
+    if venta._state.adding:
+        if venta.fecha_estado is None:
+            venta.fecha_estado = ahora
+        venta._cambio_estado = ('', venta.estado, None, venta.fecha_estado)
+        return
+
+    anterior = getattr(venta, '_estado_original', None)
+    desde = venta.fecha_estado
+    if anterior is None:
+        # Instancia cargada sin el estado: se consulta la fila antes de guardar
+        anterior, desde = Venta.objects.filter(pk=venta.pk).values_list('estado', 'fecha_estado').first()
+    if anterior == venta.estado:
+        return
+
+    segundos = max(0, int((ahora - desde).total_seconds())) if desde else None
+    venta.fecha_estado = ahora
+    venta._cambio_estado = (anterior, venta.estado, segundos, ahora)
+
+
+def despues_de_guardar(venta):
+    if venta._cambio_estado:
+        anterior, nuevo, segundos, fecha = venta._cambio_estado
+        VentaTransicion.objects.create(
+            venta=venta,
+            estado_anterior=anterior,
+            estado_nuevo=nuevo,
+            usuario_id=venta.modificado_por_id,
+            fecha=fecha,
+            segundos_en_estado=segundos,
+        )
+    registrar_estado_original(venta)
+
+
+def entro_a(venta, estado):
+    """True si el último save de la venta la hizo entrar a ``estado``"""
+    cambio = getattr(venta, '_cambio_estado', None)
+    return bool(cambio) and cambio[1] == estado
+
+
+def registrar_creaciones(ventas, usuario=None):
+    """Registra la creación de ventas insertadas sin señales (bulk_create)"""
+    VentaTransicion.objects.bulk_create([
+        VentaTransicion(
+            venta=venta,
+            estado_nuevo=venta.estado,
+            usuario=usuario,
+            fecha=venta.fecha_estado or venta.fecha_creacion,
+        )
+        for venta in ventas
+    ], batch_size=1000)
+
+
+# ==================== MÉTRICAS ====================
+
+def entradas(estado, desde, hasta, estado_anterior=None):
+    """Ventas que entraron a ``estado`` entre [desde, hasta)"""
+    transiciones = VentaTransicion.objects.filter(estado_nuevo=estado, fecha__gte=desde, fecha__lt=hasta)
+    if estado_anterior is not None:
+        transiciones = transiciones.filter(estado_anterior=estado_anterior)
+    return transiciones.count()
+
+
+def tiempo_en_estados(desde, hasta):
+    """
+    Por cada estado, las salidas entre [desde, hasta) y cuántas horas
+    (promedio y máximo) estuvieron las ventas en él antes de salir.
+    """
+    filas = (
+        VentaTransicion.objects
+        .filter(estado_anterior__in=[estado for estado, _ in Venta.ESTADOS], fecha__gte=desde, fecha__lt=hasta)
+        .order_by()
+        .values('estado_anterior')
+        .annotate(salidas=Count('id'), promedio=Avg('segundos_en_estado'), maximo=Max('segundos_en_estado'))
+    )
+    return {
+        fila['estado_anterior']: {
+            'salidas': fila['salidas'],
+            'horas_promedio': round(fila['promedio'] / 3600, 1) if fila['promedio'] is not None else None,
+            'horas_maximo': round(fila['maximo'] / 3600, 1) if fila['maximo'] is not None else None,
+        }
+        for fila in filas
+    }
@@ -0,0 +1,102 @@
+"""
+Publicación de eventos de notificaciones en vivo (Server-Sent Events).
+
+Las notificaciones se publican en canales (``usuario:<id>`` y ``rol:<ROL>``)
+cuando la transacción que las creó se confirma; el stream SSE de cada
+usuario conectado está suscrito a sus dos canales.
+
+El bus se elige con ``settings.NOTIFICACIONES_BUS``. ``BusEnMemoria`` reparte
+los eventos dentro del proceso, así que solo sirve con un único proceso
+ASGI; con varios workers se reemplaza por una clase con la misma interfaz
+(``publicar`` y ``suscribir``) que use un broker local (Redis, PostgreSQL
+LISTEN/NOTIFY...).
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+MAXIMO_EN_COLA = 100
+
+
+def canal_usuario(usuario_id):
+    return f'usuario:{usuario_id}'
+
+
+def canal_rol(rol):
+    return f'rol:{rol}'
+
+
+class BusEnMemoria:
+    """Pub/sub dentro del proceso; cada suscriptor recibe los eventos en una asyncio.Queue"""
+
+    def __init__(self):
+        self._suscriptores = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publicar(self, canal, evento):
+        """Se puede llamar desde cualquier hilo (las vistas síncronas corren fuera del loop)"""
+        with self._lock:
+            destinos = list(self._suscriptores.get(canal, ()))
+        for loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(_encolar, cola, evento)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                pass
+
+    @asynccontextmanager
+    async def suscribir(self, *canales):
+        suscripcion = (asyncio.get_running_loop(), asyncio.Queue(MAXIMO_EN_COLA))
+        with self._lock:
+            for canal in canales:
+                self._suscriptores[canal].add(suscripcion)
+        try:
+            yield suscripcion[1]
+        finally:
+            with self._lock:
+                for canal in canales:
+                    self._suscriptores[canal].discard(suscripcion)
+                    if not self._suscriptores[canal]:
+                        del self._suscriptores[canal]
+
+
+def _encolar(cola, evento):
+    if cola.full():
+        # Cliente lento: se descarta el evento más viejo; el contador
+        # llega igual en el siguiente evento
+        cola.get_nowait()
+    cola.put_nowait(evento)
+
+
+@lru_cache(maxsize=None)
+def obtener_bus():
+    return import_string(getattr(settings, 'NOTIFICACIONES_BUS', 'apps.ventas.eventos.BusEnMemoria'))()
+
+
+def publicar_al_confirmar(canal, evento):
+    """Publica cuando se confirma la transacción (al instante si no hay una abierta)"""
+    transaction.on_commit(lambda: obtener_bus().publicar(canal, evento))
+
+
+def evento_notificacion(notificacion, difusion=False):
+    return {
+        'tipo': 'notificacion',
+        'id': notificacion.id,
+        'venta_id': notificacion.venta_id,
+        'mensaje': notificacion.mensaje,
+        'fecha_creacion': notificacion.fecha_creacion.isoformat(),
+        'difusion': difusion,
+    }
+
+
+def formatear_sse(evento, datos):
+    """Un mensaje SSE: 'event: ...' + 'data: <json>' y una línea en blanco"""
+    return f'event: {evento}\ndata: {json.dumps(datos, default=str)}\n\n'.encode()
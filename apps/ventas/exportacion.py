@@ -0,0 +1,111 @@
+"""
+Exportación de ventas a CSV y Excel por streaming.
+
+Las filas se leen con ``values_list(...).iterator()`` (sin instanciar
+modelos ni cargar el queryset completo) y se escriben en la respuesta a
+medida que llegan, así que la memoria no depende del tamaño del reporte.
+Las columnas siguen la hoja "BASE DE VENTAS" para que los reportes de
+supervisión (tablas dinámicas) se puedan armar sobre la exportación.
+"""
+import csv
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Venta
+from .xlsx import generar_xlsx
+
+
+TAMAÑO_BLOQUE = 2000
+
+CAMPOS = (
+    'id', 'cliente_dni', 'cliente_nombre', 'sec', 'sot', 'producto_servicio', 'monto', 'estado',
+    'fecha_instalacion_programada', 'fecha_instalacion_real', 'asesor__first_name', 'asesor__last_name',
+    'asesor__username', 'fecha_creacion', 'cliente_telefono', 'cliente_direccion', 'cliente_genero',
+    'modalidad', 'turno', 'observaciones', 'motivo_rechazo',
+)
+
+CABECERA = (
+    'ITEM', 'DNI/RUC', 'CLIENTE', 'SEC', 'SOT', 'PLAN', 'C.FIJO', 'ESTADO', 'FECHAINST.', 'ASESOR',
+    'FECHAVENTA', 'MES', 'AÑO', 'CELULAR', 'DEPARTAMENTO', 'GÉNERO', 'MODALIDAD', 'TURNO',
+    'OBSERVACIONES', 'MOTIVO RECHAZO',
+)
+
+ESTADOS = dict(Venta.ESTADOS)
+MODALIDADES = dict(Venta._meta.get_field('modalidad').choices)
+TURNOS = dict(Venta._meta.get_field('turno').choices)
+
+
+def filas_exportacion(queryset, tamaño_bloque=TAMAÑO_BLOQUE):
+    """Genera una tupla por venta, con los valores listos para escribir"""
+    zona = timezone.get_current_timezone()
+    ventas = queryset.order_by('id').values_list(*CAMPOS).iterator(chunk_size=tamaño_bloque)
+
+    for (pk, dni, cliente, sec, sot, plan, monto, estado, instalacion_programada, instalacion_real,
+         nombre, apellido, username, fecha_creacion, telefono, direccion, genero, modalidad, turno,
+         observaciones, motivo_rechazo) in ventas:
+        fecha_venta = timezone.localtime(fecha_creacion, zona).replace(tzinfo=None)
+        yield (
+            pk, dni, cliente, sec, sot, plan, monto, ESTADOS.get(estado, estado),
+            instalacion_real or instalacion_programada,
+            f'{nombre} {apellido}'.strip() or username,
+            fecha_venta, fecha_venta.month, fecha_venta.year,
+            telefono, direccion, genero, MODALIDADES.get(modalidad, modalidad), TURNOS.get(turno, turno),
+            observaciones, motivo_rechazo,
+        )
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def _texto_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M')
+    valor = str(valor)
+    # Evita que Excel interprete como fórmula un texto escrito por el usuario
+    # (OWASP CSV Injection: también tabulador y retorno de carro al inicio)
+    if valor[:1] in ('\t', '\r'):
+        return "'" + valor
+    if valor[:1] in ('=', '+', '-', '@') and not valor[1:].replace('.', '', 1).isdigit():
+        return "'" + valor
+    return valor
+
+
+def _lineas_csv(queryset):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel abra el archivo como UTF-8 (tildes y ñ)
+    yield '\ufeff' + escritor.writerow(CABECERA)
+    for fila in filas_exportacion(queryset):
+        yield escritor.writerow([_texto_csv(valor) for valor in fila])
+
+
+def nombre_archivo(extension):
+    return f'ventas_{timezone.localtime():%Y%m%d_%H%M}.{extension}'
+
+
+def exportar_csv(queryset):
+    respuesta = StreamingHttpResponse(_lineas_csv(queryset), content_type='text/csv; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre_archivo("csv")}"'
+    return respuesta
+
+
+def exportar_xlsx(queryset):
+    respuesta = StreamingHttpResponse(
+        generar_xlsx(CABECERA, filas_exportacion(queryset), nombre_hoja='BASE DE VENTAS'),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre_archivo("xlsx")}"'
+    return respuesta
+
+
+EXPORTADORES = {
+    'csv': exportar_csv,
+    'xlsx': exportar_xlsx,
+}
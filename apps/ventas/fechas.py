@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def inicio_del_dia(fecha):
+    """Medianoche del día indicado en la zona horaria del proyecto (America/Lima)"""
+    return timezone.make_aware(datetime.combine(fecha, time.min), timezone.get_default_timezone())
+
+
+def rango_del_dia(fecha):
+    """Rango semiabierto [inicio, fin) que cubre el día completo"""
+    inicio = inicio_del_dia(fecha)
+    return inicio, inicio_del_dia(fecha + timedelta(days=1))
+
+
+def leer_fecha(valor):
+    """Convierte 'AAAA-MM-DD' en date; devuelve None si el valor no es válido"""
+    try:
+        return parse_date(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def filtrar_por_fecha(queryset, campo, desde=None, hasta=None):
+    """
+    Filtra por días completos sin envolver la columna en una función.
+
+    ``campo__date__gte`` impide usar índices; aquí se compara la columna
+    contra un rango semiabierto de timestamps: [desde 00:00, hasta+1 00:00).
+    """
+    if desde:
+        queryset = queryset.filter(**{f'{campo}__gte': inicio_del_dia(desde)})
+    if hasta:
+        queryset = queryset.filter(**{f'{campo}__lt': inicio_del_dia(hasta + timedelta(days=1))})
+    return queryset
+
+
+@contextmanager
+def sin_fechas_automaticas(*modelos):
+    """Permite asignar fechas de auditoría a mano (auto_now / auto_now_add)"""
+    campos = [
+        campo for modelo in modelos for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+    ]
+    originales = [(campo, campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originales:
+            campo.auto_now = auto_now
+            campo.auto_now_add = auto_now_add
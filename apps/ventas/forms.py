@@ -30,6 +30,11 @@ class VentaAsesorForm(forms.ModelForm):
             'monto': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'observaciones': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Observaciones adicionales...'}),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # El modelo lo admite vacío solo para las ventas importadas
+        self.fields['cliente_genero'].required = True
 
 
 class VentaBackOfficeForm(forms.ModelForm):
@@ -46,4 +51,47 @@ class VentaBackOfficeForm(forms.ModelForm):
             'sec': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'SEC'}),
             'sot': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'SOT'}),
             'fecha_instalacion_programada': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
-        }
\ No newline at end of file
+        }
+
+class VentaBackOfficeLoteForm(VentaBackOfficeForm):
+    """Una fila del completado en lote: vacía se deja para después; si se llena, van los tres campos"""
+    
+    def clean(self):
+        datos = super().clean()
+        self.completar = any(datos.get(campo) for campo in self.Meta.fields)
+        if self.completar:
+            for campo in self.Meta.fields:
+                if not datos.get(campo):
+                    self.add_error(campo, 'Requerido para completar la venta')
+        return datos
+
+
+class BaseCompletarLoteFormSet(forms.BaseModelFormSet):
+    """Formset de ventas pendientes que se completan juntas"""
+    
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        # El id solo identifica la fila: las ventas salen del queryset del
+        # formset (una consulta) en lugar de validar cada id por separado
+        form.fields['id'] = forms.IntegerField(widget=forms.HiddenInput, required=False, initial=form.instance.pk)
+    
+    def clean(self):
+        super().clean()
+        for form in self.forms:
+            # La venta ya no está en el queryset de pendientes
+            if getattr(form, 'completar', False) and form.instance.pk is None:
+                form.add_error(None, 'Esta venta ya no está pendiente de completar')
+    
+    def a_completar(self):
+        """Ventas de las filas llenas, con los datos del formulario ya asignados"""
+        return [form.instance for form in self.forms if form.completar]
+
+
+CompletarLoteFormSet = forms.modelformset_factory(
+    Venta,
+    form=VentaBackOfficeLoteForm,
+    formset=BaseCompletarLoteFormSet,
+    extra=0,
+    max_num=50,
+    validate_max=True,
+)
@@ -0,0 +1,244 @@
+"""
+Conversión de las filas del Excel histórico de ventas en objetos Venta.
+
+Las columnas se ubican por el texto de la cabecera (normalizado), así que
+las hojas "BASE DE VENTAS" y "VENTAS PERDIDAS" comparten el mismo mapeo
+aunque sus cabeceras no sean idénticas.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.usuarios.models import Usuario
+from .busqueda import normalizar, solo_digitos
+from .models import Venta
+from .xlsx import fecha_excel
+
+
+# Campo interno -> cabeceras posibles (normalizadas, solo letras y números)
+COLUMNAS = {
+    'documento': ('dniruc', 'dni'),
+    'cliente': ('cliente',),
+    'sec': ('sec',),
+    'sot': ('sot',),
+    'plan': ('plan',),
+    'monto': ('cfijo',),
+    'comentario': ('comen', 'coment'),
+    'estado_sot': ('estsot', 'estadosot'),
+    'fecha_instalacion': ('fechainst', 'fechinst'),
+    'asesor': ('asesor',),
+    'fecha_venta': ('fechaventa', 'fchventa'),
+    'celular': ('celular',),
+    'departamento': ('departamento',),
+    'genero': ('genero',),
+    'modalidad': ('modalidad',),
+}
+
+ESTADOS_SOT = {
+    'atendida': 'INSTALADA',
+    'rechazada': 'RECHAZADA',
+    'en ejecucion': 'EN_EJECUCION',
+    'reasignacion': 'PENDIENTE_INSTALACION',
+}
+
+# Estado cuando la fila no trae EST.SOT
+ESTADO_POR_HOJA = {
+    'BASE DE VENTAS': 'INSTALADA',
+    'VENTAS PERDIDAS': 'RECHAZADA',
+}
+
+MODALIDADES = {
+    'call': 'CALL_CENTER',
+    'campo': 'CAMPO',
+}
+
+
+class FilaInvalida(Exception):
+    """La fila no tiene los datos mínimos para crear una venta"""
+
+
+def clave_cabecera(titulo):
+    return re.sub(r'[^a-z0-9]', '', normalizar(str(titulo or '')))
+
+
+def ubicar_columnas(cabecera):
+    """Devuelve {campo interno: posición} para las columnas presentes en la cabecera"""
+    posiciones = {clave_cabecera(titulo): i for i, titulo in enumerate(cabecera) if titulo}
+    columnas = {}
+    for campo, alias in COLUMNAS.items():
+        for nombre in alias:
+            if nombre in posiciones:
+                columnas[campo] = posiciones[nombre]
+                break
+    return columnas
+
+
+def texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).replace('\xa0', ' ').strip()
+
+
+def documento_cliente(valor):
+    """
+    Devuelve (dni, ruc) a partir de la celda DNI/RUC.
+
+    '2777326' -> ('02777326', '')  (Excel pierde el cero inicial)
+    '46088013 - 2' -> ('46088013', '')
+    '10467813201' -> ('46781320', '10467813201')  (RUC de persona natural)
+    '20610823140' -> ('', '20610823140')  (RUC de empresa)
+    """
+    digitos = solo_digitos(texto(valor).split('-')[0])
+    if len(digitos) == 11:
+        dni = digitos[2:10] if digitos[:2] in ('10', '15', '17') else ''
+        return dni, digitos
+    return (digitos.zfill(8) if digitos else ''), ''
+
+
+def leer_monto(valor):
+    try:
+        return Decimal(texto(valor) or '0').quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return Decimal('0.00')
+
+
+def leer_fecha_hora(valor):
+    fecha = fecha_excel(valor) if isinstance(valor, (int, float)) else None
+    return timezone.make_aware(fecha, timezone.get_default_timezone()) if fecha else None
+
+
+class IndiceAsesores:
+    """
+    Asesores indexados por nombre normalizado, cargados una sola vez.
+
+    Cada asesor se registra por "nombre apellido" completo, por su primer
+    nombre y primer apellido ("Luz Guevara" encuentra a "Luz María Guevara
+    Díaz") y por su usuario. Los nombres que coinciden con más de un asesor
+    se descartan para no asignar ventas a la persona equivocada.
+    """
+
+    def __init__(self):
+        self._por_nombre = {}
+        campos = ('id', 'username', 'first_name', 'last_name', 'modalidad', 'turno')
+        for asesor in Usuario.objects.filter(rol='ASESOR').only(*campos):
+            self.registrar(asesor)
+
+    def registrar(self, asesor):
+        nombres = asesor.first_name.split()
+        apellidos = asesor.last_name.split()
+        claves = {
+            normalizar(asesor.get_full_name()),
+            normalizar(asesor.username),
+        }
+        if nombres and apellidos:
+            claves.add(normalizar(f'{nombres[0]} {apellidos[0]}'))
+
+        for clave in claves:
+            if not clave:
+                continue
+            existente = self._por_nombre.get(clave)
+            if existente is not None and existente.pk != asesor.pk:
+                self._por_nombre[clave] = None
+            elif clave not in self._por_nombre:
+                self._por_nombre[clave] = asesor
+
+    def buscar(self, nombre):
+        return self._por_nombre.get(normalizar(nombre))
+
+    def crear(self, nombre):
+        """Crea un asesor inactivo (sin contraseña usable) para un nombre del Excel"""
+        partes = texto(nombre).split(maxsplit=1)
+        base = slugify(texto(nombre)).replace('-', '.')[:140] or 'asesor'
+        username = base
+        sufijo = 1
+        while Usuario.objects.filter(username=username).exists():
+            sufijo += 1
+            username = f'{base}.{sufijo}'
+
+        asesor = Usuario(
+            username=username,
+            first_name=partes[0] if partes else '',
+            last_name=partes[1] if len(partes) > 1 else '',
+            rol='ASESOR',
+            activo=False,
+            is_active=False,
+        )
+        asesor.set_unusable_password()
+        asesor.save()
+        self.registrar(asesor)
+        return asesor
+
+
+def celda(fila, columnas, campo):
+    posicion = columnas.get(campo)
+    if posicion is None or posicion >= len(fila):
+        return None
+    return fila[posicion]
+
+
+def nombre_asesor(fila, columnas):
+    return ' '.join(texto(celda(fila, columnas, 'asesor')).split())
+
+
+def fila_a_venta(fila, columnas, hoja):
+    """Construye (sin guardar ni asignar asesor) la Venta que representa una fila del Excel"""
+    cliente = ' '.join(texto(celda(fila, columnas, 'cliente')).split())
+    fecha_venta = leer_fecha_hora(celda(fila, columnas, 'fecha_venta'))
+    if not cliente or not fecha_venta:
+        raise FilaInvalida('Fila sin cliente o sin fecha de venta')
+
+    estado_sot = normalizar(texto(celda(fila, columnas, 'estado_sot')))
+    estado = ESTADOS_SOT.get(estado_sot, ESTADO_POR_HOJA.get(hoja, 'PENDIENTE_BO'))
+    comentario = texto(celda(fila, columnas, 'comentario'))
+    if comentario == '-':
+        comentario = ''
+
+    dni, ruc = documento_cliente(celda(fila, columnas, 'documento'))
+    observaciones = [f'Importada desde la hoja "{hoja}"']
+    if ruc:
+        observaciones.append(f'RUC {ruc}')
+    if comentario:
+        observaciones.append(comentario)
+
+    fecha_instalacion = leer_fecha_hora(celda(fila, columnas, 'fecha_instalacion'))
+    fecha_instalacion = fecha_instalacion.date() if fecha_instalacion else None
+
+    genero = texto(celda(fila, columnas, 'genero')).upper()
+
+    return Venta(
+        modalidad=MODALIDADES.get(normalizar(texto(celda(fila, columnas, 'modalidad'))), 'CALL_CENTER'),
+        cliente_nombre=cliente[:200],
+        cliente_dni=dni,
+        cliente_telefono=solo_digitos(texto(celda(fila, columnas, 'celular')))[:20],
+        cliente_direccion=texto(celda(fila, columnas, 'departamento')),
+        cliente_correo='',
+        cliente_genero=genero if genero in ('M', 'F') else '',
+        producto_servicio=texto(celda(fila, columnas, 'plan'))[:200],
+        monto=leer_monto(celda(fila, columnas, 'monto')),
+        observaciones='\n'.join(observaciones),
+        sec=texto(celda(fila, columnas, 'sec'))[:50],
+        sot=texto(celda(fila, columnas, 'sot'))[:50],
+        fecha_instalacion_programada=fecha_instalacion,
+        fecha_instalacion_real=fecha_instalacion if estado == 'INSTALADA' else None,
+        estado=estado,
+        motivo_rechazo=comentario if estado == 'RECHAZADA' else '',
+        fecha_creacion=fecha_venta,
+        fecha_modificacion=fecha_venta,
+        fecha_estado=fecha_venta,
+    )
+
+
+def asignar_asesor(venta, asesor):
+    """El Excel no registra el turno: se usa el del asesor"""
+    venta.asesor = asesor
+    venta.turno = asesor.turno if asesor.turno in ('MAÑANA', 'TARDE') else 'MAÑANA'
+    return venta
+
+
+def clave_venta(venta):
+    """Identifica una venta importada para no duplicarla al volver a importar"""
+    return (venta.sot, venta.sec, venta.cliente_dni, venta.cliente_nombre.upper())
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.ventas.benchmarks import (
+    crear_asesores, datos_temporales, formatear_resultado, generar_ventas, medir,
+)
+from apps.ventas.estadisticas import resumen_por_estado
+from apps.ventas.models import Venta
+
+
+def stats_asesor_por_conteos(asesor):
+    """Cálculo anterior del dashboard del asesor: un COUNT por indicador"""
+    mis_ventas = Venta.objects.filter(asesor=asesor)
+    return {
+        'total_ventas': mis_ventas.count(),
+        'pendientes_bo': mis_ventas.filter(estado='PENDIENTE_BO').count(),
+        'pendientes_instalacion': mis_ventas.filter(estado='PENDIENTE_INSTALACION').count(),
+        'instaladas': mis_ventas.filter(estado='INSTALADA').count(),
+        'rechazadas': mis_ventas.filter(estado='RECHAZADA').count(),
+    }
+
+
+def stats_asesor_agrupadas(asesor):
+    resumen = resumen_por_estado(Venta.objects.filter(asesor=asesor))
+    return {
+        'total_ventas': resumen.total,
+        'pendientes_bo': resumen.cantidad('PENDIENTE_BO'),
+        'pendientes_instalacion': resumen.cantidad('PENDIENTE_INSTALACION'),
+        'instaladas': resumen.cantidad('INSTALADA'),
+        'rechazadas': resumen.cantidad('RECHAZADA'),
+    }
+
+
+def stats_back_office_por_conteos():
+    return {
+        'pendientes': Venta.objects.filter(estado='PENDIENTE_BO').count(),
+        'total_procesadas': Venta.objects.exclude(estado='PENDIENTE_BO').count(),
+    }
+
+
+def stats_back_office_agrupadas():
+    resumen = resumen_por_estado(Venta.objects.all())
+    return {
+        'pendientes': resumen.cantidad('PENDIENTE_BO'),
+        'total_procesadas': resumen.excluyendo('PENDIENTE_BO'),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compara los conteos separados con el resumen agrupado por estado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ventas', type=int, default=1_000_000)
+        parser.add_argument('--asesores', type=int, default=200)
+        parser.add_argument('--repeticiones', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with datos_temporales():
+            inicio = time.perf_counter()
+            asesores = crear_asesores(options['asesores'])
+            generar_ventas(asesores, options['ventas'])
+            self.stdout.write(
+                f"{options['ventas']} ventas sintéticas generadas en "
+                f"{time.perf_counter() - inicio:.1f} s (se descartan al terminar)"
+            )
+
+            asesor = asesores[0]
+            if stats_asesor_por_conteos(asesor) != stats_asesor_agrupadas(asesor):
+                self.stderr.write(self.style.ERROR('Los resultados del asesor no coinciden'))
+            if stats_back_office_por_conteos() != stats_back_office_agrupadas():
+                self.stderr.write(self.style.ERROR('Los resultados de back office no coinciden'))
+
+            casos = [
+                ('asesor: conteos separados', lambda: stats_asesor_por_conteos(asesor)),
+                ('asesor: resumen_por_estado', lambda: stats_asesor_agrupadas(asesor)),
+                ('back office: conteos separados', stats_back_office_por_conteos),
+                ('back office: resumen_por_estado', stats_back_office_agrupadas),
+            ]
+            for nombre, funcion in casos:
+                resultado = medir(funcion, options['repeticiones'])
+                self.stdout.write(formatear_resultado(nombre, resultado))
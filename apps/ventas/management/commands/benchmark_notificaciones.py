@@ -0,0 +1,79 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from apps.usuarios.models import Usuario
+from apps.ventas.benchmarks import (
+    ContadorConsultas, crear_asesores, datos_temporales, formatear_resultado, generar_ventas, medir,
+)
+from apps.ventas.models import Venta, NotificacionVenta, NotificacionDifusion
+from apps.ventas.notificaciones import marcar_todas_como_leidas, notificar_rol, resumen_no_leidas
+
+
+def entregar_uno_por_uno(venta, rol, mensaje):
+    """Entrega anterior: un INSERT por usuario"""
+    for usuario in Usuario.objects.filter(rol=rol, activo=True):
+        NotificacionVenta.objects.create(venta=venta, usuario_destinatario=usuario, mensaje=mensaje)
+
+
+def entregar_con_modo(modo):
+    def entregar(venta, rol, mensaje):
+        with override_settings(NOTIFICACIONES_ENTREGA=modo):
+            notificar_rol(venta, rol, mensaje)
+    return entregar
+
+
+ESTRATEGIAS = [
+    ('uno por uno', entregar_uno_por_uno),
+    ('lote', entregar_con_modo('lote')),
+    ('difusion', entregar_con_modo('difusion')),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compara los modos de entrega de notificaciones a Back Office'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--back-office', type=int, default=50)
+        parser.add_argument('--ventas', type=int, default=3000, help='Ventas de un día')
+        parser.add_argument('--repeticiones', type=int, default=10)
+
+    def handle(self, *args, **options):
+        for nombre, entregar in ESTRATEGIAS:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Entrega: {nombre}'))
+            with datos_temporales():
+                self.medir_estrategia(entregar, options)
+
+    def medir_estrategia(self, entregar, options):
+        Usuario.objects.bulk_create([
+            Usuario(username=f'bench_bo_{i}', rol='BACK_OFFICE') for i in range(options['back_office'])
+        ])
+        back_office = Usuario.objects.filter(username__startswith='bench_bo_').first()
+        generar_ventas(crear_asesores(10), options['ventas'])
+        ventas = list(Venta.objects.select_related('asesor'))
+
+        with ContadorConsultas() as consultas:
+            entregar(ventas[0], 'BACK_OFFICE', 'Nueva venta')
+
+        inicio = time.perf_counter()
+        for venta in ventas[1:]:
+            entregar(venta, 'BACK_OFFICE', f'Nueva venta #{venta.id} de {venta.asesor.get_full_name()}')
+        duracion = time.perf_counter() - inicio
+
+        filas = NotificacionVenta.objects.count() + NotificacionDifusion.objects.count()
+        self.stdout.write(
+            f'escritura: {consultas.total} consulta(s) por venta, '
+            f'{duracion * 1000 / max(1, len(ventas) - 1):.2f} ms por venta, {filas} filas en el día'
+        )
+
+        def leer_sin_cache():
+            cache.clear()
+            resumen_no_leidas(back_office)
+
+        self.stdout.write(formatear_resultado('lectura (caché vacía)', medir(leer_sin_cache, options['repeticiones'])))
+        self.stdout.write(formatear_resultado(
+            'marcar todas como leídas', medir(lambda: marcar_todas_como_leidas(back_office), 1)
+        ))
+        cache.clear()
@@ -0,0 +1,84 @@
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from apps.usuarios.models import Usuario
+from apps.ventas.benchmarks import crear_asesores, datos_temporales, formatear_resultado, generar_ventas, medir
+from apps.ventas.models import NotificacionVenta, Venta
+from apps.ventas.views import asesor_dashboard, jadira_dashboard
+
+
+def sin_fragmentos():
+    """Reemplaza la caché de fragmentos por DummyCache: todo {% cache %} se renderiza"""
+    return override_settings(CACHES={
+        **settings.CACHES,
+        'fragmentos': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    })
+
+
+class Command(BaseCommand):
+    help = 'Mide el render de base.html y los dashboards con y sin caché de fragmentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ventas', type=int, default=50_000)
+        parser.add_argument('--asesores', type=int, default=20)
+        parser.add_argument('--notificaciones', type=int, default=50, help='No leídas por usuario')
+        parser.add_argument('--repeticiones', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with datos_temporales():
+            asesores = crear_asesores(options['asesores'])
+            generar_ventas(asesores, options['ventas'])
+            back_office = Usuario.objects.create(
+                username='bench_back_office', first_name='Back', last_name='Office', rol='BACK_OFFICE'
+            )
+            asesor = asesores[0]
+
+            ventas = list(Venta.objects.filter(asesor=asesor)[:options['notificaciones']])
+            NotificacionVenta.objects.bulk_create([
+                NotificacionVenta(venta=venta, usuario_destinatario=usuario, mensaje=f'Venta #{venta.id} actualizada')
+                for venta in ventas
+                for usuario in (asesor, back_office)
+            ])
+
+            fabrica = RequestFactory()
+
+            def pedido(url, usuario):
+                request = fabrica.get(url)
+                request.user = usuario
+                return request
+
+            def vista(funcion, url, usuario):
+                # Las vistas de los dashboards son asíncronas
+                funcion = async_to_sync(funcion)
+
+                def renderizar():
+                    respuesta = funcion(pedido(url, usuario))
+                    assert respuesta.status_code == 200, respuesta.status_code
+                return renderizar
+
+            casos = [
+                ('base.html', lambda: render_to_string('base.html', request=pedido('/', asesor))),
+                ('asesor_dashboard', vista(asesor_dashboard, '/ventas/asesor/dashboard/', asesor)),
+                ('jadira_dashboard', vista(jadira_dashboard, '/ventas/jadira/dashboard/', back_office)),
+            ]
+
+            for nombre, funcion in casos:
+                self.stdout.write(self.style.MIGRATE_HEADING(nombre))
+                with sin_fragmentos():
+                    antes = medir(funcion, options['repeticiones'])
+                caches['fragmentos'].clear()
+                funcion()
+                despues = medir(funcion, options['repeticiones'])
+
+                self.stdout.write(formatear_resultado('  sin caché de fragmentos', antes))
+                self.stdout.write(formatear_resultado('  con caché de fragmentos', despues))
+                self.stdout.write(
+                    f'  {antes["p50_ms"] / max(despues["p50_ms"], 0.001):.1f}x más rápido (p50)'
+                )
+
+            caches['fragmentos'].clear()
@@ -0,0 +1,192 @@
+"""
+Ráfaga de escrituras contra SQLite, como al inicio de un turno.
+
+Cada asesor simulado registra ventas por ``asesor_crear_venta`` (vista,
+formulario y señales completas) mientras otros usuarios leen sus listados.
+La misma ráfaga corre con los valores por defecto de Django y con el perfil
+de producción (variables DB_SQLITE_* de .env, esté o no activo
+DB_SQLITE_PRODUCCION), cada uno sobre una base de datos temporal nueva, así
+que la base de datos configurada no se toca:
+
+    python manage.py benchmark_sqlite --asesores 40 --ventas-por-asesor 25
+
+Reporta ventas guardadas por segundo, errores (respuestas 500, casi siempre
+"database is locked") y latencias de escritura y lectura. El cliente de
+pruebas no relanza las excepciones de la vista: avisa de ellas con una señal
+global y con varios hilos podría atribuírselas a la request de otro.
+"""
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from apps.usuarios.models import Usuario
+from apps.ventas.benchmarks import PRODUCTOS, crear_asesores, percentil
+from apps.ventas.models import Venta
+from config.sqlite import perfil_produccion
+
+
+def datos_de_venta(numero):
+    return {
+        'modalidad': 'CALL_CENTER',
+        'turno': 'MAÑANA',
+        'cliente_nombre': f'Cliente ráfaga {numero}',
+        'cliente_dni': f'{40000000 + numero}',
+        'cliente_telefono': '987654321',
+        'cliente_direccion': 'Av. Siempre Viva 123',
+        'cliente_genero': 'F',
+        'producto_servicio': PRODUCTOS[numero % len(PRODUCTOS)],
+        'monto': '129.90',
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compara escrituras concurrentes con SQLite por defecto y con el perfil de producción'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asesores', type=int, default=40, help='Asesores escribiendo a la vez')
+        parser.add_argument('--ventas-por-asesor', type=int, default=25)
+        parser.add_argument('--lectores', type=int, default=4, help='Usuarios leyendo durante la ráfaga')
+        parser.add_argument('--back-office', type=int, default=10, help='Destinatarios de cada venta nueva')
+        parser.add_argument(
+            '--perfil', choices=['ambos', 'defecto', 'configurado'], default='ambos',
+        )
+
+    def handle(self, *args, **options):
+        configuracion = connections['default'].settings_dict
+        if configuracion['ENGINE'] != 'config.sqlite':
+            self.stderr.write('La base de datos configurada no usa el backend config.sqlite')
+            return
+        if 'testserver' not in settings.ALLOWED_HOSTS:
+            # Host del cliente de pruebas; solo afecta a este proceso
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        # Los errores y las requests lentas se cuentan por perfil; sin esto
+        # cada una imprime su traceback o su aviso
+        logging.getLogger('django.request').disabled = True
+        logging.getLogger('config.metricas').disabled = True
+
+        opciones, conn_max_age = perfil_produccion()
+        perfiles = {
+            'defecto': {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+            'configurado': {
+                'OPTIONS': opciones,
+                'CONN_MAX_AGE': conn_max_age,
+                'CONN_HEALTH_CHECKS': conn_max_age > 0,
+            },
+        }
+        if options['perfil'] != 'ambos':
+            perfiles = {options['perfil']: perfiles[options['perfil']]}
+
+        original = {clave: configuracion[clave] for clave in ('NAME', 'OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        try:
+            for nombre, perfil in perfiles.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(f'Perfil: {nombre} {perfil["OPTIONS"] or ""}'))
+                with tempfile.TemporaryDirectory() as carpeta:
+                    # Las conexiones nuevas de cada hilo leen este mismo diccionario
+                    configuracion.update(perfil, NAME=str(Path(carpeta) / 'rafaga.sqlite3'))
+                    connections.close_all()
+                    self.medir_perfil(options)
+                    connections.close_all()
+        finally:
+            configuracion.update(original)
+            connections.close_all()
+
+    def preparar(self, options):
+        call_command('migrate', verbosity=0)
+        asesores = crear_asesores(options['asesores'], prefijo='rafaga_asesor')
+        Usuario.objects.bulk_create([
+            Usuario(username=f'rafaga_bo_{i}', rol='BACK_OFFICE') for i in range(options['back_office'])
+        ])
+        return asesores
+
+    def medir_perfil(self, options):
+        asesores = self.preparar(options)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            modo = cursor.fetchone()[0]
+        connection.close()
+
+        escrituras, lecturas, errores = [], [], []
+        candado = threading.Lock()
+        largada = threading.Barrier(len(asesores) + options['lectores'])
+        terminado = threading.Event()
+
+        def escribir(posicion, asesor):
+            cliente = Client(raise_request_exception=False)
+            cliente.force_login(asesor)
+            url = reverse('ventas:asesor_crear_venta')
+            try:
+                largada.wait()
+                for vuelta in range(options['ventas_por_asesor']):
+                    inicio = time.perf_counter()
+                    estado = cliente.post(url, datos_de_venta(posicion * 10000 + vuelta)).status_code
+                    transcurrido = (time.perf_counter() - inicio) * 1000
+                    with candado:
+                        if estado == 302:
+                            escrituras.append(transcurrido)
+                        else:
+                            errores.append(estado)
+            finally:
+                connection.close()
+
+        def leer(asesor):
+            cliente = Client(raise_request_exception=False)
+            cliente.force_login(asesor)
+            url = reverse('ventas:asesor_mis_ventas')
+            try:
+                largada.wait()
+                while not terminado.is_set():
+                    inicio = time.perf_counter()
+                    estado = cliente.get(url).status_code
+                    transcurrido = (time.perf_counter() - inicio) * 1000
+                    with candado:
+                        if estado == 200:
+                            lecturas.append(transcurrido)
+                        else:
+                            errores.append(f"lectura {estado}")
+            finally:
+                connection.close()
+
+        escritores = [threading.Thread(target=escribir, args=par) for par in enumerate(asesores)]
+        lectores = [
+            threading.Thread(target=leer, args=(asesores[i % len(asesores)],)) for i in range(options['lectores'])
+        ]
+        for hilo in escritores + lectores:
+            hilo.start()
+        inicio = time.perf_counter()
+        for hilo in escritores:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+        terminado.set()
+        for hilo in lectores:
+            hilo.join()
+
+        guardadas = Venta.objects.count()
+        intentos = len(asesores) * options['ventas_por_asesor']
+        self.stdout.write(
+            f'journal_mode={modo}  {guardadas}/{intentos} ventas guardadas en {duracion:.1f} s  '
+            f'{guardadas / duracion:.1f} ventas/s'
+        )
+        self.stdout.write(
+            f'escritura p50={percentil(escrituras, 50):8.2f} ms  p95={percentil(escrituras, 95):8.2f} ms  '
+            f'p99={percentil(escrituras, 99):8.2f} ms'
+        )
+        self.stdout.write(
+            f'lectura   p50={percentil(lecturas, 50):8.2f} ms  p95={percentil(lecturas, 95):8.2f} ms  '
+            f'({len(lecturas)} lecturas)'
+        )
+        if errores:
+            tipos = {error: errores.count(error) for error in sorted(set(errores))}
+            self.stdout.write(self.style.ERROR(
+                f'errores: {len(errores)} ({100 * len(errores) / (intentos + len(lecturas)):.1f} %) {tipos}'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('sin errores'))
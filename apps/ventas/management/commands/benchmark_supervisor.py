@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.utils import timezone
+
+from apps.usuarios.models import Usuario
+from apps.ventas.benchmarks import (
+    crear_asesores, datos_temporales, formatear_resultado, generar_ventas, medir,
+)
+from apps.ventas.models import ResumenDiarioVenta
+from apps.ventas.rollups import reconstruir
+from apps.ventas.supervision import PRESUPUESTO_MS, RANGOS_SEMANAS, tablero_supervisor
+from apps.ventas.views import supervisor_dashboard
+
+
+class Command(BaseCommand):
+    help = 'Mide el dashboard de supervisión a medida que crece la cantidad de ventas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamaños', type=int, nargs='+', default=[100_000, 250_000, 500_000, 1_000_000],
+            help='Cantidades acumuladas de ventas a medir, de menor a mayor',
+        )
+        parser.add_argument('--asesores', type=int, default=50)
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO_MS, help='p95 máximo en ms')
+
+    def handle(self, *args, **options):
+        tamaños = sorted(options['tamaños'])
+        excedidos = []
+
+        with datos_temporales():
+            asesores = crear_asesores(options['asesores'])
+            supervisor = Usuario.objects.create(username='bench_supervisor', rol='SUPERVISOR')
+            fabrica = RequestFactory()
+
+            def vista(semanas):
+                request = fabrica.get('/ventas/supervisor/dashboard/', {'semanas': semanas})
+                request.user = supervisor
+                respuesta = supervisor_dashboard(request)
+                assert respuesta.status_code == 200, respuesta.status_code
+
+            hoy = timezone.localdate()
+            generadas = 0
+            for tamaño in tamaños:
+                inicio = time.perf_counter()
+                generadas += generar_ventas(asesores, tamaño - generadas)
+                reconstruir(hoy - timedelta(days=366), hoy)
+                filas = ResumenDiarioVenta.objects.count()
+                self.stdout.write(
+                    f'\n{generadas} ventas ({filas} filas de resumen diario), preparadas en '
+                    f'{time.perf_counter() - inicio:.1f} s'
+                )
+
+                for semanas in RANGOS_SEMANAS:
+                    casos = [
+                        (f'tablero_supervisor ({semanas} sem.)', lambda: tablero_supervisor(semanas)),
+                        (f'vista completa ({semanas} sem.)', lambda: vista(semanas)),
+                    ]
+                    for nombre, funcion in casos:
+                        resultado = medir(funcion, options['repeticiones'])
+                        self.stdout.write(formatear_resultado(nombre, resultado))
+                        if resultado['p95_ms'] > options['presupuesto']:
+                            excedidos.append(f'{nombre} con {generadas} ventas: {resultado["p95_ms"]:.1f} ms')
+
+        if excedidos:
+            raise CommandError(
+                f'p95 por encima de {options["presupuesto"]:.0f} ms:\n  ' + '\n  '.join(excedidos)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'\nPresupuesto cumplido: p95 < {options["presupuesto"]:.0f} ms en todos los tamaños'
+        ))
@@ -0,0 +1,392 @@
+"""
+Prueba de carga de las vistas de ventas y usuarios.
+
+Cada vista de ``apps/ventas/urls.py`` y ``apps/usuarios/urls.py`` tiene un
+caso en ``CASOS``: el rol que la usa, la URL (con ids reales de la base de
+datos) y el método. Para cada caso se lanzan ``--concurrencia`` usuarios
+simulados en hilos, cada uno con su sesión, que se reparten ``--peticiones``
+requests. Se reporta p50/p95/p99, peticiones por segundo y errores (4xx/5xx)
+por vista, y el resultado se guarda en JSON para comparar corridas
+(``--comparar anterior.json``).
+
+Sin ``--servidor`` las requests pasan por el cliente de pruebas de Django
+dentro de este proceso; con ``--servidor http://127.0.0.1:8000`` van por HTTP
+a un servidor ya levantado (los usuarios inician sesión con ``--password``).
+
+Las vistas que escriben (marcar leídas, reservar ventas, deshabilitar
+usuarios, cerrar sesión) solo se miden con ``--escrituras``. Usar sobre una
+copia sembrada con ``sembrar_datos``, nunca sobre producción.
+"""
+import http.cookiejar
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.usuarios import urls as urls_usuarios
+from apps.usuarios.models import Usuario
+from apps.ventas import urls as urls_ventas
+from apps.ventas.benchmarks import percentil
+from apps.ventas.models import NotificacionDifusion, NotificacionVenta, Venta
+
+
+class Caso:
+    """
+    Una vista a medir.
+
+    ``argumentos`` y ``consulta`` reciben al usuario simulado y devuelven los
+    argumentos de la URL y su query string (None si no hay datos para armarla).
+    """
+
+    def __init__(self, vista, rol, argumentos=None, consulta=None, metodo='get', datos=None,
+                 json_=None, escribe=False, cierra_sesion=False, streaming=False, esperados=()):
+        self.vista = vista
+        self.rol = rol
+        self.argumentos = argumentos
+        self.consulta = consulta
+        self.metodo = metodo
+        self.datos = datos
+        self.json = json_
+        self.escribe = escribe
+        self.cierra_sesion = cierra_sesion
+        self.streaming = streaming
+        # Códigos 4xx que son la respuesta correcta de la vista y no cuentan como error
+        self.esperados = esperados
+
+    def url(self, usuario):
+        argumentos = self.argumentos(usuario) if self.argumentos else ()
+        consulta = self.consulta(usuario) if self.consulta else ''
+        if argumentos is None or consulta is None:
+            return None
+        url = reverse(self.vista, args=argumentos)
+        return f'{url}?{consulta}' if consulta else url
+
+
+def _venta_propia(usuario):
+    venta_id = Venta.objects.filter(asesor=usuario).values_list('id', flat=True).first()
+    return None if venta_id is None else (venta_id,)
+
+
+def _venta_pendiente(usuario):
+    venta_id = Venta.objects.filter(estado='PENDIENTE_BO').values_list('id', flat=True).first()
+    return None if venta_id is None else (venta_id,)
+
+
+def _notificacion_propia(usuario):
+    notificacion_id = NotificacionVenta.objects.filter(usuario_destinatario=usuario).values_list('id', flat=True).first()
+    return None if notificacion_id is None else (notificacion_id,)
+
+
+def _difusion_del_rol(usuario):
+    difusion_id = NotificacionDifusion.objects.filter(rol_destinatario=usuario.rol).values_list('id', flat=True).first()
+    return None if difusion_id is None else (difusion_id,)
+
+
+def _filtro_un_asesor(usuario):
+    asesor_id = Usuario.objects.filter(rol='ASESOR').values_list('id', flat=True).first()
+    return None if asesor_id is None else f'asesor={asesor_id}'
+
+
+def _otro_asesor(usuario):
+    asesor_id = Usuario.objects.filter(rol='ASESOR').exclude(pk=usuario.pk).values_list('id', flat=True).first()
+    return None if asesor_id is None else (asesor_id,)
+
+
+CASOS = [
+    # Asesor
+    Caso('ventas:asesor_dashboard', 'ASESOR'),
+    Caso('ventas:asesor_crear_venta', 'ASESOR'),
+    Caso('ventas:asesor_mis_ventas', 'ASESOR'),
+    Caso('ventas:asesor_detalle_venta', 'ASESOR', _venta_propia),
+    # Back Office
+    Caso('ventas:jadira_dashboard', 'BACK_OFFICE'),
+    Caso('ventas:jadira_pendientes', 'BACK_OFFICE'),
+    Caso('ventas:jadira_completar_venta', 'BACK_OFFICE', _venta_pendiente, escribe=True),
+    Caso('ventas:jadira_completar_lote', 'BACK_OFFICE', escribe=True),
+    # Notificaciones
+    Caso('ventas:marcar_notificacion_leida', 'ASESOR', _notificacion_propia, escribe=True),
+    Caso('ventas:marcar_difusion_leida', 'BACK_OFFICE', _difusion_del_rol, escribe=True),
+    Caso('ventas:marcar_todas_leidas', 'ASESOR', escribe=True),
+    Caso('ventas:stream_notificaciones', 'BACK_OFFICE', streaming=True),
+    Caso('ventas:api_marcar_leidas', 'ASESOR', metodo='post', json_={'ids': []}),
+    # Desde la segunda request la notificación ya está leída y la respuesta es 404
+    Caso('ventas:api_marcar_leida', 'ASESOR', _notificacion_propia, metodo='post', escribe=True, esperados=(404,)),
+    # Exportación (de un asesor, para no descargar toda la tabla en cada request)
+    Caso('ventas:exportar_ventas', 'SUPERVISOR', lambda usuario: ('csv',), consulta=_filtro_un_asesor),
+    # Supervisión
+    Caso('ventas:supervisor_dashboard', 'SUPERVISOR'),
+    Caso('ventas:dueño_dashboard', 'DUEÑO'),
+    # Usuarios
+    Caso('usuarios:login', None),
+    Caso('usuarios:logout', 'ASESOR', escribe=True, cierra_sesion=True),
+    Caso('usuarios:dashboard', 'ASESOR'),
+    Caso('usuarios:lista_usuarios', 'DUEÑO'),
+    Caso('usuarios:crear_usuario', 'DUEÑO'),
+    Caso('usuarios:editar_usuario', 'DUEÑO', _otro_asesor),
+    Caso('usuarios:deshabilitar_usuario', 'DUEÑO', _otro_asesor, escribe=True),
+]
+
+
+def vistas_sin_caso():
+    """Nombres de URL de ventas y usuarios que no tienen caso en CASOS"""
+    nombres = {
+        f'{modulo.app_name}:{patron.name}'
+        for modulo in (urls_ventas, urls_usuarios)
+        for patron in modulo.urlpatterns
+    }
+    return sorted(nombres - {caso.vista for caso in CASOS})
+
+
+# ==================== CLIENTES ====================
+
+class ClienteDePruebas:
+    """Sesión de un usuario simulado con el cliente de pruebas de Django"""
+
+    def __init__(self, usuario):
+        self.usuario = usuario
+        # Sin relanzar excepciones: el cliente las recibe por una señal global y
+        # con varios hilos podría quedarse con la de la request de otro
+        self.cliente = Client(raise_request_exception=False)
+        self.iniciar_sesion()
+
+    def iniciar_sesion(self):
+        if self.usuario is not None:
+            self.cliente.force_login(self.usuario)
+
+    def pedir(self, caso, url):
+        if caso.json is not None:
+            respuesta = self.cliente.post(url, json.dumps(caso.json), content_type='application/json')
+        else:
+            respuesta = getattr(self.cliente, caso.metodo)(url, caso.datos or {})
+        # Consumir el cuerpo de las respuestas en streaming (exportación, SSE)
+        if respuesta.streaming:
+            for _ in respuesta.streaming_content:
+                pass
+        return respuesta.status_code
+
+
+class ClienteHttp:
+    """Sesión de un usuario simulado contra un servidor por HTTP"""
+
+    def __init__(self, servidor, usuario, password):
+        self.servidor = servidor.rstrip('/')
+        self.usuario = usuario
+        self.password = password
+        self.galletas = http.cookiejar.CookieJar()
+        self.abridor = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.galletas), SinRedirecciones,
+        )
+        self.iniciar_sesion()
+
+    def csrf(self):
+        return next((galleta.value for galleta in self.galletas if galleta.name == settings.CSRF_COOKIE_NAME), '')
+
+    def iniciar_sesion(self):
+        self.galletas.clear()
+        self.abrir(reverse('usuarios:login'))
+        if self.usuario is None:
+            return
+        estado = self.abrir(reverse('usuarios:login'), 'post', urllib.parse.urlencode({
+            'username': self.usuario.username,
+            'password': self.password,
+            'csrfmiddlewaretoken': self.csrf(),
+        }).encode(), 'application/x-www-form-urlencoded')
+        if estado != 302:
+            raise CommandError(f'No se pudo iniciar sesión como {self.usuario.username} (¿--password?)')
+
+    def abrir(self, url, metodo='get', cuerpo=None, tipo=None):
+        pedido = urllib.request.Request(self.servidor + url, data=cuerpo, method=metodo.upper())
+        if tipo:
+            pedido.add_header('Content-Type', tipo)
+        if metodo != 'get':
+            pedido.add_header('X-CSRFToken', self.csrf())
+            pedido.add_header('Referer', self.servidor + url)
+        try:
+            with self.abridor.open(pedido, timeout=60) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def pedir(self, caso, url):
+        if caso.json is not None:
+            return self.abrir(url, 'post', json.dumps(caso.json).encode(), 'application/json')
+        cuerpo = urllib.parse.urlencode(caso.datos or {}).encode() if caso.metodo == 'post' else None
+        return self.abrir(url, caso.metodo, cuerpo, 'application/x-www-form-urlencoded' if cuerpo else None)
+
+
+class SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    """Mide la vista pedida, no la página a la que redirige"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+    def http_error_302(self, pedido, respuesta, codigo, mensaje, cabeceras):
+        return respuesta
+
+    http_error_301 = http_error_303 = http_error_307 = http_error_302
+
+
+# ==================== COMANDO ====================
+
+class Command(BaseCommand):
+    help = 'Mide latencia (p50/p95/p99) y throughput de cada vista con usuarios concurrentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200, help='Requests por vista')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Usuarios simulados a la vez')
+        parser.add_argument('--vista', action='append', dest='vistas', help='Solo esta vista (se puede repetir)')
+        parser.add_argument('--escrituras', action='store_true', help='Medir también las vistas que escriben')
+        parser.add_argument('--servidor', help='URL de un servidor levantado; por defecto, cliente de pruebas')
+        parser.add_argument('--password', default='demo1234', help='Contraseña de los usuarios (con --servidor)')
+        parser.add_argument('--salida', help='Archivo JSON (por defecto benchmarks/vistas-<fecha>.json)')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior para comparar')
+
+    def handle(self, *args, **options):
+        if options['servidor'] is None and 'testserver' not in settings.ALLOWED_HOSTS:
+            # Host del cliente de pruebas; solo afecta a este proceso
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        # Los errores se cuentan por vista; sin esto cada 500 imprime su traceback
+        logging.getLogger('django.request').disabled = True
+
+        for vista in vistas_sin_caso():
+            self.stdout.write(self.style.WARNING(f'{vista}: sin caso en benchmark_vistas.CASOS'))
+
+        casos = [caso for caso in CASOS if not options['vistas'] or caso.vista in options['vistas']]
+        resultados = {}
+        for caso in casos:
+            if caso.escribe and not options['escrituras']:
+                resultados[caso.vista] = {'omitida': 'escribe en la base de datos (usar --escrituras)'}
+            elif caso.streaming and options['servidor']:
+                # Servida por ASGI, la conexión queda abierta minutos
+                resultados[caso.vista] = {'omitida': 'stream SSE: solo se mide con el cliente de pruebas'}
+            else:
+                resultados[caso.vista] = self.medir_caso(caso, options)
+            self.stdout.write(self.formatear(caso.vista, resultados[caso.vista]))
+
+        corrida = {
+            'fecha': timezone.now().isoformat(),
+            'modo': options['servidor'] or 'cliente de pruebas',
+            'concurrencia': options['concurrencia'],
+            'peticiones': options['peticiones'],
+            'datos': {
+                'ventas': Venta.objects.count(),
+                'usuarios': Usuario.objects.count(),
+                'notificaciones': NotificacionVenta.objects.count(),
+            },
+            'vistas': resultados,
+        }
+        salida = Path(options['salida'] or settings.BASE_DIR / 'benchmarks' / f'vistas-{timezone.now():%Y%m%d-%H%M%S}.json')
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_text(json.dumps(corrida, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f'Resultados en {salida}'))
+
+        if options['comparar']:
+            self.comparar(json.loads(Path(options['comparar']).read_text()), corrida)
+
+    def usuarios_para(self, caso, cantidad):
+        if caso.rol is None:
+            return [None] * cantidad
+        usuarios = list(Usuario.objects.filter(rol=caso.rol, activo=True, is_active=True).order_by('id')[:cantidad])
+        if not usuarios:
+            return []
+        # Con menos usuarios que hilos, algunos comparten usuario (cada hilo tiene su sesión)
+        return [usuarios[i % len(usuarios)] for i in range(cantidad)]
+
+    def medir_caso(self, caso, options):
+        usuarios = self.usuarios_para(caso, options['concurrencia'])
+        if not usuarios:
+            return {'omitida': f'no hay usuarios {caso.rol} activos'}
+        urls = [caso.url(usuario) for usuario in usuarios]
+        if None in urls:
+            return {'omitida': 'no hay datos para armar la URL'}
+
+        if options['servidor']:
+            clientes = [ClienteHttp(options['servidor'], usuario, options['password']) for usuario in usuarios]
+        else:
+            clientes = [ClienteDePruebas(usuario) for usuario in usuarios]
+
+        latencias = []
+        errores = []
+        restantes = iter(range(options['peticiones']))
+        candado = threading.Lock()
+
+        def trabajar(cliente, url):
+            try:
+                while True:
+                    with candado:
+                        if next(restantes, None) is None:
+                            return
+                    if caso.cierra_sesion:
+                        cliente.iniciar_sesion()
+                    inicio = time.perf_counter()
+                    try:
+                        estado = cliente.pedir(caso, url)
+                    except Exception as error:
+                        estado = type(error).__name__
+                    transcurrido = (time.perf_counter() - inicio) * 1000
+                    with candado:
+                        latencias.append(transcurrido)
+                        if not isinstance(estado, int) or (estado >= 400 and estado not in caso.esperados):
+                            errores.append(estado)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajar, args=par) for par in zip(clientes, urls)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        return {
+            'url': urls[0],
+            'peticiones': len(latencias),
+            'errores': len(errores),
+            'estados_error': sorted({str(estado) for estado in errores}),
+            'p50_ms': round(percentil(latencias, 50), 2),
+            'p95_ms': round(percentil(latencias, 95), 2),
+            'p99_ms': round(percentil(latencias, 99), 2),
+            'max_ms': round(max(latencias, default=0.0), 2),
+            'peticiones_por_segundo': round(len(latencias) / duracion, 1) if duracion else 0.0,
+        }
+
+    def formatear(self, vista, resultado):
+        if 'omitida' in resultado:
+            return f'{vista:<38} omitida: {resultado["omitida"]}'
+        linea = (
+            f"{vista:<38} p50={resultado['p50_ms']:8.2f} ms  p95={resultado['p95_ms']:8.2f} ms  "
+            f"p99={resultado['p99_ms']:8.2f} ms  {resultado['peticiones_por_segundo']:7.1f} req/s"
+        )
+        if resultado['errores']:
+            linea += f"  errores={resultado['errores']} ({', '.join(resultado['estados_error'])})"
+            return self.style.ERROR(linea)
+        return linea
+
+    def comparar(self, anterior, actual):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Comparación con la corrida del {anterior["fecha"]}'))
+        for vista, resultado in actual['vistas'].items():
+            previo = anterior['vistas'].get(vista, {})
+            # Una vista que falló en alguna corrida no tiene tiempos comparables
+            if 'p95_ms' not in resultado or 'p95_ms' not in previo or resultado['errores'] or previo['errores']:
+                continue
+            cambio = (resultado['p95_ms'] - previo['p95_ms']) / previo['p95_ms'] * 100 if previo['p95_ms'] else 0.0
+            linea = (
+                f"{vista:<38} p95 {previo['p95_ms']:8.2f} -> {resultado['p95_ms']:8.2f} ms ({cambio:+.0f}%)  "
+                f"{previo['peticiones_por_segundo']:7.1f} -> {resultado['peticiones_por_segundo']:7.1f} req/s"
+            )
+            estilo = self.style.ERROR if cambio > 10 else self.style.SUCCESS if cambio < -10 else str
+            self.stdout.write(estilo(linea))
@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.ventas.notificaciones import archivar_lote
+
+
+class Command(BaseCommand):
+    help = 'Mueve las notificaciones leídas antiguas al archivo, en lotes cortos (una vez o cada N segundos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=None,
+            help='Antigüedad mínima de las notificaciones a archivar (por defecto NOTIFICACIONES_RETENCION_DIAS)',
+        )
+        parser.add_argument('--lote', type=int, default=1000, help='Notificaciones por transacción')
+        parser.add_argument(
+            '--pausa', type=float, default=0.05,
+            help='Segundos entre lotes, para que las requests escriban entre medio',
+        )
+        parser.add_argument(
+            '--cada', type=int, default=0,
+            help='Segundos entre pasadas; 0 hace una sola (por ejemplo, desde cron)',
+        )
+
+    def handle(self, *args, **options):
+        dias = options['dias']
+        if dias is None:
+            dias = getattr(settings, 'NOTIFICACIONES_RETENCION_DIAS', 30)
+
+        while True:
+            inicio = time.perf_counter()
+            antes_de = timezone.now() - timedelta(days=dias)
+            total, desde_id = 0, 0
+            while desde_id is not None:
+                movidas, desde_id = archivar_lote(antes_de, desde_id, options['lote'])
+                total += movidas
+                if desde_id is not None and options['pausa']:
+                    time.sleep(options['pausa'])
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(f'{total} notificación(es) archivada(s) en {segundos:.2f} s')
+            if not options['cada']:
+                return
+            time.sleep(max(0, options['cada'] - segundos))
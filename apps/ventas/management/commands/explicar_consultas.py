@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from apps.ventas.fechas import filtrar_por_fecha, rango_del_dia
+from apps.ventas.models import Venta, NotificacionVenta, VentaTransicion
+
+
+def consultas_frecuentes(asesor_id, usuario_id):
+    """Las consultas de las vistas que se ejecutan en casi todas las páginas"""
+    hoy = timezone.localdate()
+    inicio_hoy, fin_hoy = rango_del_dia(hoy)
+    mis_ventas = Venta.objects.filter(asesor_id=asesor_id)
+
+    return [
+        ('asesor_dashboard: resumen por estado',
+         mis_ventas.order_by().values('estado').annotate(cantidad=Count('id'), monto=Sum('monto'))),
+        ('asesor_dashboard: últimas ventas', mis_ventas[:5]),
+        ('asesor_mis_ventas: estado + rango de fechas',
+         filtrar_por_fecha(mis_ventas.filter(estado='PENDIENTE_BO'), 'fecha_creacion',
+                           desde=hoy - timedelta(days=30), hasta=hoy)[:20]),
+        ('asesor_mis_ventas: rango de fechas',
+         filtrar_por_fecha(mis_ventas, 'fecha_creacion', desde=hoy - timedelta(days=30), hasta=hoy)[:20]),
+        ('jadira_dashboard: completadas hoy',
+         VentaTransicion.objects.filter(estado_nuevo='PENDIENTE_AUDIO', estado_anterior='PENDIENTE_BO',
+                                        fecha__gte=inicio_hoy, fecha__lt=fin_hoy).order_by()),
+        ('supervisor_dashboard: tiempo en estado',
+         VentaTransicion.objects.filter(estado_anterior__in=[estado for estado, _ in Venta.ESTADOS],
+                                        fecha__gte=inicio_hoy - timedelta(weeks=4), fecha__lt=fin_hoy)
+         .order_by().values('estado_anterior').annotate(cantidad=Count('id'))),
+        ('jadira_pendientes: bandeja', Venta.objects.filter(estado='PENDIENTE_BO')[:20]),
+        ('jadira_pendientes: por asesor',
+         Venta.objects.filter(estado='PENDIENTE_BO', asesor_id=asesor_id)[:20]),
+        ('notificaciones: no leídas',
+         NotificacionVenta.objects.filter(usuario_destinatario_id=usuario_id, leida=False)[:5]),
+        ('notificaciones: no leídas de una venta',
+         NotificacionVenta.objects.filter(venta_id=1, usuario_destinatario_id=usuario_id, leida=False)),
+    ]
+
+
+def es_recorrido_completo(plan):
+    """SCAN sin índice sobre una tabla = lectura de la tabla completa"""
+    return any(
+        'SCAN' in linea and 'USING' not in linea and 'SUBQUERY' not in linea
+        for linea in plan.splitlines()
+    )
+
+
+class Command(BaseCommand):
+    help = 'Muestra el plan de ejecución (EXPLAIN QUERY PLAN) de las consultas frecuentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asesor', type=int, default=1, help='ID de asesor para las consultas')
+        parser.add_argument('--usuario', type=int, default=1, help='ID de usuario para las notificaciones')
+        parser.add_argument(
+            '--estricto', action='store_true',
+            help='Termina con error si alguna consulta recorre una tabla completa',
+        )
+
+    def handle(self, *args, **options):
+        recorridos = []
+        for nombre, queryset in consultas_frecuentes(options['asesor'], options['usuario']):
+            plan = queryset.explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(nombre))
+            self.stdout.write(plan)
+            self.stdout.write('')
+            if es_recorrido_completo(plan):
+                recorridos.append(nombre)
+
+        if recorridos:
+            for nombre in recorridos:
+                self.stdout.write(self.style.WARNING(f'Recorrido completo: {nombre}'))
+            if options['estricto']:
+                raise CommandError(f'{len(recorridos)} consulta(s) sin índice')
+        else:
+            self.stdout.write(self.style.SUCCESS('Todas las consultas usan índices'))
@@ -0,0 +1,169 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.ventas.busqueda import indexar_ventas
+from apps.ventas.estados import registrar_creaciones
+from apps.ventas.fechas import sin_fechas_automaticas
+from apps.ventas.importacion import (
+    ESTADO_POR_HOJA, FilaInvalida, IndiceAsesores, asignar_asesor, clave_venta, fila_a_venta, nombre_asesor,
+    ubicar_columnas,
+)
+from apps.ventas.models import Venta
+from apps.ventas.rollups import registrar_ventas
+from apps.ventas.versiones import cambio_registrado
+from apps.ventas.xlsx import LibroXlsx
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def memoria_maxima_mb():
+    """Pico de memoria residente del proceso (None si el sistema no lo informa)"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Importa las ventas históricas del Excel "VENTAS JARD DIGITAL SAC.xlsx"'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archivo', nargs='?', default=str(settings.BASE_DIR / 'VENTAS JARD DIGITAL SAC.xlsx'),
+        )
+        parser.add_argument(
+            '--hoja', action='append', dest='hojas',
+            help='Hoja a importar (se puede repetir). Por defecto: ' + ', '.join(ESTADO_POR_HOJA),
+        )
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por transacción')
+        parser.add_argument(
+            '--crear-asesores', action='store_true',
+            help='Crea como inactivos los asesores que no existan (si no, sus filas se omiten)',
+        )
+
+    def handle(self, *args, **options):
+        self.indice = IndiceAsesores()
+        self.crear_asesores = options['crear_asesores']
+        self.conteo = Counter()
+        self.sin_asesor = Counter()
+        inicio = time.perf_counter()
+
+        try:
+            libro = LibroXlsx(options['archivo'])
+        except (OSError, ValueError) as error:
+            raise CommandError(f'No se pudo abrir {options["archivo"]}: {error}')
+
+        with libro:
+            for hoja in options['hojas'] or list(ESTADO_POR_HOJA):
+                try:
+                    self.importar_hoja(libro, hoja, options['lote'])
+                except KeyError as error:
+                    raise CommandError(error.args[0])
+
+        duracion = time.perf_counter() - inicio
+        self.reportar(duracion)
+
+    def importar_hoja(self, libro, hoja, tamaño_lote):
+        filas = libro.filas(hoja)
+        columnas = ubicar_columnas(next(filas, []))
+        if 'cliente' not in columnas or 'fecha_venta' not in columnas:
+            raise CommandError(f'La hoja "{hoja}" no tiene las columnas CLIENTE y FECHA DE VENTA')
+
+        vistas = set()
+        lote = []
+        for fila in filas:
+            self.conteo['leídas'] += 1
+            venta = self.convertir(fila, columnas, hoja)
+            if venta is None:
+                continue
+
+            clave = clave_venta(venta)
+            if clave in vistas:
+                self.conteo['repetidas en el archivo'] += 1
+                continue
+            vistas.add(clave)
+
+            lote.append(venta)
+            if len(lote) >= tamaño_lote:
+                self.guardar(lote)
+                lote = []
+        self.guardar(lote)
+
+    def convertir(self, fila, columnas, hoja):
+        try:
+            venta = fila_a_venta(fila, columnas, hoja)
+        except FilaInvalida:
+            self.conteo['vacías o sin fecha'] += 1
+            return None
+
+        nombre = nombre_asesor(fila, columnas)
+        asesor = self.indice.buscar(nombre) if nombre else None
+        if asesor is None and nombre and self.crear_asesores:
+            asesor = self.indice.crear(nombre)
+            self.conteo['asesores creados'] += 1
+        if asesor is None:
+            self.sin_asesor[nombre or '(vacío)'] += 1
+            return None
+
+        return asignar_asesor(venta, asesor)
+
+    def guardar(self, lote):
+        """
+        Inserta un lote en su propia transacción.
+
+        bulk_create no emite post_save: no se generan notificaciones por cada
+        venta histórica, y el índice de búsqueda y el resumen diario se
+        actualizan aquí en bloque.
+        """
+        if not lote:
+            return
+
+        with transaction.atomic():
+            existentes = {
+                (sot, sec, dni, nombre.upper())
+                for sot, sec, dni, nombre in Venta.objects.filter(
+                    sot__in={venta.sot for venta in lote},
+                    cliente_dni__in={venta.cliente_dni for venta in lote},
+                ).values_list('sot', 'sec', 'cliente_dni', 'cliente_nombre')
+            }
+            nuevas = [venta for venta in lote if clave_venta(venta) not in existentes]
+
+            with sin_fechas_automaticas(Venta):
+                creadas = Venta.objects.bulk_create(nuevas)
+            indexar_ventas(creadas)
+            registrar_ventas(creadas)
+            registrar_creaciones(creadas)
+            if creadas:
+                cambio_registrado('ventas')
+                for asesor_id in {venta.asesor_id for venta in creadas}:
+                    cambio_registrado('ventas', 'asesor', asesor_id)
+
+        self.conteo['creadas'] += len(creadas)
+        self.conteo['ya importadas'] += len(lote) - len(nuevas)
+
+    def reportar(self, duracion):
+        for concepto in ('leídas', 'creadas', 'ya importadas', 'repetidas en el archivo',
+                         'vacías o sin fecha', 'asesores creados'):
+            if self.conteo[concepto]:
+                self.stdout.write(f'{concepto}: {self.conteo[concepto]}')
+
+        if self.sin_asesor:
+            self.stdout.write(self.style.WARNING(
+                f'omitidas por asesor no encontrado: {sum(self.sin_asesor.values())} '
+                '(use --crear-asesores para crearlos)'
+            ))
+            for nombre, cantidad in self.sin_asesor.most_common():
+                self.stdout.write(f'  {nombre}: {cantidad}')
+
+        velocidad = self.conteo['leídas'] / duracion if duracion else 0
+        memoria = memoria_maxima_mb()
+        self.stdout.write(self.style.SUCCESS(
+            f'{duracion:.2f} s, {velocidad:,.0f} filas/s, memoria máxima '
+            + (f'{memoria:.1f} MB' if memoria is not None else 'n/d')
+        ))
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections
+
+from apps.ventas.tareas import LOTE, procesar
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de tareas de las ventas (notificaciones, índice de búsqueda)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE, help='Tareas por transacción')
+        parser.add_argument(
+            '--espera', type=float, default=None,
+            help='Segundos entre revisiones cuando la cola está vacía (por defecto TAREAS_ESPERA_SEGUNDOS)',
+        )
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Vacía la cola y termina (por ejemplo, desde cron)',
+        )
+
+    def handle(self, *args, **options):
+        espera = options['espera']
+        if espera is None:
+            espera = getattr(settings, 'TAREAS_ESPERA_SEGUNDOS', 5)
+        total = 0
+        try:
+            while True:
+                try:
+                    tomadas = procesar(options['lote'])
+                except OperationalError as error:
+                    # Base de datos ocupada: se vuelve a intentar en la próxima vuelta
+                    self.stderr.write(self.style.WARNING(f'No se pudo procesar: {error}'))
+                    tomadas = 0
+                    close_old_connections()
+                total += tomadas
+                if tomadas and options['verbosity'] > 1:
+                    self.stdout.write(f'{tomadas} tarea(s) procesada(s)')
+                if tomadas < options['lote']:
+                    if options['una_vez']:
+                        break
+                    time.sleep(espera)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'{total} tarea(s) procesada(s) en total'))
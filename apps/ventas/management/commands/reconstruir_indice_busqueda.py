@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.ventas.busqueda import TABLA_FTS, indexar_ventas, usa_fts
+from apps.ventas.models import Venta
+
+
+class Command(BaseCommand):
+    help = 'Regenera el índice de búsqueda de clientes a partir de la tabla de ventas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        campos = ('id', 'cliente_nombre', 'cliente_dni', 'cliente_telefono')
+        lote = []
+        total = 0
+
+        for venta in Venta.objects.order_by().only(*campos).iterator(chunk_size=options['lote']):
+            lote.append(venta)
+            if len(lote) >= options['lote']:
+                indexar_ventas(lote)
+                total += len(lote)
+                lote = []
+        indexar_ventas(lote)
+        total += len(lote)
+
+        if usa_fts():
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('optimize')")
+
+        self.stdout.write(self.style.SUCCESS(f'{total} ventas indexadas'))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.replica import ALIAS, refrescar, retraso_maximo
+
+
+class Command(BaseCommand):
+    help = 'Copia la base de datos principal sobre la réplica de reportes (una vez o cada N segundos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cada', type=int, default=0,
+            help='Segundos entre copias; 0 copia una sola vez (por ejemplo, desde cron)',
+        )
+
+    def handle(self, *args, **options):
+        if ALIAS not in settings.DATABASES:
+            raise CommandError(f'No hay una base de datos "{ALIAS}" en DATABASES')
+        cada = options['cada']
+        if cada >= retraso_maximo():
+            self.stderr.write(self.style.WARNING(
+                f'--cada {cada} no es menor que REPLICA_RETRASO_MAXIMO ({retraso_maximo()}): '
+                'los reportes leerán de la base principal parte del tiempo'
+            ))
+
+        while True:
+            segundos = refrescar()
+            self.stdout.write(f'Réplica actualizada en {segundos:.2f} s')
+            if not cada:
+                return
+            time.sleep(max(0, cada - segundos))
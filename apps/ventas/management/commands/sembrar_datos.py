@@ -0,0 +1,153 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.usuarios.models import Usuario
+from apps.ventas.benchmarks import APELLIDOS, NOMBRES, crear_asesores, generar_ventas
+from apps.ventas.busqueda import indexar_ventas
+from apps.ventas.estados import registrar_creaciones
+from apps.ventas.fechas import sin_fechas_automaticas
+from apps.ventas.models import NotificacionDifusion, NotificacionVenta, Venta
+from apps.ventas.notificaciones import invalidar_notificaciones
+from apps.ventas.rollups import reconstruir
+from apps.ventas.versiones import cambio_registrado
+
+
+class Command(BaseCommand):
+    help = (
+        'Llena la base de datos con usuarios, ventas y notificaciones sintéticas para '
+        'pruebas de carga (no usar en producción)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asesores', type=int, default=300)
+        parser.add_argument('--back-office', type=int, default=10)
+        parser.add_argument('--supervisores', type=int, default=3)
+        parser.add_argument('--ventas', type=int, default=1_000_000)
+        parser.add_argument('--dias', type=int, default=365, help='Antigüedad máxima de las ventas')
+        parser.add_argument('--notificaciones', type=int, default=50, help='Por usuario de Back Office y asesor')
+        parser.add_argument('--lote', type=int, default=5000, help='Ventas por transacción')
+        parser.add_argument('--prefijo', default='demo', help='Prefijo de los nombres de usuario')
+        parser.add_argument('--password', default='demo1234', help='Contraseña de todos los usuarios creados')
+
+    def handle(self, *args, **options):
+        prefijo = options['prefijo']
+        if Usuario.objects.filter(username__startswith=f'{prefijo}_').exists():
+            raise CommandError(f'Ya hay usuarios "{prefijo}_*"; usa otro --prefijo o una base de datos limpia')
+        inicio = time.perf_counter()
+
+        asesores, back_office = self.crear_usuarios(options)
+        self.stdout.write(
+            f'{len(asesores)} asesores, {len(back_office)} de Back Office, '
+            f'{options["supervisores"]} supervisores y 1 dueño (contraseña: {options["password"]})'
+        )
+
+        creadas = generar_ventas(asesores, options['ventas'], options['dias'], options['lote'], self.al_crear)
+        self.stdout.write(f'{creadas} ventas')
+
+        # Con ventas repartidas en todo el rango, rehacer los resúmenes de una
+        # vez es mucho más rápido que sumarlos lote por lote
+        hoy = timezone.localdate()
+        reconstruir(hoy - timedelta(days=options['dias']), hoy)
+
+        notificaciones = self.crear_notificaciones(asesores, back_office, options['notificaciones'])
+        self.stdout.write(f'{notificaciones} notificaciones')
+
+        self.stdout.write(self.style.SUCCESS(f'Datos sembrados en {time.perf_counter() - inicio:.1f} s'))
+
+    def crear_usuarios(self, options):
+        prefijo = options['prefijo']
+        with transaction.atomic():
+            asesores = crear_asesores(options['asesores'], prefijo=f'{prefijo}_asesor')
+            Usuario.objects.bulk_create(
+                [
+                    Usuario(
+                        username=f'{prefijo}_{rol.lower()}_{i}',
+                        first_name=random.choice(NOMBRES),
+                        last_name=random.choice(APELLIDOS),
+                        rol=rol,
+                    )
+                    for rol, cantidad in (
+                        ('BACK_OFFICE', options['back_office']),
+                        ('SUPERVISOR', options['supervisores']),
+                        ('DUEÑO', 1),
+                    )
+                    for i in range(cantidad)
+                ]
+            )
+            # Un solo hash para todos: calcularlo por usuario tomaría minutos
+            Usuario.objects.filter(username__startswith=f'{prefijo}_').update(
+                password=make_password(options['password'])
+            )
+            cambio_registrado('usuarios')
+
+        back_office = list(Usuario.objects.filter(username__startswith=f'{prefijo}_', rol='BACK_OFFICE'))
+        return asesores, back_office
+
+    def al_crear(self, ventas):
+        """Lo que las señales harían por cada venta (salvo los resúmenes), en bloque por lote"""
+        indexar_ventas(ventas)
+        registrar_creaciones(ventas)
+        cambio_registrado('ventas')
+        for asesor_id in {venta.asesor_id for venta in ventas}:
+            cambio_registrado('ventas', 'asesor', asesor_id)
+
+    def crear_notificaciones(self, asesores, back_office, por_usuario):
+        """Avisos de ventas nuevas (Back Office) y completadas (asesores); la mayoría ya leídos"""
+        if not por_usuario:
+            return 0
+        ahora = timezone.now()
+        pendientes = list(
+            Venta.objects.filter(estado='PENDIENTE_BO').order_by('-fecha_creacion')
+            .values_list('id', 'asesor_id', 'fecha_creacion')[:por_usuario]
+        )
+
+        notificaciones = [
+            NotificacionVenta(
+                venta_id=venta_id,
+                usuario_destinatario=usuario,
+                mensaje=f'Nueva venta #{venta_id} pendiente de completar',
+                leida=random.random() < 0.8,
+                fecha_creacion=fecha,
+            )
+            for usuario in back_office
+            for venta_id, _, fecha in pendientes
+        ]
+        for asesor in asesores:
+            completadas = (
+                Venta.objects.filter(asesor=asesor).exclude(estado='PENDIENTE_BO')
+                .order_by('-fecha_creacion').values_list('id', 'fecha_estado')[:por_usuario]
+            )
+            notificaciones += [
+                NotificacionVenta(
+                    venta_id=venta_id,
+                    usuario_destinatario=asesor,
+                    mensaje=f'Tu venta #{venta_id} fue completada por Back Office',
+                    leida=random.random() < 0.8,
+                    fecha_creacion=fecha or ahora - timedelta(days=1),
+                )
+                for venta_id, fecha in completadas
+            ]
+        difusiones = [
+            NotificacionDifusion(
+                venta_id=venta_id,
+                rol_destinatario='BACK_OFFICE',
+                mensaje=f'Nueva venta #{venta_id} pendiente de completar',
+                fecha_creacion=fecha,
+            )
+            for venta_id, _, fecha in pendientes
+        ]
+
+        with transaction.atomic(), sin_fechas_automaticas(NotificacionVenta, NotificacionDifusion):
+            NotificacionVenta.objects.bulk_create(notificaciones, batch_size=5000)
+            NotificacionDifusion.objects.bulk_create(difusiones, batch_size=5000)
+            usuario_ids = [usuario.pk for usuario in (*asesores, *back_office)]
+            invalidar_notificaciones(*usuario_ids)
+            for usuario_id in usuario_ids:
+                cambio_registrado('notificaciones', usuario_id)
+        return len(notificaciones) + len(difusiones)
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificacionventa',
+            index=models.Index(condition=models.Q(('leida', False)), fields=['usuario_destinatario', '-fecha_creacion'], name='notif_no_leidas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacionventa',
+            index=models.Index(fields=['venta', 'usuario_destinatario'], name='notif_venta_usuario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['asesor', 'estado', '-fecha_creacion'], name='venta_asesor_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['asesor', '-fecha_creacion'], name='venta_asesor_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(condition=models.Q(('estado', 'PENDIENTE_BO')), fields=['-fecha_creacion'], name='venta_pendiente_bo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['estado', 'fecha_modificacion'], name='venta_estado_modif_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('usuarios', '0001_initial'),
+        ('ventas', '0002_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CursorDifusion',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cursor_difusion', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('leidas_hasta', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Cursor de difusión',
+                'verbose_name_plural': 'Cursores de difusión',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificacionDifusion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rol_destinatario', models.CharField(max_length=30)),
+                ('mensaje', models.TextField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('venta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='difusiones', to='ventas.venta')),
+            ],
+            options={
+                'verbose_name': 'Notificación de difusión',
+                'verbose_name_plural': 'Notificaciones de difusión',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LecturaDifusion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_lectura', models.DateTimeField(auto_now_add=True)),
+                ('notificacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lecturas', to='ventas.notificaciondifusion')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lecturas_difusion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lectura de difusión',
+                'verbose_name_plural': 'Lecturas de difusión',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificaciondifusion',
+            index=models.Index(fields=['rol_destinatario', '-fecha_creacion'], name='difusion_rol_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='lecturadifusion',
+            constraint=models.UniqueConstraint(fields=('usuario', 'notificacion'), name='lectura_difusion_unica'),
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+import unicodedata
+
+
+# Tabla FTS5 de contenido externo: los datos viven en ventas_indicebusquedaventa
+# y los triggers mantienen el índice sincronizado en cada INSERT/UPDATE/DELETE.
+SQL_CREAR_FTS = [
+    """
+    CREATE VIRTUAL TABLE ventas_busqueda_fts USING fts5(
+        nombre, dni, telefono,
+        content='ventas_indicebusquedaventa',
+        content_rowid='venta_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_ai AFTER INSERT ON ventas_indicebusquedaventa BEGIN
+        INSERT INTO ventas_busqueda_fts(rowid, nombre, dni, telefono)
+        VALUES (new.venta_id, new.nombre, new.dni, new.telefono);
+    END
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_ad AFTER DELETE ON ventas_indicebusquedaventa BEGIN
+        INSERT INTO ventas_busqueda_fts(ventas_busqueda_fts, rowid, nombre, dni, telefono)
+        VALUES ('delete', old.venta_id, old.nombre, old.dni, old.telefono);
+    END
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_au AFTER UPDATE ON ventas_indicebusquedaventa BEGIN
+        INSERT INTO ventas_busqueda_fts(ventas_busqueda_fts, rowid, nombre, dni, telefono)
+        VALUES ('delete', old.venta_id, old.nombre, old.dni, old.telefono);
+        INSERT INTO ventas_busqueda_fts(rowid, nombre, dni, telefono)
+        VALUES (new.venta_id, new.nombre, new.dni, new.telefono);
+    END
+    """,
+]
+
+SQL_BORRAR_FTS = [
+    'DROP TRIGGER IF EXISTS ventas_busqueda_ai',
+    'DROP TRIGGER IF EXISTS ventas_busqueda_ad',
+    'DROP TRIGGER IF EXISTS ventas_busqueda_au',
+    'DROP TABLE IF EXISTS ventas_busqueda_fts',
+]
+
+
+def crear_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_CREAR_FTS:
+        schema_editor.execute(sql)
+
+
+def borrar_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_BORRAR_FTS:
+        schema_editor.execute(sql)
+
+
+def normalizar(texto):
+    sin_tildes = unicodedata.normalize('NFKD', texto or '')
+    sin_tildes = ''.join(c for c in sin_tildes if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.lower().split())
+
+
+def indexar_ventas_existentes(apps, schema_editor):
+    Venta = apps.get_model('ventas', 'Venta')
+    IndiceBusquedaVenta = apps.get_model('ventas', 'IndiceBusquedaVenta')
+    alias = schema_editor.connection.alias
+
+    ventas = Venta.objects.using(alias).values_list('id', 'cliente_nombre', 'cliente_dni', 'cliente_telefono')
+    lote = []
+    for venta_id, nombre, dni, telefono in ventas.iterator(chunk_size=2000):
+        lote.append(IndiceBusquedaVenta(
+            venta_id=venta_id,
+            nombre=normalizar(nombre),
+            dni=re.sub(r'\D', '', dni or ''),
+            telefono=re.sub(r'\D', '', telefono or ''),
+        ))
+        if len(lote) >= 2000:
+            IndiceBusquedaVenta.objects.using(alias).bulk_create(lote)
+            lote = []
+    IndiceBusquedaVenta.objects.using(alias).bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0003_notificaciones_difusion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusquedaVenta',
+            fields=[
+                ('venta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='indice_busqueda', serialize=False, to='ventas.venta')),
+                ('nombre', models.CharField(max_length=200)),
+                ('dni', models.CharField(max_length=8)),
+                ('telefono', models.CharField(max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Índice de búsqueda',
+                'verbose_name_plural': 'Índice de búsqueda',
+                'indexes': [models.Index(fields=['dni'], name='busqueda_dni_idx'), models.Index(fields=['telefono'], name='busqueda_telefono_idx')],
+            },
+        ),
+        migrations.RunPython(crear_fts, borrar_fts),
+        migrations.RunPython(indexar_ventas_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def resumir_ventas_existentes(apps, schema_editor):
+    Venta = apps.get_model('ventas', 'Venta')
+    ResumenDiarioVenta = apps.get_model('ventas', 'ResumenDiarioVenta')
+    alias = schema_editor.connection.alias
+
+    filas = (
+        Venta.objects.using(alias).order_by()
+        .annotate(dia=TruncDate('fecha_creacion', tzinfo=timezone.get_default_timezone()))
+        .values_list('dia', 'asesor_id', 'modalidad', 'turno', 'estado')
+        .annotate(cantidad=Count('id'), total=Sum('monto'))
+    )
+    ResumenDiarioVenta.objects.using(alias).bulk_create([
+        ResumenDiarioVenta(
+            dia=dia, asesor_id=asesor_id, modalidad=modalidad, turno=turno, estado=estado,
+            cantidad=cantidad, monto=total or 0,
+        )
+        for dia, asesor_id, modalidad, turno, estado, cantidad, total in filas.iterator(chunk_size=2000)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ventas', '0004_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioVenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(verbose_name='Día')),
+                ('modalidad', models.CharField(max_length=20)),
+                ('turno', models.CharField(max_length=10)),
+                ('estado', models.CharField(max_length=30)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('asesor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de ventas',
+                'verbose_name_plural': 'Resúmenes diarios de ventas',
+                'indexes': [models.Index(fields=['asesor', 'dia'], name='resumen_asesor_dia_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiarioventa',
+            constraint=models.UniqueConstraint(fields=('dia', 'asesor', 'modalidad', 'turno', 'estado'), name='resumen_diario_unico'),
+        ),
+        migrations.RunPython(resumir_ventas_existentes, migrations.RunPython.noop),
+    ]
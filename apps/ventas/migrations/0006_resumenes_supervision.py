@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncWeek
+import django.db.models.deletion
+
+
+def derivar_resumenes(apps, schema_editor):
+    ResumenDiarioVenta = apps.get_model('ventas', 'ResumenDiarioVenta')
+    ResumenDiarioTurno = apps.get_model('ventas', 'ResumenDiarioTurno')
+    ResumenSemanalAsesor = apps.get_model('ventas', 'ResumenSemanalAsesor')
+    alias = schema_editor.connection.alias
+
+    diarios = ResumenDiarioVenta.objects.using(alias).order_by().filter(cantidad__gt=0)
+    ResumenDiarioVenta.objects.using(alias).filter(cantidad__lte=0).delete()
+
+    ResumenDiarioTurno.objects.using(alias).bulk_create([
+        ResumenDiarioTurno(dia=dia, turno=turno, estado=estado, cantidad=cantidad, monto=total or 0)
+        for dia, turno, estado, cantidad, total in (
+            diarios.values_list('dia', 'turno', 'estado')
+            .annotate(total_cantidad=Sum('cantidad'), total=Sum('monto'))
+            .iterator(chunk_size=2000)
+        )
+    ], batch_size=1000)
+    ResumenSemanalAsesor.objects.using(alias).bulk_create([
+        ResumenSemanalAsesor(semana=semana, asesor_id=asesor_id, estado=estado, cantidad=cantidad, monto=total or 0)
+        for semana, asesor_id, estado, cantidad, total in (
+            diarios.annotate(semana=TruncWeek('dia'))
+            .values_list('semana', 'asesor_id', 'estado')
+            .annotate(total_cantidad=Sum('cantidad'), total=Sum('monto'))
+            .iterator(chunk_size=2000)
+        )
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ventas', '0005_resumen_diario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenSemanalAsesor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana', models.DateField(verbose_name='Semana')),
+                ('estado', models.CharField(max_length=30)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('asesor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_semanales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen semanal por asesor',
+                'verbose_name_plural': 'Resúmenes semanales por asesor',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioTurno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(verbose_name='Día')),
+                ('turno', models.CharField(max_length=10)),
+                ('estado', models.CharField(max_length=30)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Resumen diario por turno',
+                'verbose_name_plural': 'Resúmenes diarios por turno',
+                'indexes': [models.Index(fields=['estado', 'dia'], name='resumen_turno_estado_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiarioturno',
+            constraint=models.UniqueConstraint(fields=('dia', 'turno', 'estado'), name='resumen_turno_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumensemanalasesor',
+            constraint=models.UniqueConstraint(fields=('semana', 'asesor', 'estado'), name='resumen_semanal_unico'),
+        ),
+        migrations.RunPython(derivar_resumenes, migrations.RunPython.noop),
+    ]
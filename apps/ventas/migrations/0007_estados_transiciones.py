@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fechar_estados_existentes(apps, schema_editor):
+    """
+    Las ventas existentes no tienen historial: se toma como inicio del estado
+    actual la creación (si siguen en Pendiente BO) o la última modificación.
+    """
+    Venta = apps.get_model('ventas', 'Venta')
+    alias = schema_editor.connection.alias
+    Venta.objects.using(alias).filter(estado='PENDIENTE_BO').update(fecha_estado=models.F('fecha_creacion'))
+    Venta.objects.using(alias).exclude(estado='PENDIENTE_BO').update(fecha_estado=models.F('fecha_modificacion'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ventas', '0006_resumenes_supervision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaTransicion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado_anterior', models.CharField(blank=True, max_length=30)),
+                ('estado_nuevo', models.CharField(max_length=30)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('segundos_en_estado', models.PositiveIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Cambio de estado',
+                'verbose_name_plural': 'Cambios de estado',
+                'ordering': ['fecha', 'id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='venta',
+            name='venta_estado_modif_idx',
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='fecha_estado',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fecha del Estado Actual'),
+        ),
+        migrations.AddField(
+            model_name='ventatransicion',
+            name='usuario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transiciones_venta', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='ventatransicion',
+            name='venta',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transiciones', to='ventas.venta'),
+        ),
+        migrations.AddIndex(
+            model_name='ventatransicion',
+            index=models.Index(fields=['venta', 'fecha'], name='transicion_venta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ventatransicion',
+            index=models.Index(fields=['estado_nuevo', 'fecha'], name='transicion_entrada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ventatransicion',
+            index=models.Index(fields=['estado_anterior', 'fecha', 'segundos_en_estado'], name='transicion_salida_idx'),
+        ),
+        migrations.RunPython(fechar_estados_existentes, migrations.RunPython.noop),
+    ]
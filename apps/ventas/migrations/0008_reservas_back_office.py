@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ventas', '0007_estados_transiciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='asignada_a',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ventas_asignadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='asignada_hasta',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(condition=models.Q(('estado', 'PENDIENTE_BO')), fields=['asignada_a', 'asignada_hasta'], name='venta_asignacion_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0010_notificaciones_archivadas'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='venta',
+            name='cliente_genero',
+            field=models.CharField(blank=True, choices=[('M', 'Masculino'), ('F', 'Femenino')], max_length=1, verbose_name='Género'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models.signals import post_init
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 class Venta(models.Model):
@@ -16,6 +18,18 @@ class Venta(models.Model):
         ('RECHAZADA', 'Rechazada'),
     ]
     
+    # Estados a los que se puede pasar desde cada estado (ver estados.py)
+    TRANSICIONES = {
+        'PENDIENTE_BO': ['PENDIENTE_AUDIO', 'RECHAZADA'],
+        'PENDIENTE_AUDIO': ['AUDIO_REVISION', 'RECHAZADA'],
+        'AUDIO_REVISION': ['PENDIENTE_INSTALACION', 'AUDIO_NO_CONFORME', 'RECHAZADA'],
+        'AUDIO_NO_CONFORME': ['PENDIENTE_AUDIO', 'RECHAZADA'],
+        'PENDIENTE_INSTALACION': ['EN_EJECUCION', 'RECHAZADA'],
+        'EN_EJECUCION': ['INSTALADA', 'PENDIENTE_INSTALACION', 'RECHAZADA'],
+        'INSTALADA': [],
+        'RECHAZADA': [],
+    }
+    
     GENEROS = [
         ('M', 'Masculino'),
         ('F', 'Femenino'),
@@ -43,7 +57,8 @@ class Venta(models.Model):
     cliente_telefono = models.CharField('Teléfono', max_length=20)
     cliente_direccion = models.TextField('Dirección')
     cliente_correo = models.TextField('Correo')
-    cliente_genero = models.CharField('Género', max_length=1, choices=GENEROS)
+    # Vacío en las ventas importadas del Excel que no traen el género
+    cliente_genero = models.CharField('Género', max_length=1, choices=GENEROS, blank=True)
     
     # Datos del producto/servicio
     producto_servicio = models.CharField('Producto/Servicio', max_length=200)
@@ -58,8 +73,19 @@ class Venta(models.Model):
     
     # Control de estado
     estado = models.CharField(max_length=30, choices=ESTADOS, default='PENDIENTE_BO')
+    fecha_estado = models.DateTimeField('Fecha del Estado Actual', null=True, blank=True)
     motivo_rechazo = models.TextField('Motivo de Rechazo', blank=True)
     
+    # Reserva de Back Office (ver asignacion.py)
+    asignada_a = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ventas_asignadas'
+    )
+    asignada_hasta = models.DateTimeField(null=True, blank=True)
+    
     # Auditoría
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
@@ -74,10 +100,33 @@ class Venta(models.Model):
         verbose_name = 'Venta'
         verbose_name_plural = 'Ventas'
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Dashboard y listado del asesor (con y sin filtro de estado)
+            models.Index(fields=['asesor', 'estado', '-fecha_creacion'], name='venta_asesor_estado_idx'),
+            models.Index(fields=['asesor', '-fecha_creacion'], name='venta_asesor_fecha_idx'),
+            # Bandeja de Back Office: solo las pendientes, más recientes primero
+            models.Index(
+                fields=['-fecha_creacion'],
+                name='venta_pendiente_bo_idx',
+                condition=models.Q(estado='PENDIENTE_BO'),
+            ),
+            # Reservas vigentes de cada usuario de Back Office
+            models.Index(
+                fields=['asignada_a', 'asignada_hasta'],
+                name='venta_asignacion_idx',
+                condition=models.Q(estado='PENDIENTE_BO'),
+            ),
+        ]
     
     def __str__(self):
         return f"Venta #{self.id} - {self.cliente_nombre}"
     
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        # Los valores recargados pasan a ser los originales que comparan
+        # los resúmenes y el registro de estados (ver signals.py)
+        post_init.send(sender=self.__class__, instance=self)
+    
     def puede_modificar_asesor(self):
         """El asesor solo puede modificar si está en ciertos estados"""
         return self.estado in ['PENDIENTE_BO', 'PENDIENTE_AUDIO']
@@ -85,6 +134,181 @@ class Venta(models.Model):
     def puede_completar_backoffice(self):
         """Back office puede completar si está pendiente"""
         return self.estado == 'PENDIENTE_BO'
+    
+    def puede_pasar_a(self, estado):
+        return estado in self.TRANSICIONES.get(self.estado, [])
+    
+    def clean(self):
+        # Los formularios (incluido el admin) solo permiten cambios de estado válidos
+        anterior = getattr(self, '_estado_original', None)
+        if self.pk and anterior and anterior != self.estado and self.estado not in self.TRANSICIONES.get(anterior, []):
+            raise ValidationError({
+                'estado': f'No se puede pasar de {dict(self.ESTADOS).get(anterior, anterior)} '
+                          f'a {self.get_estado_display()}'
+            })
+
+
+class VentaTransicion(models.Model):
+    """
+    Registro de cada cambio de estado de una venta (solo se agregan filas).
+    
+    ``segundos_en_estado`` es lo que la venta estuvo en ``estado_anterior``:
+    las métricas de tiempo por estado salen de sumar esta columna en un
+    rango de fechas, sin reconstruir la historia de cada venta.
+    """
+    
+    venta = models.ForeignKey(Venta, on_delete=models.CASCADE, related_name='transiciones')
+    # Vacío en la fila que registra la creación de la venta
+    estado_anterior = models.CharField(max_length=30, blank=True)
+    estado_nuevo = models.CharField(max_length=30)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transiciones_venta'
+    )
+    fecha = models.DateTimeField(default=timezone.now)
+    segundos_en_estado = models.PositiveIntegerField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Cambio de estado'
+        verbose_name_plural = 'Cambios de estado'
+        ordering = ['fecha', 'id']
+        indexes = [
+            # Historial de una venta
+            models.Index(fields=['venta', 'fecha'], name='transicion_venta_idx'),
+            # Entradas a un estado en un rango (p. ej. completadas hoy)
+            models.Index(fields=['estado_nuevo', 'fecha'], name='transicion_entrada_idx'),
+            # Tiempo en estado de las salidas de un rango (cubre la columna sumada)
+            models.Index(fields=['estado_anterior', 'fecha', 'segundos_en_estado'], name='transicion_salida_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Venta #{self.venta_id}: {self.estado_anterior or '-'} → {self.estado_nuevo}"
+
+
+class IndiceBusquedaVenta(models.Model):
+    """
+    Datos de búsqueda de cada venta, normalizados (minúsculas y sin tildes).
+    
+    En SQLite alimenta la tabla FTS5 ``ventas_busqueda_fts`` mediante
+    triggers; en otros motores se consulta directamente.
+    """
+    
+    venta = models.OneToOneField(
+        Venta,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='indice_busqueda'
+    )
+    nombre = models.CharField(max_length=200)
+    dni = models.CharField(max_length=8)
+    telefono = models.CharField(max_length=20)
+    
+    class Meta:
+        verbose_name = 'Índice de búsqueda'
+        verbose_name_plural = 'Índice de búsqueda'
+        indexes = [
+            models.Index(fields=['dni'], name='busqueda_dni_idx'),
+            models.Index(fields=['telefono'], name='busqueda_telefono_idx'),
+        ]
+
+
+class ResumenDiarioVenta(models.Model):
+    """
+    Cantidad y monto de las ventas registradas cada día, por asesor,
+    modalidad, turno y estado actual.
+
+    Se mantiene en cada alta, cambio o baja de una venta (ver rollups.py) y
+    se puede regenerar con ``manage.py reconstruir_rollups``.
+    """
+
+    dia = models.DateField('Día')
+    asesor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='resumenes_diarios'
+    )
+    modalidad = models.CharField(max_length=20)
+    turno = models.CharField(max_length=10)
+    estado = models.CharField(max_length=30)
+    cantidad = models.IntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumen diario de ventas'
+        verbose_name_plural = 'Resúmenes diarios de ventas'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'asesor', 'modalidad', 'turno', 'estado'],
+                name='resumen_diario_unico',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['asesor', 'dia'], name='resumen_asesor_dia_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.asesor_id} {self.estado}: {self.cantidad}"
+
+
+class ResumenDiarioTurno(models.Model):
+    """
+    Resumen diario de todo el equipo por turno y estado.
+
+    Es ResumenDiarioVenta sumado sobre asesores y modalidades: lo usa el
+    dashboard de supervisión para la serie diaria y el backlog por estado.
+    """
+
+    dia = models.DateField('Día')
+    turno = models.CharField(max_length=10)
+    estado = models.CharField(max_length=30)
+    cantidad = models.IntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumen diario por turno'
+        verbose_name_plural = 'Resúmenes diarios por turno'
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'turno', 'estado'], name='resumen_turno_unico'),
+        ]
+        indexes = [
+            # Backlog por estado
+            models.Index(fields=['estado', 'dia'], name='resumen_turno_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.turno} {self.estado}: {self.cantidad}"
+
+
+class ResumenSemanalAsesor(models.Model):
+    """
+    Resumen semanal (semana = lunes) de cada asesor por estado.
+
+    Es ResumenDiarioVenta agrupado por semana: el dashboard de supervisión
+    lee ~7 veces menos filas que con el resumen diario.
+    """
+
+    semana = models.DateField('Semana')
+    asesor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='resumenes_semanales'
+    )
+    estado = models.CharField(max_length=30)
+    cantidad = models.IntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumen semanal por asesor'
+        verbose_name_plural = 'Resúmenes semanales por asesor'
+        constraints = [
+            models.UniqueConstraint(fields=['semana', 'asesor', 'estado'], name='resumen_semanal_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.semana} {self.asesor_id} {self.estado}: {self.cantidad}"
 
 
 class NotificacionVenta(models.Model):
@@ -104,6 +328,127 @@ class NotificacionVenta(models.Model):
         verbose_name = 'Notificación'
         verbose_name_plural = 'Notificaciones'
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Contador y desplegable de notificaciones en cada página
+            models.Index(
+                fields=['usuario_destinatario', '-fecha_creacion'],
+                name='notif_no_leidas_idx',
+                condition=models.Q(leida=False),
+            ),
+            # Marcar como leídas las notificaciones de una venta
+            models.Index(fields=['venta', 'usuario_destinatario'], name='notif_venta_usuario_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Notificación para {self.usuario_destinatario.username}"
+
+
+class NotificacionVentaArchivada(models.Model):
+    """Notificación leída y antigua, sacada de NotificacionVenta (manage.py compactar_notificaciones)"""
+    
+    # El mismo id que tenía en NotificacionVenta
+    id = models.BigIntegerField(primary_key=True)
+    venta = models.ForeignKey(Venta, on_delete=models.CASCADE, related_name='notificaciones_archivadas')
+    usuario_destinatario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notificaciones_archivadas'
+    )
+    mensaje = models.TextField()
+    fecha_creacion = models.DateTimeField()
+    fecha_archivado = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Notificación archivada'
+        verbose_name_plural = 'Notificaciones archivadas'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            # Historial de notificaciones de un usuario
+            models.Index(fields=['usuario_destinatario', '-fecha_creacion'], name='notif_archivada_usuario_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Notificación archivada para {self.usuario_destinatario_id}"
+
+class NotificacionDifusion(models.Model):
+    """Notificación única para todos los usuarios de un rol (entrega al leer)"""
+    
+    venta = models.ForeignKey(Venta, on_delete=models.CASCADE, related_name='difusiones')
+    rol_destinatario = models.CharField(max_length=30)
+    mensaje = models.TextField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Notificación de difusión'
+        verbose_name_plural = 'Notificaciones de difusión'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['rol_destinatario', '-fecha_creacion'], name='difusion_rol_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Difusión a {self.rol_destinatario}: venta #{self.venta_id}"
+
+
+class LecturaDifusion(models.Model):
+    """Marca de lectura de un usuario sobre una notificación de difusión"""
+    
+    notificacion = models.ForeignKey(NotificacionDifusion, on_delete=models.CASCADE, related_name='lecturas')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='lecturas_difusion')
+    fecha_lectura = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Lectura de difusión'
+        verbose_name_plural = 'Lecturas de difusión'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'notificacion'], name='lectura_difusion_unica'),
+        ]
+
+
+class CursorDifusion(models.Model):
+    """Hasta qué fecha el usuario marcó todas las difusiones como leídas"""
+    
+    usuario = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cursor_difusion'
+    )
+    leidas_hasta = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = 'Cursor de difusión'
+        verbose_name_plural = 'Cursores de difusión'
+
+
+class Tarea(models.Model):
+    """Efecto secundario pendiente de una venta (ver tareas.py); se borra al completarse"""
+    
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('FALLIDA', 'Fallida'),
+    ]
+    
+    nombre = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='PENDIENTE')
+    intentos = models.PositiveIntegerField(default=0)
+    disponible_desde = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        ordering = ['id']
+        indexes = [
+            # Siguientes tareas listas para el worker
+            models.Index(
+                fields=['disponible_desde', 'id'],
+                name='tarea_pendiente_idx',
+                condition=models.Q(estado='PENDIENTE'),
+            ),
+        ]
     
     def __str__(self):
-        return f"Notificación para {self.usuario_destinatario.username}"
\ No newline at end of file
+        return f"{self.nombre} {self.argumentos} ({self.get_estado_display()})"
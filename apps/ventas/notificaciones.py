@@ -0,0 +1,301 @@
+"""
+Entrega y lectura de notificaciones.
+
+Hay dos modos de entrega (``settings.NOTIFICACIONES_ENTREGA``):
+
+- ``'lote'``: una fila de NotificacionVenta por destinatario, insertadas con
+  un solo bulk_create.
+- ``'difusion'``: una sola NotificacionDifusion por evento para todo el rol;
+  las marcas de lectura por usuario se crean recién cuando el usuario lee.
+
+En ambos casos cada usuario conserva su propio estado leído/no leído.
+
+El contador de no leídas y las últimas notificaciones de cada usuario se
+guardan en la caché de Django. Las páginas ya no las consultan: el stream
+SSE (ver eventos.py) las envía al conectarse y cada vez que cambian; la base
+de datos solo se consulta cuando la caché no tiene el dato.
+
+Las notificaciones leídas más antiguas que ``NOTIFICACIONES_RETENCION_DIAS``
+pasan a NotificacionVentaArchivada (``manage.py compactar_notificaciones``),
+así NotificacionVenta queda con las no leídas y las recientes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.usuarios.models import Usuario
+from .eventos import canal_rol, canal_usuario, evento_notificacion, publicar_al_confirmar
+from .versiones import cambio_registrado
+from .models import (
+    NotificacionVenta, NotificacionVentaArchivada, NotificacionDifusion, LecturaDifusion, CursorDifusion,
+)
+
+
+TIEMPO_CACHE = 60 * 10
+CANTIDAD_RECIENTES = 5
+
+
+def _clave_contador(usuario_id):
+    return f'notificaciones:{usuario_id}:no_leidas'
+
+
+def _clave_recientes(usuario_id):
+    return f'notificaciones:{usuario_id}:recientes'
+
+
+def _clave_generacion(usuario_id):
+    return f'notificaciones:{usuario_id}:generacion'
+
+
+def _clave_generacion_rol(rol):
+    return f'notificaciones:rol:{rol}:generacion'
+
+
+# ==================== ENTREGA ====================
+
+def notificar_usuarios(venta, usuario_ids, mensaje):
+    """Crea una notificación por usuario con un solo INSERT"""
+    notificar_en_lote([(venta, usuario_id, mensaje) for usuario_id in usuario_ids])
+
+
+def notificar_en_lote(avisos):
+    """Crea las notificaciones de varias ventas, [(venta, usuario_id, mensaje)], con un solo INSERT"""
+    notificaciones = NotificacionVenta.objects.bulk_create([
+        NotificacionVenta(venta=venta, usuario_destinatario_id=usuario_id, mensaje=mensaje)
+        for venta, usuario_id, mensaje in avisos
+    ])
+    notificacion_creada(*[notificacion.usuario_destinatario_id for notificacion in notificaciones])
+    for notificacion in notificaciones:
+        publicar_al_confirmar(canal_usuario(notificacion.usuario_destinatario_id), evento_notificacion(notificacion))
+
+
+def mensaje_venta_completada(venta):
+    return (
+        f'Venta #{venta.id} ha sido completada por Back Office. '
+        f'Fecha instalación: {venta.fecha_instalacion_programada}'
+    )
+
+
+def notificar_rol(venta, rol, mensaje):
+    """Notifica a todos los usuarios activos de un rol según el modo de entrega"""
+    notificar_rol_en_lote(rol, [(venta, mensaje)])
+
+
+def notificar_rol_en_lote(rol, avisos):
+    """notificar_rol para varias ventas, [(venta, mensaje)], con un solo INSERT"""
+    if not avisos:
+        return
+    if getattr(settings, 'NOTIFICACIONES_ENTREGA', 'lote') == 'difusion':
+        difusiones = NotificacionDifusion.objects.bulk_create([
+            NotificacionDifusion(venta=venta, rol_destinatario=rol, mensaje=mensaje) for venta, mensaje in avisos
+        ])
+        _nueva_generacion_rol(rol)
+        for difusion in difusiones:
+            publicar_al_confirmar(canal_rol(rol), evento_notificacion(difusion, difusion=True))
+    else:
+        usuario_ids = list(Usuario.objects.filter(rol=rol, activo=True).values_list('id', flat=True))
+        notificar_en_lote([(venta, usuario_id, mensaje) for venta, mensaje in avisos for usuario_id in usuario_ids])
+
+
+# ==================== LECTURA ====================
+
+def _difusiones_no_leidas(usuario):
+    """Difusiones del rol del usuario posteriores a su cursor y sin marca de lectura"""
+    desde = usuario.date_joined
+    cursor = CursorDifusion.objects.filter(usuario=usuario).values_list('leidas_hasta', flat=True).first()
+    if cursor and cursor > desde:
+        desde = cursor
+
+    return NotificacionDifusion.objects.filter(
+        rol_destinatario=usuario.rol,
+        fecha_creacion__gt=desde,
+    ).exclude(lecturas__usuario=usuario)
+
+
+def _consultar_no_leidas(usuario):
+    directas = NotificacionVenta.objects.filter(usuario_destinatario=usuario, leida=False)
+    difusiones = _difusiones_no_leidas(usuario)
+    campos = ('id', 'venta_id', 'mensaje', 'fecha_creacion')
+
+    cantidad = directas.count() + difusiones.count()
+    recientes = [
+        dict(fila, difusion=False) for fila in directas.values(*campos)[:CANTIDAD_RECIENTES]
+    ] + [
+        dict(fila, difusion=True) for fila in difusiones.values(*campos)[:CANTIDAD_RECIENTES]
+    ]
+    recientes.sort(key=lambda fila: fila['fecha_creacion'], reverse=True)
+
+    return cantidad, recientes[:CANTIDAD_RECIENTES]
+
+
+def resumen_no_leidas(usuario):
+    """Devuelve (cantidad, recientes) de las notificaciones no leídas del usuario"""
+    claves = [
+        _clave_contador(usuario.pk),
+        _clave_recientes(usuario.pk),
+        _clave_generacion(usuario.pk),
+        _clave_generacion_rol(usuario.rol),
+    ]
+    en_cache = cache.get_many(claves)
+
+    cantidad = en_cache.get(claves[0])
+    recientes = en_cache.get(claves[1])
+    generacion_rol = en_cache.get(claves[3], 0)
+
+    # Una difusión nueva para el rol invalida lo guardado de todos sus usuarios
+    if cantidad is None or recientes is None or en_cache.get(claves[2]) != generacion_rol:
+        cantidad, recientes = _consultar_no_leidas(usuario)
+        cache.set_many({
+            claves[0]: cantidad,
+            claves[1]: recientes,
+            claves[2]: generacion_rol,
+        }, TIEMPO_CACHE)
+
+    return cantidad, recientes
+
+
+# ==================== MARCAR COMO LEÍDAS ====================
+
+def marcar_venta_leida(usuario, venta):
+    """Marca como leídas todas las notificaciones de una venta para el usuario"""
+    marcadas = NotificacionVenta.objects.filter(
+        venta=venta,
+        usuario_destinatario=usuario,
+        leida=False
+    ).update(leida=True)
+
+    difusiones = list(
+        NotificacionDifusion.objects.filter(venta=venta, rol_destinatario=usuario.rol)
+        .values_list('id', flat=True)
+    )
+    LecturaDifusion.objects.bulk_create(
+        [LecturaDifusion(notificacion_id=difusion_id, usuario=usuario) for difusion_id in difusiones],
+        ignore_conflicts=True,
+    )
+
+    if marcadas or difusiones:
+        lectura_registrada(usuario.pk)
+
+
+def marcar_difusion_como_leida(usuario, difusion):
+    LecturaDifusion.objects.get_or_create(notificacion=difusion, usuario=usuario)
+    lectura_registrada(usuario.pk)
+
+
+def marcar_como_leidas(usuario, ids=(), difusion_ids=()):
+    """
+    Marca notificaciones puntuales del usuario con un UPDATE y un INSERT.
+
+    Ignora los ids que no le pertenecen; devuelve cuántas marcó.
+    """
+    marcadas = 0
+    if ids:
+        marcadas = NotificacionVenta.objects.filter(
+            id__in=ids,
+            usuario_destinatario=usuario,
+            leida=False
+        ).update(leida=True)
+
+    if difusion_ids:
+        difusiones = list(
+            NotificacionDifusion.objects.filter(id__in=difusion_ids, rol_destinatario=usuario.rol)
+            .values_list('id', flat=True)
+        )
+        LecturaDifusion.objects.bulk_create(
+            [LecturaDifusion(notificacion_id=difusion_id, usuario=usuario) for difusion_id in difusiones],
+            ignore_conflicts=True,
+        )
+        marcadas += len(difusiones)
+
+    if marcadas:
+        lectura_registrada(usuario.pk)
+    return marcadas
+
+
+def marcar_todas_como_leidas(usuario):
+    NotificacionVenta.objects.filter(
+        usuario_destinatario=usuario,
+        leida=False
+    ).update(leida=True)
+    CursorDifusion.objects.update_or_create(usuario=usuario, defaults={'leidas_hasta': timezone.now()})
+    lectura_registrada(usuario.pk)
+
+
+def lectura_registrada(usuario_id):
+    """Invalida la caché del usuario y avisa a sus otras pestañas abiertas"""
+    invalidar_notificaciones(usuario_id)
+    cambio_registrado('notificaciones', usuario_id)
+    publicar_al_confirmar(canal_usuario(usuario_id), {'tipo': 'lectura'})
+
+
+# ==================== ARCHIVO ====================
+
+CAMPOS_ARCHIVADOS = ('id', 'venta', 'usuario_destinatario', 'mensaje', 'fecha_creacion')
+
+
+def archivar_lote(antes_de, desde_id=0, lote=1000):
+    """
+    Mueve a NotificacionVentaArchivada hasta ``lote`` notificaciones leídas
+    creadas antes de ``antes_de``, de las que tienen id mayor a ``desde_id``.
+
+    Devuelve (movidas, último id revisado); el id es None si no quedan más.
+    Las candidatas se buscan fuera de la transacción y se copian con un
+    INSERT ... SELECT, así la escritura solo bloquea lo que tardan ese INSERT
+    y un DELETE por clave primaria (sin armar objetos mientras tanto).
+    """
+    ids = list(
+        NotificacionVenta.objects
+        .filter(id__gt=desde_id, leida=True, fecha_creacion__lt=antes_de)
+        .order_by('id')
+        .values_list('id', flat=True)[:lote]
+    )
+    if not ids:
+        return 0, None
+
+    nombre = connection.ops.quote_name
+    columnas = ', '.join(nombre(NotificacionVenta._meta.get_field(campo).column) for campo in CAMPOS_ARCHIVADOS)
+    origen = NotificacionVenta._meta
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Solo las que siguen ahí y leídas
+        cursor.execute(
+            f'INSERT INTO {nombre(NotificacionVentaArchivada._meta.db_table)} '
+            f'({columnas}, {nombre(NotificacionVentaArchivada._meta.get_field("fecha_archivado").column)}) '
+            f'SELECT {columnas}, %s FROM {nombre(origen.db_table)} '
+            f'WHERE {nombre(origen.pk.column)} IN ({", ".join(["%s"] * len(ids))}) '
+            f'AND {nombre(origen.get_field("leida").column)} = %s',
+            [connection.ops.adapt_datetimefield_value(timezone.now()), *ids, True],
+        )
+        movidas = cursor.rowcount
+        NotificacionVenta.objects.filter(id__in=ids, leida=True).delete()
+    return movidas, ids[-1]
+
+
+# ==================== CACHÉ ====================
+
+def notificacion_creada(*usuario_ids):
+    """Descarta el contador y las recientes de los destinatarios de notificaciones nuevas"""
+    usuarios = set(usuario_ids)
+    invalidar_notificaciones(*usuarios)
+    for usuario_id in usuarios:
+        cambio_registrado('notificaciones', usuario_id)
+
+
+def invalidar_notificaciones(*usuario_ids):
+    """Descarta el contador y las recientes de los usuarios indicados"""
+    claves = []
+    for usuario_id in usuario_ids:
+        claves += [_clave_contador(usuario_id), _clave_recientes(usuario_id)]
+
+    transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+def _nueva_generacion_rol(rol):
+    def actualizar():
+        clave = _clave_generacion_rol(rol)
+        cache.add(clave, 0, None)
+        cache.incr(clave)
+
+    transaction.on_commit(actualizar)
+    # Fragmentos y ETag con las notificaciones de los usuarios del rol
+    cambio_registrado('notificaciones', 'rol', rol)
@@ -0,0 +1,127 @@
+"""
+Paginación por cursor (keyset) sobre (fecha_creacion, id) descendente.
+
+A diferencia de django.core.paginator.Paginator no hace COUNT(*) ni OFFSET:
+cada página filtra a partir de la última fila vista, así que cuesta lo
+mismo en la página 1 que en la página 5000.
+"""
+import base64
+import hashlib
+from datetime import datetime
+
+from django.core.cache import cache
+
+
+def codificar_cursor(venta):
+    valor = f'{venta.fecha_creacion.isoformat()}|{venta.pk}'
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (fecha_creacion, id) o None si el cursor no es válido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        fecha, pk = base64.urlsafe_b64decode(cursor + relleno).decode().split('|')
+        return datetime.fromisoformat(fecha), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class PaginaCursor:
+    """Una página de resultados con los cursores para moverse"""
+
+    def __init__(self, object_list, cursor_siguiente=None, cursor_anterior=None):
+        self.object_list = object_list
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class PaginadorCursor:
+    """Pagina un queryset de ventas de la más reciente a la más antigua"""
+
+    def __init__(self, queryset, por_pagina=20):
+        self.queryset = queryset
+        self.por_pagina = por_pagina
+
+    def get_page(self, despues=None, antes=None):
+        """
+        ``despues``: cursor de la última fila de la página anterior (avanzar).
+        ``antes``: cursor de la primera fila de la página siguiente (retroceder).
+        Sin cursores (o con un cursor inválido) devuelve la primera página.
+        """
+        posicion_antes = decodificar_cursor(antes) if antes else None
+        if posicion_antes:
+            return self._pagina_anterior(*posicion_antes)
+
+        posicion_despues = decodificar_cursor(despues) if despues else None
+        return self._pagina_siguiente(posicion_despues)
+
+    def _pagina_siguiente(self, posicion):
+        ventas = self.queryset.order_by('-fecha_creacion', '-id')
+        if posicion:
+            fecha, pk = posicion
+            # Rango sobre fecha_creacion (usa el índice) y desempate por id
+            ventas = ventas.filter(fecha_creacion__lte=fecha).exclude(fecha_creacion=fecha, id__gte=pk)
+
+        filas = list(ventas[:self.por_pagina + 1])
+        hay_mas = len(filas) > self.por_pagina
+        filas = filas[:self.por_pagina]
+
+        return PaginaCursor(
+            filas,
+            cursor_siguiente=codificar_cursor(filas[-1]) if hay_mas else None,
+            cursor_anterior=codificar_cursor(filas[0]) if posicion and filas else None,
+        )
+
+    def _pagina_anterior(self, fecha, pk):
+        ventas = (
+            self.queryset.order_by('fecha_creacion', 'id')
+            .filter(fecha_creacion__gte=fecha)
+            .exclude(fecha_creacion=fecha, id__lte=pk)
+        )
+
+        filas = list(ventas[:self.por_pagina + 1])
+        hay_mas = len(filas) > self.por_pagina
+        filas = list(reversed(filas[:self.por_pagina]))
+
+        if not filas:
+            return self._pagina_siguiente(None)
+
+        return PaginaCursor(
+            filas,
+            cursor_siguiente=codificar_cursor(filas[-1]),
+            cursor_anterior=codificar_cursor(filas[0]) if hay_mas else None,
+        )
+
+
+def conteo_en_cache(queryset, tiempo=60, version=None):
+    """
+    COUNT(*) del queryset guardado en caché unos segundos.
+
+    El total que se muestra sobre la tabla puede ir ligeramente atrasado;
+    a cambio, pasar de página no vuelve a contar toda la tabla. Con
+    ``version`` (ver versiones.py) el total se recalcula apenas cambian los
+    datos, así nunca queda atrasado en una página que se reutiliza con 304.
+    """
+    consulta = f'{queryset.order_by().query}|{version}'
+    clave = 'conteo:' + hashlib.md5(consulta.encode()).hexdigest()
+    total = cache.get(clave)
+    if total is None:
+        total = queryset.count()
+        cache.set(clave, total, tiempo)
+    return total
@@ -0,0 +1,217 @@
+"""
+Resumen diario de ventas (ResumenDiarioVenta) mantenido de forma incremental.
+
+Cada venta suma 1 (y su monto) a la fila de su clave:
+(día de registro, asesor, modalidad, turno, estado). Al guardar una venta se
+compara su clave con la que tenía al cargarse (``registrar_original``) y se
+aplican solo las diferencias; las cargas masivas que no emiten señales
+(bulk_create) llaman a ``registrar_ventas`` o se corrigen con
+``reconstruir_rollups``.
+
+Los mismos cambios alimentan dos resúmenes más gruesos para el dashboard de
+supervisión (``NIVELES``): por día y turno, y por semana y asesor.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .fechas import inicio_del_dia
+from .models import ResumenDiarioTurno, ResumenDiarioVenta, ResumenSemanalAsesor, Venta
+
+
+CAMPOS_CLAVE = ('fecha_creacion', 'asesor_id', 'modalidad', 'turno', 'estado', 'monto')
+
+
+def clave_resumen(fecha_creacion, asesor_id, modalidad, turno, estado):
+    dia = timezone.localtime(fecha_creacion).date() if timezone.is_aware(fecha_creacion) else fecha_creacion.date()
+    return (dia, asesor_id, modalidad, turno, estado)
+
+
+def lunes(dia):
+    return dia - timedelta(days=dia.weekday())
+
+
+# Cada resumen y cómo se obtiene su clave (filtro) a partir de la clave diaria
+NIVELES = (
+    (ResumenDiarioVenta, lambda dia, asesor_id, modalidad, turno, estado: dict(
+        dia=dia, asesor_id=asesor_id, modalidad=modalidad, turno=turno, estado=estado)),
+    (ResumenDiarioTurno, lambda dia, asesor_id, modalidad, turno, estado: dict(
+        dia=dia, turno=turno, estado=estado)),
+    (ResumenSemanalAsesor, lambda dia, asesor_id, modalidad, turno, estado: dict(
+        semana=lunes(dia), asesor_id=asesor_id, estado=estado)),
+)
+
+
+def registrar_original(venta):
+    """
+    Guarda los valores con los que se cargó la venta.
+
+    Se leen de ``__dict__`` para no disparar consultas si el queryset usó
+    only()/defer(); si falta algún campo, el original queda desconocido.
+    """
+    valores = venta.__dict__
+    if venta.pk is None or any(campo not in valores for campo in CAMPOS_CLAVE):
+        venta._resumen_original = None
+    else:
+        venta._resumen_original = tuple(valores[campo] for campo in CAMPOS_CLAVE)
+
+
+def _original(venta):
+    original = getattr(venta, '_resumen_original', None)
+    if original is None and venta.pk is not None:
+        # Instancia cargada parcialmente: se consulta la fila antes de guardar
+        original = Venta.objects.filter(pk=venta.pk).values_list(*CAMPOS_CLAVE).first()
+    return original
+
+
+def cambios_al_guardar(venta, creada):
+    """{clave: (cantidad, monto)} que produce guardar la venta"""
+    cambios = defaultdict(lambda: [0, Decimal('0')])
+    actual = tuple(getattr(venta, campo) for campo in CAMPOS_CLAVE)
+
+    if not creada:
+        original = venta._resumen_anterior
+        if original == actual:
+            return {}
+        if original is not None:
+            clave = clave_resumen(*original[:5])
+            cambios[clave][0] -= 1
+            cambios[clave][1] -= Decimal(original[5] or 0)
+
+    clave = clave_resumen(*actual[:5])
+    cambios[clave][0] += 1
+    cambios[clave][1] += Decimal(actual[5] or 0)
+    return {clave: tuple(valores) for clave, valores in cambios.items() if valores != [0, 0]}
+
+
+def antes_de_guardar(venta):
+    venta._resumen_anterior = _original(venta) if venta.pk is not None else None
+
+
+def despues_de_guardar(venta, creada):
+    aplicar_cambios(cambios_al_guardar(venta, creada))
+    registrar_original(venta)
+
+
+def despues_de_borrar(venta):
+    original = _original(venta) or tuple(getattr(venta, campo) for campo in CAMPOS_CLAVE)
+    aplicar_cambios({clave_resumen(*original[:5]): (-1, -Decimal(original[5] or 0))})
+
+
+def aplicar_cambios(cambios):
+    """Reparte los cambios de la clave diaria en cada nivel de resumen"""
+    for modelo, filtro_de in NIVELES:
+        por_fila = defaultdict(lambda: [0, Decimal('0')])
+        for clave, (cantidad, monto) in cambios.items():
+            fila = por_fila[tuple(sorted(filtro_de(*clave).items()))]
+            fila[0] += cantidad
+            fila[1] += monto
+        for filtro, (cantidad, monto) in por_fila.items():
+            if cantidad or monto:
+                _sumar(modelo, dict(filtro), cantidad, monto)
+
+
+def _sumar(modelo, filtro, cantidad, monto):
+    """
+    Suma (cantidad, monto) a la fila del filtro, creándola si no existe.
+
+    Las filas que quedan en cero se borran para que el backlog por estado
+    (supervision.py) no recorra días que ya no tienen ventas abiertas.
+    """
+    actualizadas = modelo.objects.filter(**filtro).update(
+        cantidad=F('cantidad') + cantidad,
+        monto=F('monto') + monto,
+    )
+    if actualizadas:
+        if cantidad < 0:
+            modelo.objects.filter(cantidad__lte=0, **filtro).delete()
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(cantidad=cantidad, monto=monto, **filtro)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT
+        modelo.objects.filter(**filtro).update(
+            cantidad=F('cantidad') + cantidad,
+            monto=F('monto') + monto,
+        )
+
+
+def registrar_ventas(ventas):
+    """Suma al resumen ventas creadas sin señales (bulk_create)"""
+    cambios = defaultdict(lambda: [0, Decimal('0')])
+    for venta in ventas:
+        clave = clave_resumen(venta.fecha_creacion, venta.asesor_id, venta.modalidad, venta.turno, venta.estado)
+        cambios[clave][0] += 1
+        cambios[clave][1] += Decimal(venta.monto or 0)
+    aplicar_cambios({clave: tuple(valores) for clave, valores in cambios.items()})
+
+
+def reconstruir(desde, hasta, dias_por_lote=31):
+    """
+    Regenera los resúmenes de los días [desde, hasta] a partir de las ventas.
+
+    Trabaja por tramos de ``dias_por_lote`` días, cada uno en su propia
+    transacción: borra las filas del tramo y las vuelve a crear con una
+    sola consulta agrupada. Los niveles por turno y por semana se derivan
+    después del resumen diario. Devuelve la cantidad de filas diarias creadas.
+    """
+    zona = timezone.get_current_timezone()
+    creadas = 0
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(inicio + timedelta(days=dias_por_lote - 1), hasta)
+        filas = (
+            Venta.objects.order_by()
+            .filter(fecha_creacion__gte=inicio_del_dia(inicio), fecha_creacion__lt=inicio_del_dia(fin + timedelta(days=1)))
+            .annotate(dia=TruncDate('fecha_creacion', tzinfo=zona))
+            .values_list('dia', 'asesor_id', 'modalidad', 'turno', 'estado')
+            .annotate(cantidad=Count('id'), total=Sum('monto'))
+        )
+        with transaction.atomic():
+            ResumenDiarioVenta.objects.filter(dia__gte=inicio, dia__lte=fin).delete()
+            nuevas = ResumenDiarioVenta.objects.bulk_create([
+                ResumenDiarioVenta(
+                    dia=dia, asesor_id=asesor_id, modalidad=modalidad, turno=turno, estado=estado,
+                    cantidad=cantidad, monto=total or 0,
+                )
+                for dia, asesor_id, modalidad, turno, estado, cantidad, total in filas
+            ], batch_size=1000)
+        creadas += len(nuevas)
+        inicio = fin + timedelta(days=1)
+
+    reconstruir_derivados(desde, hasta)
+    return creadas
+
+
+def reconstruir_derivados(desde, hasta):
+    """Regenera los niveles por turno y por semana desde ResumenDiarioVenta"""
+    diarios = ResumenDiarioVenta.objects.order_by()
+    with transaction.atomic():
+        ResumenDiarioTurno.objects.filter(dia__gte=desde, dia__lte=hasta).delete()
+        ResumenDiarioTurno.objects.bulk_create([
+            ResumenDiarioTurno(dia=dia, turno=turno, estado=estado, cantidad=cantidad, monto=total or 0)
+            for dia, turno, estado, cantidad, total in (
+                diarios.filter(dia__gte=desde, dia__lte=hasta)
+                .values_list('dia', 'turno', 'estado')
+                .annotate(total_cantidad=Sum('cantidad'), total=Sum('monto'))
+            )
+        ], batch_size=1000)
+
+        # Semanas completas: las que tocan el rango pueden tener días fuera de él
+        primera, ultima = lunes(desde), lunes(hasta)
+        ResumenSemanalAsesor.objects.filter(semana__gte=primera, semana__lte=ultima).delete()
+        ResumenSemanalAsesor.objects.bulk_create([
+            ResumenSemanalAsesor(semana=semana, asesor_id=asesor_id, estado=estado, cantidad=cantidad, monto=total or 0)
+            for semana, asesor_id, estado, cantidad, total in (
+                diarios.filter(dia__gte=primera, dia__lte=ultima + timedelta(days=6))
+                .annotate(semana=TruncWeek('dia'))
+                .values_list('semana', 'asesor_id', 'estado')
+                .annotate(total_cantidad=Sum('cantidad'), total=Sum('monto'))
+            )
+        ], batch_size=1000)
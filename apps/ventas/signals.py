@@ -1,32 +1,37 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
-from .models import Venta, NotificacionVenta
 from apps.usuarios.models import Usuario
+from .models import Venta
+from . import busqueda, estados, rollups
+from .tareas import encolar
+from .versiones import cambio_registrado
 
 @receiver(post_save, sender=Venta)
 def crear_notificacion_venta(sender, instance, created, **kwargs):
-    """Crea notificaciones cuando se crea o modifica una venta"""
+    """Encola las notificaciones cuando se crea o modifica una venta (ver tareas.py)"""
     
     if created:
         # Nueva venta creada por asesor -> Notificar a Back Office
-        usuarios_back_office = Usuario.objects.filter(rol='BACK_OFFICE', activo=True)
-        
-        for usuario in usuarios_back_office:
-            NotificacionVenta.objects.create(
-                venta=instance,
-                usuario_destinatario=usuario,
-                mensaje=f'Nueva venta #{instance.id} de {instance.asesor.get_full_name()} pendiente de completar'
-            )
+        encolar('notificar_ventas_nuevas', venta_id=instance.id)
     
     else:
         # Venta modificada
-        if instance.estado == 'PENDIENTE_AUDIO':
+        if estados.entro_a(instance, 'PENDIENTE_AUDIO'):
             # Back Office completó los datos -> Notificar al asesor
-            NotificacionVenta.objects.create(
-                venta=instance,
-                usuario_destinatario=instance.asesor,
-                mensaje=f'Venta #{instance.id} ha sido completada por Back Office. Fecha instalación: {instance.fecha_instalacion_programada}'
-            )
+            encolar('notificar_ventas_completadas', venta_id=instance.id)
+
+
+@receiver(post_init, sender=Venta)
+def recordar_datos_indexados(sender, instance, **kwargs):
+    busqueda.registrar_datos_indexados(instance)
+
+
+@receiver(post_save, sender=Venta)
+def actualizar_indice_busqueda(sender, instance, created, update_fields=None, **kwargs):
+    """Encola la actualización del índice de búsqueda si cambiaron los datos del cliente"""
+    if busqueda.cambiaron_datos_indexados(instance, created, update_fields):
+        encolar('indexar_ventas', venta_id=instance.id)
+    busqueda.registrar_datos_indexados(instance)
 
 
 @receiver(pre_save, sender=Venta)
@@ -34,4 +39,67 @@ def registrar_quien_modifico(sender, instance, **kwargs):
     """Registra quién hizo la última modificación"""
     if instance.pk:
         # Solo si ya existe (no es creación)
-        pass  # El modificado_por se establece en la vista
\ No newline at end of file
+        pass  # El modificado_por se establece en la vista
+
+
+# ==================== ESTADOS ====================
+
+@receiver(post_init, sender=Venta)
+def recordar_estado(sender, instance, **kwargs):
+    estados.registrar_estado_original(instance)
+
+
+@receiver(pre_save, sender=Venta)
+def preparar_cambio_estado(sender, instance, update_fields=None, **kwargs):
+    """Mueve fecha_estado si cambió el estado"""
+    estados.antes_de_guardar(instance, update_fields)
+
+
+@receiver(post_save, sender=Venta)
+def registrar_cambio_estado(sender, instance, **kwargs):
+    """Agrega el cambio de estado al registro de transiciones"""
+    estados.despues_de_guardar(instance)
+
+
+# ==================== RESUMEN DIARIO ====================
+
+@receiver(post_init, sender=Venta)
+def recordar_valores_resumen(sender, instance, **kwargs):
+    """Recuerda la clave del resumen diario con la que se cargó la venta"""
+    rollups.registrar_original(instance)
+
+
+@receiver(pre_save, sender=Venta)
+def preparar_resumen_diario(sender, instance, **kwargs):
+    rollups.antes_de_guardar(instance)
+
+
+@receiver(post_save, sender=Venta)
+def actualizar_resumen_diario(sender, instance, created, **kwargs):
+    """Mueve la venta entre filas del resumen si cambió su estado, asesor, monto..."""
+    rollups.despues_de_guardar(instance, created)
+
+
+@receiver(post_delete, sender=Venta)
+def descontar_resumen_diario(sender, instance, **kwargs):
+    rollups.despues_de_borrar(instance)
+
+
+# ==================== VERSIONES (CONDITIONAL GET) ====================
+
+@receiver(post_save, sender=Venta)
+@receiver(post_delete, sender=Venta)
+def nueva_version_ventas(sender, instance, **kwargs):
+    """Invalida los ETag y fragmentos en caché que muestran ventas"""
+    cambio_registrado('ventas')
+    cambio_registrado('ventas', 'asesor', instance.asesor_id)
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def nueva_version_usuarios(sender, instance, update_fields=None, **kwargs):
+    """Los filtros, listados y el navbar muestran usuarios; el último login no cambia nada de eso"""
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    cambio_registrado('usuarios')
+    cambio_registrado('usuario', instance.pk)
@@ -0,0 +1,178 @@
+"""
+Datos del dashboard de supervisión (supervisor y dueño).
+
+Todo sale de los resúmenes derivados de ResumenDiarioVenta (por día y
+turno, y por semana y asesor): ninguna consulta recorre la tabla de ventas y
+cada una lee a lo sumo días × turnos × estados o semanas × asesores ×
+estados filas, sin importar el volumen histórico. Presupuesto: p95 <
+``PRESUPUESTO_MS`` con 1M de ventas, verificado con
+``manage.py benchmark_supervisor``.
+
+El tiempo en cada estado sale del registro de transiciones (estados.py),
+con un recorrido por rango de su índice.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Min, Q, Sum
+from django.utils import timezone
+
+from apps.usuarios.models import Usuario
+from .estados import tiempo_en_estados
+from .fechas import rango_del_dia
+from .models import ResumenDiarioTurno, ResumenSemanalAsesor, Venta
+from .rollups import lunes
+
+
+PRESUPUESTO_MS = 150
+
+# El rango son semanas completas (de lunes) hasta hoy, para que la serie
+# diaria y la tabla semanal por asesor cubran los mismos días
+RANGOS_SEMANAS = (1, 4, 13)
+RANGO_POR_DEFECTO = 4
+
+TURNOS = ('MAÑANA', 'TARDE')
+
+# Estados en los que la venta todavía espera a alguien
+ESTADOS_ABIERTOS = [
+    estado for estado, _ in Venta.ESTADOS if estado not in ('INSTALADA', 'RECHAZADA')
+]
+
+
+def porcentaje(parte, total):
+    return round(100 * parte / total, 1) if total else 0.0
+
+
+def sumas_por_estado():
+    """Anotaciones comunes: total y las cantidades que miden la conversión"""
+    return dict(
+        total=Sum('cantidad'),
+        monto_total=Sum('monto'),
+        pendientes_bo=Sum('cantidad', filter=Q(estado='PENDIENTE_BO')),
+        instaladas=Sum('cantidad', filter=Q(estado='INSTALADA')),
+        rechazadas=Sum('cantidad', filter=Q(estado='RECHAZADA')),
+        monto_instalado=Sum('monto', filter=Q(estado='INSTALADA')),
+    )
+
+
+def serie_por_turno(desde, hasta):
+    """Ventas registradas cada día por turno (incluye días sin ventas) y totales del rango"""
+    serie = {}
+    dia = desde
+    while dia <= hasta:
+        serie[dia] = {turno: 0 for turno in TURNOS}
+        dia += timedelta(days=1)
+
+    totales = dict.fromkeys(('total', 'pendientes_bo', 'instaladas', 'rechazadas'), 0)
+    totales.update(monto_total=Decimal('0'), monto_instalado=Decimal('0'))
+
+    filas = (
+        ResumenDiarioTurno.objects.order_by()
+        .filter(dia__gte=desde, dia__lte=hasta)
+        .values('dia', 'turno')
+        .annotate(**sumas_por_estado())
+    )
+    for fila in filas:
+        por_turno = serie[fila['dia']]
+        por_turno[fila['turno']] = por_turno.get(fila['turno'], 0) + fila['total']
+        for campo in totales:
+            totales[campo] += fila[campo] or 0
+
+    return [
+        {'dia': dia, 'turnos': [por_turno.get(turno, 0) for turno in TURNOS], 'total': sum(por_turno.values())}
+        for dia, por_turno in serie.items()
+    ], totales
+
+
+def por_asesor(semanas):
+    """Ventas por semana, totales y conversión de cada asesor, de mayor a menor"""
+    asesores = {}
+    filas = (
+        ResumenSemanalAsesor.objects.order_by()
+        .filter(semana__gte=semanas[0], semana__lte=semanas[-1])
+        .values('asesor_id', 'semana')
+        .annotate(**sumas_por_estado())
+    )
+    for fila in filas:
+        datos = asesores.get(fila['asesor_id'])
+        if datos is None:
+            datos = asesores[fila['asesor_id']] = {
+                'semanas': [0] * len(semanas),
+                'total': 0, 'pendientes_bo': 0, 'instaladas': 0, 'rechazadas': 0,
+                'monto_instalado': Decimal('0'),
+            }
+        datos['semanas'][(fila['semana'] - semanas[0]).days // 7] += fila['total']
+        for campo in ('total', 'pendientes_bo', 'instaladas', 'rechazadas', 'monto_instalado'):
+            datos[campo] += fila[campo] or 0
+
+    nombres = {
+        usuario.id: usuario.get_full_name() or usuario.username
+        for usuario in Usuario.objects.filter(id__in=asesores).only('id', 'username', 'first_name', 'last_name')
+    }
+    for asesor_id, datos in asesores.items():
+        datos['nombre'] = nombres.get(asesor_id, f'#{asesor_id}')
+        datos['conversion'] = porcentaje(datos['instaladas'], datos['total'])
+
+    return sorted(asesores.values(), key=lambda datos: (-datos['total'], datos['nombre']))
+
+
+def backlog_por_estado(hoy, tiempos=None):
+    """
+    Ventas abiertas hoy por estado, con la antigüedad de la más vieja y,
+    si se pasan ``tiempos`` (ver estados.tiempo_en_estados), las horas
+    promedio que pasaron en el estado las ventas que salieron de él.
+
+    Recorre todo el histórico del resumen por turno, pero solo las filas de
+    estados abiertos y sin filas vacías: rollups.py borra las que quedan en
+    cero.
+    """
+    filas = (
+        ResumenDiarioTurno.objects.order_by()
+        .filter(estado__in=ESTADOS_ABIERTOS)
+        .values_list('estado')
+        .annotate(total=Sum('cantidad'), suma=Sum('monto'), desde=Min('dia'))
+    )
+    por_estado = {estado: (cantidad, monto, desde) for estado, cantidad, monto, desde in filas}
+    etiquetas = dict(Venta.ESTADOS)
+    tiempos = tiempos or {}
+
+    backlog = []
+    for estado in ESTADOS_ABIERTOS:
+        cantidad, monto, desde = por_estado.get(estado, (0, Decimal('0'), None))
+        backlog.append({
+            'estado': estado,
+            'nombre': etiquetas[estado],
+            'cantidad': cantidad or 0,
+            'monto': monto or Decimal('0'),
+            'dias_antiguedad': (hoy - desde).days if desde else None,
+            'salidas': tiempos.get(estado, {}).get('salidas', 0),
+            'horas_promedio': tiempos.get(estado, {}).get('horas_promedio'),
+        })
+    return backlog
+
+
+def tablero_supervisor(semanas=RANGO_POR_DEFECTO, hoy=None):
+    """Todo lo que muestra el dashboard de supervisión: cinco consultas"""
+    hoy = hoy or timezone.localdate()
+    lunes_del_rango = [lunes(hoy) - timedelta(weeks=n) for n in reversed(range(semanas))]
+    desde = lunes_del_rango[0]
+    serie, totales = serie_por_turno(desde, hoy)
+    tiempos = tiempo_en_estados(rango_del_dia(desde)[0], rango_del_dia(hoy)[1])
+
+    return {
+        'desde': desde,
+        'hasta': hoy,
+        'semanas': semanas,
+        'lunes': lunes_del_rango,
+        'turnos': TURNOS,
+        'serie': serie,
+        'asesores': por_asesor(lunes_del_rango),
+        'backlog': backlog_por_estado(hoy, tiempos),
+        'kpis': {
+            **totales,
+            'en_proceso': totales['total'] - totales['instaladas'] - totales['rechazadas'],
+            # De lo registrado en el rango (todo entra como PENDIENTE_BO), cuánto ya se instaló
+            'conversion': porcentaje(totales['instaladas'], totales['total']),
+            'rechazo': porcentaje(totales['rechazadas'], totales['total']),
+        },
+    }
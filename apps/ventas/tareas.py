@@ -0,0 +1,239 @@
+"""
+Cola de tareas en la base de datos para los efectos secundarios de las ventas.
+
+Guardar una venta ya no notifica ni indexa dentro de la request: las señales
+llaman a ``encolar`` y la tarea se inserta en Tarea cuando la transacción se
+confirma (si se revierte, no queda nada que hacer). Así crear una venta
+cuesta lo mismo con 2 que con 200 usuarios de Back Office.
+
+Las procesa ``procesar``:
+
+- Reserva hasta ``lote`` tareas listas con un UPDATE condicional (mueve su
+  ``disponible_desde`` al fin de la reserva), sin abrir una transacción: si
+  otro worker tomó alguna primero, esa fila no se actualiza. Si el worker
+  muere, las tareas vuelven solas a la cola al vencer la reserva.
+- Las agrupa por nombre: cada función registrada con ``@tarea`` recibe la
+  lista de argumentos de su grupo y hace una sola consulta o INSERT para
+  todas.
+- Cada grupo corre en su propia transacción corta, que también borra sus
+  tareas: lo que escriben en la base de datos queda hecho una sola vez y el
+  bloqueo de escritura de SQLite dura lo que un grupo, no el lote entero. Si
+  un grupo falla se reintenta tarea por tarea, para que una sola no frene a
+  las demás.
+- Una tarea que falla vuelve a intentarse más tarde (cada vez espera el
+  doble); después de ``TAREAS_MAX_INTENTOS`` queda FALLIDA para revisarla en
+  el admin.
+
+Quién procesa:
+
+- ``TAREAS_HILOS`` hilos dentro de cada proceso web. Se despiertan cuando
+  se encola una tarea y esperan ``TAREAS_AGRUPAR_SEGUNDOS`` para procesar
+  juntas las de varias requests. Las notificaciones actualizan la caché y el
+  bus de eventos del mismo proceso, como antes.
+- ``manage.py procesar_tareas``, un worker aparte. Con un worker aparte la
+  caché y ``NOTIFICACIONES_BUS`` deben ser compartidos (igual que con varios
+  procesos web); también recoge lo que quedó encolado al reiniciar.
+
+Con ``TAREAS_EN_SEGUNDO_PLANO = False`` las tareas corren al confirmarse la
+transacción, dentro de la misma request (útil en desarrollo).
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .busqueda import indexar_ventas
+from .models import Tarea, Venta
+from .notificaciones import mensaje_venta_completada, notificar_en_lote, notificar_rol_en_lote
+
+logger = logging.getLogger(__name__)
+
+LOTE = 100
+# Segundos que una tarea tomada queda fuera de la cola; si el worker muere, vuelve al vencer
+RESERVA_SEGUNDOS = 300
+# Espera antes del primer reintento; se duplica en cada uno
+REINTENTO_SEGUNDOS = 10
+
+_registro = {}
+
+
+def tarea(nombre):
+    """Registra una función que procesa una lista de argumentos de la tarea ``nombre``"""
+    def registrar(funcion):
+        _registro[nombre] = funcion
+        return funcion
+    return registrar
+
+
+# ==================== ENCOLAR ====================
+
+def encolar(nombre, **argumentos):
+    encolar_varias(nombre, [argumentos])
+
+
+def encolar_varias(nombre, lista):
+    """Encola una tarea por cada dict de argumentos (un INSERT) al confirmarse la transacción"""
+    if nombre not in _registro:
+        raise ValueError(f'No hay una tarea registrada con el nombre "{nombre}"')
+    lista = list(lista)
+    if not lista:
+        return
+    if not getattr(settings, 'TAREAS_EN_SEGUNDO_PLANO', True):
+        transaction.on_commit(lambda: _registro[nombre](lista))
+        return
+
+    def insertar():
+        Tarea.objects.bulk_create([Tarea(nombre=nombre, argumentos=argumentos) for argumentos in lista])
+        despertar()
+
+    transaction.on_commit(insertar)
+
+
+# ==================== PROCESAR ====================
+
+def procesar(lote=LOTE):
+    """Procesa hasta ``lote`` tareas listas; devuelve cuántas tomó"""
+    ahora = timezone.now()
+    listas = Tarea.objects.filter(estado='PENDIENTE', disponible_desde__lte=ahora)
+    candidatas = list(listas.order_by('id').values_list('id', flat=True)[:lote])
+    if not candidatas:
+        return 0
+
+    # La fecha de fin de la reserva identifica a las tareas tomadas por esta vuelta
+    hasta = ahora + timedelta(seconds=RESERVA_SEGUNDOS)
+    listas.filter(id__in=candidatas).update(disponible_desde=hasta)
+    tareas = list(Tarea.objects.filter(id__in=candidatas, disponible_desde=hasta).order_by('id'))
+
+    por_nombre = defaultdict(list)
+    for pendiente in tareas:
+        por_nombre[pendiente.nombre].append(pendiente)
+
+    fallidas = []
+    for nombre, grupo in por_nombre.items():
+        error = _ejecutar(nombre, grupo, hasta)
+        if error is None:
+            continue
+        if len(grupo) == 1:
+            fallidas.append((grupo[0], error))
+            continue
+        for pendiente in grupo:
+            error = _ejecutar(nombre, [pendiente], hasta)
+            if error is not None:
+                fallidas.append((pendiente, error))
+
+    _registrar_fallos(fallidas)
+    return len(tareas)
+
+
+def _ejecutar(nombre, grupo, hasta):
+    """Corre el grupo y borra sus tareas en una transacción; devuelve el error o None"""
+    funcion = _registro.get(nombre)
+    if funcion is None:
+        return f'No hay una tarea registrada con el nombre "{nombre}"'
+    try:
+        with transaction.atomic():
+            # Solo las que siguen reservadas por esta vuelta (la reserva no venció)
+            propias = Tarea.objects.filter(id__in=[pendiente.id for pendiente in grupo], disponible_desde=hasta)
+            ids = set(propias.values_list('id', flat=True))
+            Tarea.objects.filter(id__in=ids).delete()
+            funcion([pendiente.argumentos for pendiente in grupo if pendiente.id in ids])
+    except Exception as error:
+        logger.exception('Falló la tarea %s (%d)', nombre, len(grupo))
+        return f'{type(error).__name__}: {error}'
+    return None
+
+
+def _registrar_fallos(fallidas):
+    ahora = timezone.now()
+    maximo = getattr(settings, 'TAREAS_MAX_INTENTOS', 5)
+    for pendiente, error in fallidas:
+        pendiente.intentos += 1
+        pendiente.ultimo_error = error
+        if pendiente.intentos >= maximo:
+            pendiente.estado = 'FALLIDA'
+        else:
+            pendiente.disponible_desde = ahora + timedelta(seconds=REINTENTO_SEGUNDOS * 2 ** (pendiente.intentos - 1))
+    Tarea.objects.bulk_update(
+        [pendiente for pendiente, _ in fallidas], ['intentos', 'ultimo_error', 'estado', 'disponible_desde'],
+    )
+
+
+def procesar_pendientes(lote=LOTE):
+    """Procesa hasta vaciar la cola de tareas listas; devuelve cuántas tomó"""
+    total = 0
+    while True:
+        tomadas = procesar(lote)
+        total += tomadas
+        if tomadas < lote:
+            return total
+
+
+# ==================== HILOS DEL PROCESO WEB ====================
+
+_hilos = []
+_hay_tareas = threading.Event()
+_candado = threading.Lock()
+
+
+def despertar():
+    """Avisa a los hilos del proceso que hay tareas nuevas (los inicia la primera vez)"""
+    cantidad = getattr(settings, 'TAREAS_HILOS', 1)
+    if not cantidad:
+        return
+    with _candado:
+        while len(_hilos) < cantidad:
+            hilo = threading.Thread(target=_trabajar, name=f'tareas-{len(_hilos)}', daemon=True)
+            hilo.start()
+            _hilos.append(hilo)
+    _hay_tareas.set()
+
+
+def _trabajar():
+    while True:
+        # Sin avisos, igual revisa de vez en cuando: reintentos que ya vencieron
+        if _hay_tareas.wait(getattr(settings, 'TAREAS_ESPERA_SEGUNDOS', 5)):
+            # Junta las que lleguen mientras tanto en un solo lote, en vez de
+            # competir con cada request por la escritura
+            time.sleep(getattr(settings, 'TAREAS_AGRUPAR_SEGUNDOS', 0.5))
+        _hay_tareas.clear()
+        close_old_connections()
+        try:
+            procesar_pendientes()
+        except Exception:
+            # Base de datos ocupada o caída: se reintenta en la próxima vuelta
+            logger.exception('Error al procesar tareas')
+        finally:
+            close_old_connections()
+
+
+# ==================== TAREAS ====================
+
+@tarea('notificar_ventas_nuevas')
+def notificar_ventas_nuevas(lista):
+    """Avisa a Back Office de las ventas nuevas (una consulta de usuarios y un INSERT)"""
+    ventas = Venta.objects.filter(id__in=[argumentos['venta_id'] for argumentos in lista]).select_related('asesor')
+    notificar_rol_en_lote('BACK_OFFICE', [
+        (venta, f'Nueva venta #{venta.id} de {venta.asesor.get_full_name()} pendiente de completar')
+        for venta in ventas
+    ])
+
+
+@tarea('notificar_ventas_completadas')
+def notificar_ventas_completadas(lista):
+    """Avisa a cada asesor que Back Office completó su venta"""
+    ventas = Venta.objects.filter(id__in=[argumentos['venta_id'] for argumentos in lista])
+    notificar_en_lote([(venta, venta.asesor_id, mensaje_venta_completada(venta)) for venta in ventas])
+
+
+@tarea('indexar_ventas')
+def indexar(lista):
+    """Actualiza el índice de búsqueda de las ventas (un upsert)"""
+    indexar_ventas(
+        Venta.objects.filter(id__in=[argumentos['venta_id'] for argumentos in lista])
+        .only('id', 'cliente_nombre', 'cliente_dni', 'cliente_telefono')
+    )
@@ -0,0 +1,25 @@
+from django import template
+from django.conf import settings
+
+from apps.ventas.versiones import versiones
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def version(*partes):
+    """
+    Versión actual de los datos indicados, para la clave de un {% cache %}.
+
+    Uso: {% version 'ventas' 'asesor' user.pk as v %}
+         {% tiempo_fragmentos as tiempo %}
+         {% cache tiempo mis_ventas user.pk v using="fragmentos" %}...{% endcache %}
+    """
+    return versiones(partes)[0]
+
+
+@register.simple_tag
+def tiempo_fragmentos(corto=False):
+    """Segundos que vive un fragmento (ver TIEMPO_FRAGMENTOS en settings)"""
+    return settings.TIEMPO_FRAGMENTOS_CORTO if corto else settings.TIEMPO_FRAGMENTOS
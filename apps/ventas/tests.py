@@ -1,3 +1,706 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.usuarios.models import Usuario
+from config import replica
+
+from . import rollups, tareas
+from .notificaciones import notificar_rol, notificar_usuarios
+from .asignacion import disponibles_para, tomar_siguientes
+from .busqueda import buscar_ventas, indexar_ventas
+from .exportacion import _texto_csv
+from .forms import VentaAsesorForm
+from .importacion import fila_a_venta, ubicar_columnas
+from .estados import TransicionInvalida, cambiar_estado, cambiar_estado_en_lote
+from .paginacion import PaginadorCursor
+from .models import (
+    IndiceBusquedaVenta, NotificacionVenta, NotificacionVentaArchivada, ResumenDiarioVenta, Tarea, Venta,
+    VentaTransicion,
+)
+
+
+def crear_pendientes(asesor, cantidad):
+    return [
+        Venta.objects.create(
+            asesor=asesor,
+            modalidad='CALL_CENTER',
+            turno='MAÑANA',
+            cliente_nombre=f'Cliente {numero}',
+            cliente_dni=f'{10000000 + numero}',
+            cliente_telefono='999999999',
+            cliente_direccion='Av. Siempre Viva 123',
+            cliente_correo='cliente@example.com',
+            cliente_genero='M',
+            producto_servicio='Internet',
+            monto=Decimal('99.90'),
+        )
+        for numero in range(cantidad)
+    ]
+
+
+class ReservasBackOfficeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        cls.ana = Usuario.objects.create_user('ana', password='x', rol='BACK_OFFICE')
+        cls.beto = Usuario.objects.create_user('beto', password='x', rol='BACK_OFFICE')
+        crear_pendientes(cls.asesor, 6)
+
+    def test_reserva_vigente_no_se_reparte_a_otro(self):
+        de_ana = {venta.id for venta in tomar_siguientes(self.ana, 3)}
+        de_beto = {venta.id for venta in tomar_siguientes(self.beto, 3)}
+
+        self.assertEqual(len(de_ana), 3)
+        self.assertEqual(len(de_beto), 3)
+        self.assertFalse(de_ana & de_beto)
+        # Volver a pedir renueva las mismas reservas
+        self.assertEqual({venta.id for venta in tomar_siguientes(self.ana, 3)}, de_ana)
+        self.assertEqual(tomar_siguientes(self.ana, 5)[3:], [])
+
+    def test_reserva_vencida_vuelve_a_la_cola(self):
+        de_ana = {venta.id for venta in tomar_siguientes(self.ana, 6)}
+        Venta.objects.filter(id__in=de_ana).update(asignada_hasta=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual({venta.id for venta in tomar_siguientes(self.beto, 6)}, de_ana)
+
+    def test_lote_no_pisa_reservas_de_otro(self):
+        ventas = tomar_siguientes(self.ana, 2)
+        for venta in ventas:
+            venta.sec = 'SEC'
+
+        with self.assertRaises(TransicionInvalida):
+            cambiar_estado_en_lote(
+                ventas, 'PENDIENTE_AUDIO', self.beto,
+                campos=('sec',), condicion=disponibles_para(self.beto, timezone.now()),
+            )
+        self.assertFalse(Venta.objects.filter(sec='SEC').exists())
+
+
+# Sin hilos de tareas: la base de pruebas en memoria no espera por sus bloqueos
+@override_settings(TAREAS_HILOS=0)
+class ReservasConcurrentesTests(TransactionTestCase):
+    """Varios usuarios de Back Office vaciando la cola a la vez"""
+
+    TRABAJADORES = 8
+    VENTAS = 120
+    POR_VUELTA = 5
+
+    def test_trabajadores_concurrentes_no_duplican_ventas(self):
+        asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        usuarios = [
+            Usuario.objects.create_user(f'bo{numero}', password='x', rol='BACK_OFFICE')
+            for numero in range(self.TRABAJADORES)
+        ]
+        crear_pendientes(asesor, self.VENTAS)
+
+        completadas = {usuario.pk: [] for usuario in usuarios}
+        errores = []
+        largada = threading.Barrier(self.TRABAJADORES)
+
+        def reintentando(funcion):
+            # SQLite admite un solo escritor: el resto recibe "locked" y reintenta
+            for _ in range(200):
+                try:
+                    return funcion()
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    time.sleep(0.005)
+            raise AssertionError('La base de datos siguió bloqueada')
+
+        def vuelta(usuario):
+            """Toma las siguientes ventas y las completa; devuelve cuántas"""
+            ventas = tomar_siguientes(usuario, self.POR_VUELTA)
+            for venta in ventas:
+                venta.sec = f'SEC-{usuario.pk}'
+                venta.asignada_a = None
+                venta.asignada_hasta = None
+            if ventas:
+                cambiar_estado_en_lote(
+                    ventas, 'PENDIENTE_AUDIO', usuario,
+                    campos=('sec', 'asignada_a', 'asignada_hasta'),
+                    condicion=disponibles_para(usuario, timezone.now()),
+                )
+                completadas[usuario.pk].extend(venta.id for venta in ventas)
+            return len(ventas)
+
+        def trabajar(usuario):
+            try:
+                largada.wait()
+                while reintentando(lambda: vuelta(usuario)):
+                    pass
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajar, args=(usuario,)) for usuario in usuarios]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        ids = [venta_id for lista in completadas.values() for venta_id in lista]
+        self.assertEqual(len(ids), self.VENTAS)
+        self.assertEqual(len(set(ids)), self.VENTAS)
+        self.assertFalse(Venta.objects.filter(estado='PENDIENTE_BO').exists())
+        # Cada venta se completó una sola vez y la guardó quien la tenía reservada
+        self.assertEqual(
+            VentaTransicion.objects.filter(estado_anterior='PENDIENTE_BO', estado_nuevo='PENDIENTE_AUDIO').count(),
+            self.VENTAS,
+        )
+        for usuario_id, lista in completadas.items():
+            self.assertEqual(
+                set(Venta.objects.filter(sec=f'SEC-{usuario_id}').values_list('id', flat=True)),
+                set(lista),
+            )
+
+
+@override_settings(TAREAS_HILOS=0, TAREAS_MAX_INTENTOS=2)
+class ColaDeTareasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        for nombre in ('ana', 'beto', 'carla'):
+            Usuario.objects.create_user(nombre, password='x', rol='BACK_OFFICE')
+
+    def test_crear_venta_solo_encola(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            venta, = crear_pendientes(self.asesor, 1)
+
+        self.assertEqual(
+            sorted(Tarea.objects.values_list('nombre', flat=True)), ['indexar_ventas', 'notificar_ventas_nuevas'],
+        )
+        self.assertFalse(NotificacionVenta.objects.exists())
+
+        self.assertEqual(tareas.procesar(), 2)
+        self.assertEqual(NotificacionVenta.objects.filter(venta=venta).count(), 3)
+        self.assertTrue(IndiceBusquedaVenta.objects.filter(venta=venta).exists())
+        self.assertFalse(Tarea.objects.exists())
+
+    def test_solo_reindexa_si_cambian_los_datos_del_cliente(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            venta, = crear_pendientes(self.asesor, 1)
+        Tarea.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tomar_siguientes(Usuario.objects.get(username='ana'), 1)
+            venta = Venta.objects.get(pk=venta.pk)
+            venta.sec = 'SEC-1'
+            venta.save()
+        self.assertFalse(Tarea.objects.filter(nombre='indexar_ventas').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            venta.cliente_telefono = '911111111'
+            venta.save()
+        self.assertEqual(Tarea.objects.filter(nombre='indexar_ventas').count(), 1)
+
+    def test_sin_confirmar_no_encola(self):
+        crear_pendientes(self.asesor, 1)
+        self.assertFalse(Tarea.objects.exists())
+
+    def test_una_tarea_que_falla_no_frena_al_resto(self):
+        def indexar(lista):
+            if any(argumentos['venta_id'] == -1 for argumentos in lista):
+                raise ValueError('venta inexistente')
+
+        Tarea.objects.bulk_create([
+            Tarea(nombre='indexar_ventas', argumentos={'venta_id': venta_id}) for venta_id in (1, -1, 2)
+        ])
+        with mock.patch.dict(tareas._registro, {'indexar_ventas': indexar}), self.assertLogs('apps.ventas.tareas'):
+            self.assertEqual(tareas.procesar(), 3)
+            fallida = Tarea.objects.get()
+            self.assertEqual((fallida.argumentos, fallida.estado, fallida.intentos), ({'venta_id': -1}, 'PENDIENTE', 1))
+            self.assertIn('venta inexistente', fallida.ultimo_error)
+            # Espera antes de reintentar
+            self.assertEqual(tareas.procesar(), 0)
+
+            Tarea.objects.update(disponible_desde=timezone.now())
+            tareas.procesar()
+        self.assertEqual(Tarea.objects.get().estado, 'FALLIDA')
+
+
+@override_settings(NOTIFICACIONES_RETENCION_DIAS=30)
+class ArchivoNotificacionesTests(TestCase):
+
+    def test_archiva_solo_leidas_antiguas(self):
+        asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        venta, = crear_pendientes(asesor, 1)
+        vieja = timezone.now() - timedelta(days=31)
+        notificaciones = {
+            (leida, fecha): NotificacionVenta.objects.create(
+                venta=venta, usuario_destinatario=asesor, mensaje=f'{leida} {fecha}', leida=leida,
+            )
+            for leida in (True, False) for fecha in ('vieja', 'reciente')
+        }
+        for (_, fecha), notificacion in notificaciones.items():
+            if fecha == 'vieja':
+                NotificacionVenta.objects.filter(id=notificacion.id).update(fecha_creacion=vieja)
+
+        call_command('compactar_notificaciones', lote=1, pausa=0, stdout=StringIO())
+
+        archivada = NotificacionVentaArchivada.objects.get()
+        self.assertEqual(archivada.id, notificaciones[True, 'vieja'].id)
+        self.assertEqual((archivada.mensaje, archivada.fecha_creacion), ('True vieja', vieja))
+        self.assertEqual(
+            set(NotificacionVenta.objects.values_list('id', flat=True)),
+            {notificacion.id for clave, notificacion in notificaciones.items() if clave != (True, 'vieja')},
+        )
+
+
+# Sin hilos de consultas: no verían los datos de la transacción de la prueba
+@override_settings(NOTIFICACIONES_ENTREGA='difusion', CONSULTAS_HILOS=0)
+class DifusionEnDashboardTests(TestCase):
+
+    def test_panel_de_back_office_muestra_difusiones(self):
+        asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        back_office = Usuario.objects.create_user('ana', password='x', rol='BACK_OFFICE')
+        venta, = crear_pendientes(asesor, 1)
+        self.client.force_login(back_office)
+        url = reverse('ventas:jadira_dashboard')
+
+        # Deja en caché el panel sin notificaciones
+        self.assertContains(self.client.get(url), 'Sin notificaciones nuevas')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notificar_rol(venta, 'BACK_OFFICE', 'Difusión de prueba para Back Office')
+
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(respuesta, 'Difusión de prueba para Back Office')
+        self.assertNotContains(respuesta, 'Sin notificaciones nuevas')
+
+
+class PendientesBackOfficeTests(TestCase):
+
+    def test_reserva_vencida_cambia_el_etag(self):
+        asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        ana = Usuario.objects.create_user('ana', password='x', rol='BACK_OFFICE')
+        luis = Usuario.objects.create_user('luis', password='x', rol='BACK_OFFICE')
+        crear_pendientes(asesor, 1)
+        tomar_siguientes(luis, 1)
+        self.client.force_login(ana)
+        url = reverse('ventas:jadira_pendientes')
+        # El primer pedido deja la cookie CSRF, que forma parte del ETag
+        self.client.get(url)
+
+        respuesta = self.client.get(url)
+        self.assertContains(respuesta, 'En proceso')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+
+        # La reserva vence sin que se escriba nada
+        despues = timezone.now() + timedelta(minutes=16)
+        with mock.patch('django.utils.timezone.now', return_value=despues):
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotContains(respuesta, 'En proceso')
+
+
+class PaginacionCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        cls.otro = Usuario.objects.create_user('otro', password='x', rol='ASESOR')
+        crear_pendientes(cls.asesor, 7)
+        # Todas con la misma fecha: el orden lo decide el id
+        Venta.objects.update(fecha_creacion=timezone.now() - timedelta(days=1))
+        cls.ids = list(Venta.objects.order_by('-id').values_list('id', flat=True))
+
+    def ids_de(self, pagina):
+        return [venta.id for venta in pagina]
+
+    def test_avanza_y_retrocede_con_fechas_iguales(self):
+        paginador = PaginadorCursor(Venta.objects.all(), 3)
+
+        primera = paginador.get_page()
+        segunda = paginador.get_page(despues=primera.cursor_siguiente)
+        ultima = paginador.get_page(despues=segunda.cursor_siguiente)
+        self.assertEqual(
+            [self.ids_de(primera), self.ids_de(segunda), self.ids_de(ultima)],
+            [self.ids[:3], self.ids[3:6], self.ids[6:]],
+        )
+        self.assertFalse(primera.has_previous())
+        self.assertFalse(ultima.has_next())
+
+        self.assertEqual(self.ids_de(paginador.get_page(antes=ultima.cursor_anterior)), self.ids[3:6])
+        vuelta = paginador.get_page(antes=segunda.cursor_anterior)
+        self.assertEqual(self.ids_de(vuelta), self.ids[:3])
+        self.assertFalse(vuelta.has_previous())
+
+    def test_cursor_invalido_devuelve_la_primera_pagina(self):
+        paginador = PaginadorCursor(Venta.objects.all(), 3)
+        for cursor in ('no-es-un-cursor', '%%%', 'YWJj'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.ids_de(paginador.get_page(despues=cursor)), self.ids[:3])
+                self.assertEqual(self.ids_de(paginador.get_page(antes=cursor)), self.ids[:3])
+
+    def test_los_filtros_se_mantienen_entre_paginas(self):
+        crear_pendientes(self.otro, 25)
+        back_office = Usuario.objects.create_user('ana', password='x', rol='BACK_OFFICE')
+        self.client.force_login(back_office)
+        url = reverse('ventas:jadira_pendientes')
+
+        primera = self.client.get(url, {'asesor': self.otro.pk})
+        cursor = primera.context['ventas'].cursor_siguiente
+        self.assertContains(primera, f'?asesor={self.otro.pk}&despues={cursor}')
+
+        segunda = self.client.get(url, {'asesor': self.otro.pk, 'despues': cursor})
+        ventas = list(segunda.context['ventas'])
+        self.assertEqual(len(ventas), 5)
+        self.assertTrue(all(venta.asesor_id == self.otro.pk for venta in ventas))
+        self.assertFalse(segunda.context['ventas'].has_next())
+
+
+class ResumenesIncrementalesTests(TestCase):
+
+    def assertCoincideConRecuento(self):
+        """Cada nivel de resumen debe ser igual a contar las ventas desde cero (sin filas en cero)"""
+        for modelo, filtro_de in rollups.NIVELES:
+            campos = sorted(filtro_de(timezone.localdate(), None, None, None, None))
+            esperado = {}
+            for venta in Venta.objects.all():
+                clave = rollups.clave_resumen(
+                    venta.fecha_creacion, venta.asesor_id, venta.modalidad, venta.turno, venta.estado,
+                )
+                fila = tuple(sorted(filtro_de(*clave).items()))
+                cantidad, monto = esperado.get(fila, (0, Decimal('0')))
+                esperado[fila] = (cantidad + 1, monto + venta.monto)
+
+            actual = {
+                tuple((campo, fila[campo]) for campo in campos): (fila['cantidad'], fila['monto'])
+                for fila in modelo.objects.values(*campos, 'cantidad', 'monto')
+            }
+            with self.subTest(modelo=modelo.__name__):
+                self.assertEqual(actual, esperado)
+
+    def test_crear_cambiar_y_borrar(self):
+        asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        venta, = crear_pendientes(asesor, 1)
+        self.assertCoincideConRecuento()
+
+        venta = Venta.objects.get(pk=venta.pk)
+        venta.estado = 'PENDIENTE_AUDIO'
+        venta.save()
+        self.assertCoincideConRecuento()
+        self.assertFalse(ResumenDiarioVenta.objects.filter(estado='PENDIENTE_BO').exists())
+
+        venta.monto = Decimal('150.00')
+        venta.save()
+        self.assertCoincideConRecuento()
+
+        venta.delete()
+        self.assertCoincideConRecuento()
+        for modelo, _ in rollups.NIVELES:
+            self.assertFalse(modelo.objects.exists(), modelo.__name__)
+
+
+class MaquinaDeEstadosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        cls.back_office = Usuario.objects.create_user('ana', password='x', rol='BACK_OFFICE')
+
+    def test_transicion_no_permitida_no_cambia_la_venta(self):
+        venta, = crear_pendientes(self.asesor, 1)
+        venta = Venta.objects.get(pk=venta.pk)
+        transiciones = VentaTransicion.objects.count()
+
+        with self.assertRaises(TransicionInvalida):
+            cambiar_estado(venta, 'INSTALADA', self.back_office)
+
+        fila = Venta.objects.get(pk=venta.pk)
+        self.assertEqual(
+            (fila.estado, fila.fecha_estado, fila.modificado_por_id), ('PENDIENTE_BO', venta.fecha_estado, None),
+        )
+        self.assertEqual(VentaTransicion.objects.count(), transiciones)
+
+    def test_cada_cambio_deja_una_transicion(self):
+        venta, = crear_pendientes(self.asesor, 1)
+        creacion = VentaTransicion.objects.get(venta=venta)
+        self.assertEqual((creacion.estado_anterior, creacion.estado_nuevo), ('', 'PENDIENTE_BO'))
+
+        inicio = timezone.now()
+        despues = inicio + timedelta(minutes=10)
+        venta = Venta.objects.get(pk=venta.pk)
+        with mock.patch('django.utils.timezone.now', return_value=despues):
+            cambiar_estado(venta, 'PENDIENTE_AUDIO', self.back_office, sec='SEC-1')
+
+        transicion = VentaTransicion.objects.exclude(pk=creacion.pk).get(venta=venta)
+        self.assertEqual(
+            (transicion.estado_anterior, transicion.estado_nuevo, transicion.usuario, transicion.fecha),
+            ('PENDIENTE_BO', 'PENDIENTE_AUDIO', self.back_office, despues),
+        )
+        self.assertEqual(transicion.segundos_en_estado, int((despues - creacion.fecha).total_seconds()))
+        fila = Venta.objects.get(pk=venta.pk)
+        self.assertEqual((fila.estado, fila.fecha_estado, fila.sec), ('PENDIENTE_AUDIO', despues, 'SEC-1'))
+
+        # Guardar sin cambiar el estado no agrega transiciones
+        fila.save()
+        self.assertEqual(VentaTransicion.objects.filter(venta=venta).count(), 2)
+
+
+class BusquedaVentasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        cls.nunez, cls.perez = crear_pendientes(asesor, 2)
+        Venta.objects.filter(pk=cls.nunez.pk).update(
+            cliente_nombre='María Núñez', cliente_dni='45678912', cliente_telefono='987 654 321',
+        )
+        Venta.objects.filter(pk=cls.perez.pk).update(
+            cliente_nombre='José Pérez', cliente_dni='12345678', cliente_telefono='912345678',
+        )
+        indexar_ventas(Venta.objects.all())
+
+    def buscar(self, texto, **kwargs):
+        return set(buscar_ventas(Venta.objects.all(), texto, **kwargs).values_list('id', flat=True))
+
+    def test_sin_importar_tildes_ni_mayusculas(self):
+        for texto in ('nunez', 'NÚÑEZ', 'mar nun', 'María'):
+            with self.subTest(texto=texto):
+                self.assertEqual(self.buscar(texto), {self.nunez.pk})
+        self.assertEqual(self.buscar('perez jose'), {self.perez.pk})
+
+    def test_dni_y_telefono_por_prefijo(self):
+        self.assertEqual(self.buscar('4567'), {self.nunez.pk})
+        self.assertEqual(self.buscar('98765'), {self.nunez.pk})
+        self.assertEqual(self.buscar('9'), {self.nunez.pk, self.perez.pk})
+        self.assertEqual(self.buscar('98765', campos=('nombre', 'dni')), set())
+
+    def test_caracteres_especiales_de_fts(self):
+        for texto in ('"', 'nu"nez', 'nunez*', '-nunez', '* OR perez', 'NEAR(nunez', "o'nunez", '^{}:'):
+            with self.subTest(texto=texto):
+                self.buscar(texto)
+        self.assertEqual(self.buscar('"nunez"*'), {self.nunez.pk})
+
+
+# Sin hilos de consultas ni de tareas: no verían los datos de la transacción de la prueba
+@override_settings(CONSULTAS_HILOS=0, TAREAS_HILOS=0)
+class GetCondicionalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        cls.back_office = Usuario.objects.create_user('ana', password='x', rol='BACK_OFFICE')
+        cls.venta, = crear_pendientes(cls.asesor, 1)
+
+    def setUp(self):
+        self.client.force_login(self.back_office)
+        self.urls = [reverse('ventas:jadira_dashboard'), reverse('ventas:jadira_pendientes')]
+        # El primer pedido deja la cookie CSRF, que forma parte del ETag
+        for url in self.urls:
+            self.client.get(url)
+
+    def etags(self):
+        etags = {}
+        for url in self.urls:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            etags[url] = respuesta['ETag']
+        return etags
+
+    def estados_con(self, etags):
+        return {url: self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code for url, etag in etags.items()}
+
+    def test_repetir_el_pedido_responde_304(self):
+        etags = self.etags()
+        self.assertEqual(set(self.estados_con(etags).values()), {304})
+
+    def test_un_cambio_en_una_venta_vuelve_a_renderizar(self):
+        etags = self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            venta = Venta.objects.get(pk=self.venta.pk)
+            venta.cliente_nombre = 'Otro nombre'
+            venta.save()
+        self.assertEqual(set(self.estados_con(etags).values()), {200})
+
+    def test_una_notificacion_nueva_vuelve_a_renderizar_el_dashboard(self):
+        etags = self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            notificar_usuarios(self.venta, [self.back_office.pk], 'Aviso de prueba')
+        estados = self.estados_con(etags)
+        self.assertEqual(estados[reverse('ventas:jadira_dashboard')], 200)
+
+
+@override_settings(TAREAS_HILOS=0)
+class CompletarLoteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asesor = Usuario.objects.create_user('asesor', password='x', rol='ASESOR')
+        cls.ana = Usuario.objects.create_user('ana', password='x', rol='BACK_OFFICE')
+        cls.luis = Usuario.objects.create_user('luis', password='x', rol='BACK_OFFICE')
+        cls.ventas = crear_pendientes(cls.asesor, 2)
+
+    def setUp(self):
+        self.client.force_login(self.ana)
+        self.url = reverse('ventas:jadira_completar_lote')
+        # Las reserva a nombre de Ana
+        self.client.get(self.url)
+
+    def enviar(self, filas):
+        """filas: [(venta, sec, sot, fecha)]"""
+        datos = {
+            'form-TOTAL_FORMS': len(filas),
+            'form-INITIAL_FORMS': len(filas),
+            'form-MIN_NUM_FORMS': 0,
+            'form-MAX_NUM_FORMS': 50,
+        }
+        for numero, (venta, sec, sot, fecha) in enumerate(filas):
+            datos.update({
+                f'form-{numero}-id': venta.pk,
+                f'form-{numero}-sec': sec,
+                f'form-{numero}-sot': sot,
+                f'form-{numero}-fecha_instalacion_programada': fecha,
+            })
+        return self.client.post(self.url, datos, follow=True)
+
+    def test_fila_a_medio_llenar_marca_los_campos_faltantes(self):
+        primera, segunda = self.ventas
+        respuesta = self.enviar([(primera, 'SEC-1', '', ''), (segunda, '', '', '')])
+
+        formset = respuesta.context['formset']
+        self.assertEqual(
+            formset.forms[0].errors,
+            {campo: ['Requerido para completar la venta'] for campo in ('sot', 'fecha_instalacion_programada')},
+        )
+        self.assertEqual(formset.forms[1].errors, {})
+        self.assertFalse(Venta.objects.exclude(estado='PENDIENTE_BO').exists())
+
+    def test_venta_que_ya_no_esta_pendiente(self):
+        primera, _ = self.ventas
+        cambiar_estado(Venta.objects.get(pk=primera.pk), 'RECHAZADA', self.luis)
+
+        respuesta = self.enviar([(primera, 'SEC-1', 'SOT-1', '2030-01-15')])
+
+        self.assertEqual(
+            respuesta.context['formset'].forms[0].non_field_errors(),
+            ['Esta venta ya no está pendiente de completar'],
+        )
+
+    def test_reservada_por_otro_usuario_revierte_todo_el_lote(self):
+        primera, segunda = self.ventas
+        # La reserva de Ana venció y Luis tomó la segunda
+        Venta.objects.filter(pk=segunda.pk).update(
+            asignada_a=self.luis, asignada_hasta=timezone.now() + timedelta(minutes=15),
+        )
+        transiciones = VentaTransicion.objects.count()
+
+        respuesta = self.enviar([
+            (primera, 'SEC-1', 'SOT-1', '2030-01-15'),
+            (segunda, 'SEC-2', 'SOT-2', '2030-01-15'),
+        ])
+
+        self.assertContains(respuesta, 'Otro usuario cambió alguna de estas ventas')
+        self.assertEqual(
+            list(Venta.objects.order_by('id').values_list('estado', 'sec')),
+            [('PENDIENTE_BO', ''), ('PENDIENTE_BO', '')],
+        )
+        self.assertEqual(VentaTransicion.objects.count(), transiciones)
+
+
+class ReplicaReportesTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, 'replica.sqlite3')
+        parche = mock.patch.dict(settings.DATABASES[replica.ALIAS], NAME=self.ruta)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.fabrica = RequestFactory()
+
+    def copiar(self, hace=0):
+        """Simula una copia de la réplica empezada hace ``hace`` segundos"""
+        open(self.ruta, 'wb').close()
+        fecha = time.time() - hace
+        os.utime(self.ruta, (fecha, fecha))
+        return fecha
+
+    def alias(self, escritura=None):
+        request = self.fabrica.get('/')
+        if escritura is not None:
+            request.COOKIES[replica.COOKIE_ESCRITURA] = str(escritura)
+        return replica.alias_para_reportes(request)
+
+    def test_sin_replica_o_atrasada_lee_de_la_principal(self):
+        self.assertEqual(self.alias(), 'default')
+        with override_settings(REPLICA_RETRASO_MAXIMO=300):
+            self.copiar(hace=301)
+            self.assertEqual(self.alias(), 'default')
+            self.copiar(hace=10)
+            self.assertEqual(self.alias(), replica.ALIAS)
+
+    def test_lee_lo_que_acaba_de_escribir(self):
+        copia = self.copiar(hace=10)
+        self.assertEqual(self.alias(escritura=copia - 5), replica.ALIAS)
+        self.assertEqual(self.alias(escritura=copia + 5), 'default')
+        self.assertEqual(self.alias(escritura='no-es-una-hora'), replica.ALIAS)
+
+        request = self.fabrica.post('/')
+        request.user = mock.Mock(is_authenticated=True)
+        respuesta = replica.MarcaEscriturasMiddleware(lambda request: HttpResponse())(request)
+        self.assertEqual(self.alias(escritura=respuesta.cookies[replica.COOKIE_ESCRITURA].value), 'default')
+
+    def test_solo_las_lecturas_de_reportes_van_a_la_replica(self):
+        self.copiar()
+        request = self.fabrica.get('/')
+        self.assertEqual(Venta.objects.all().db, 'default')
+        with replica.lecturas_de_reportes(request) as alias:
+            self.assertEqual(alias, replica.ALIAS)
+            self.assertEqual(Venta.objects.all().db, replica.ALIAS)
+            self.assertEqual(replica.RouterReplica().db_for_write(Venta), 'default')
+        self.assertEqual(Venta.objects.all().db, 'default')
+
+
+class ImportacionVentasTests(TestCase):
+
+    def test_fila_sin_genero_pasa_la_validacion(self):
+        cabecera = ['DNI/RUC', 'CLIENTE', 'PLAN', 'C.FIJO', 'CELULAR', 'DEPARTAMENTO', 'FECHA VENTA', 'GENERO']
+        columnas = ubicar_columnas(cabecera)
+        fila = ['45678912', 'María Núñez', 'Internet 200', 99.9, '987654321', 'Lima', 45566.5, None]
+
+        venta = fila_a_venta(fila, columnas, 'BASE DE VENTAS')
+
+        self.assertEqual(venta.cliente_genero, '')
+        Venta._meta.get_field('cliente_genero').clean(venta.cliente_genero, venta)
+
+    def test_el_asesor_debe_indicar_el_genero(self):
+        form = VentaAsesorForm(data={})
+        self.assertIn('cliente_genero', form.errors)
+
+
+class ExportacionCsvTests(SimpleTestCase):
+
+    def test_textos_que_excel_tomaria_como_formula(self):
+        casos = {
+            '=HYPERLINK("x")': '\'=HYPERLINK("x")',
+            '@SUM(A1)': "'@SUM(A1)",
+            '\t=1+1': "'\t=1+1",
+            '\r=1+1': "'\r=1+1",
+            '-12.50': '-12.50',
+            'Av. Perú 123': 'Av. Perú 123',
+        }
+        for valor, esperado in casos.items():
+            with self.subTest(valor=valor):
+                self.assertEqual(_texto_csv(valor), esperado)
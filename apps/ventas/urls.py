@@ -14,12 +14,20 @@ urlpatterns = [
     path('jadira/dashboard/', views.jadira_dashboard, name='jadira_dashboard'),
     path('jadira/pendientes/', views.jadira_pendientes, name='jadira_pendientes'),
     path('jadira/completar/<int:venta_id>/', views.jadira_completar_venta, name='jadira_completar_venta'),
+    path('jadira/completar-lote/', views.jadira_completar_lote, name='jadira_completar_lote'),
     
     # Notificaciones
     path('notificacion/<int:notificacion_id>/leida/', views.marcar_notificacion_leida, name='marcar_notificacion_leida'),
+    path('notificacion/difusion/<int:difusion_id>/leida/', views.marcar_difusion_leida, name='marcar_difusion_leida'),
     path('notificaciones/marcar-todas/', views.marcar_todas_leidas, name='marcar_todas_leidas'),
+    path('notificaciones/stream/', views.stream_notificaciones, name='stream_notificaciones'),
+    path('api/notificaciones/leer/', views.api_marcar_leidas, name='api_marcar_leidas'),
+    path('api/notificacion/<int:notificacion_id>/leer/', views.api_marcar_leida, name='api_marcar_leida'),
     
-    # Placeholders para futuros dashboards
-    path('supervisor/dashboard/', views.asesor_dashboard, name='supervisor_dashboard'),  # Temporal
-    path('dueño/dashboard/', views.asesor_dashboard, name='dueño_dashboard'),  # Temporal
+    # Exportación (csv / xlsx)
+    path('exportar/<str:formato>/', views.exportar_ventas, name='exportar_ventas'),
+    
+    # Supervisión (supervisor y dueño ven el mismo tablero)
+    path('supervisor/dashboard/', views.supervisor_dashboard, name='supervisor_dashboard'),
+    path('dueño/dashboard/', views.supervisor_dashboard, name='dueño_dashboard'),
 ]
\ No newline at end of file
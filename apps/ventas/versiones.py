@@ -0,0 +1,53 @@
+"""
+Versiones de los datos que muestran las vistas y las plantillas.
+
+Cada versión es la marca de tiempo (en ns) del último cambio registrado y
+vive en la caché de Django, así que leerla no toca la base de datos. Se
+usan de dos formas:
+
+- Las vistas de Back Office arman su ETag con ellas y, si el navegador ya
+  tiene esa versión, responden 304 sin consultar ni renderizar nada.
+- Las plantillas las ponen en la clave de ``{% cache %}`` (con la etiqueta
+  ``{% version %}`` de ``fragmentos``), así un fragmento se reutiliza
+  mientras sus datos no cambien.
+
+Las versiones se mueven con las señales de Venta y Usuario; los cambios
+hechos sin señales (bulk_create, update) deben llamar a
+``cambio_registrado``. Si la caché pierde una versión se crea una nueva con
+la hora actual, que nunca coincide con un ETag anterior.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _clave(*partes):
+    return 'version:' + ':'.join(str(parte) for parte in partes)
+
+
+def versiones(*nombres):
+    """
+    Devuelve la versión actual de cada nombre con un solo acceso a la caché.
+
+    Cada nombre es una tupla de partes: ('ventas',), ('notificaciones', usuario_id)...
+    """
+    claves = [_clave(*nombre) for nombre in nombres]
+    en_cache = cache.get_many(claves)
+
+    resultado = []
+    for clave in claves:
+        valor = en_cache.get(clave)
+        if valor is None:
+            # add() no pisa la versión que otro proceso haya creado antes
+            nueva = time.time_ns()
+            cache.add(clave, nueva, None)
+            valor = cache.get(clave, nueva)
+        resultado.append(valor)
+    return resultado
+
+
+def cambio_registrado(*partes):
+    """Da una versión nueva a los datos indicados cuando se confirma la transacción"""
+    clave = _clave(*partes)
+    transaction.on_commit(lambda: cache.set(clave, time.time_ns(), None))
@@ -1,50 +1,111 @@
+import asyncio
+import hashlib
+import json
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import Q, Count
-from django.core.paginator import Paginator
-from .models import Venta, NotificacionVenta
-from .forms import VentaAsesorForm, VentaBackOfficeForm
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import SimpleLazyObject
+from django.utils.timesince import timesince
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_POST
+from django.db import transaction
+from django.db.models import Min
+from django.utils.http import quote_etag, urlencode
+from config.replica import alias_para_reportes, lecturas_de_reportes
+from .models import Venta, NotificacionVenta, NotificacionVentaArchivada, NotificacionDifusion, ResumenDiarioVenta
+from .forms import CompletarLoteFormSet, VentaAsesorForm, VentaBackOfficeForm
+from .asignacion import disponibles_para, liberar, reservar, tomar_siguientes
+from .busqueda import buscar_ventas
+from .concurrencia import en_paralelo, fragmentos_en_cache
+from .estadisticas import resumen_desde_rollups
+from .estados import TransicionInvalida, cambiar_estado, cambiar_estado_en_lote, entradas
+from .exportacion import EXPORTADORES
+from .fechas import filtrar_por_fecha, leer_fecha, rango_del_dia
+from .paginacion import PaginadorCursor, conteo_en_cache
+from .supervision import RANGO_POR_DEFECTO, RANGOS_SEMANAS, tablero_supervisor
+from .versiones import versiones
+from .eventos import canal_rol, canal_usuario, formatear_sse, obtener_bus
+from .notificaciones import (
+    marcar_como_leidas, marcar_difusion_como_leida, marcar_todas_como_leidas, marcar_venta_leida,
+    resumen_no_leidas,
+)
+from .tareas import encolar_varias
 from apps.usuarios.models import Usuario
 from django.utils import timezone
 
 
 # ==================== VISTAS DE ASESOR ====================
 
-@login_required
-def asesor_dashboard(request):
-    """Dashboard principal del asesor"""
-    if not request.user.es_asesor():
+def _estadisticas_asesor(usuario):
+    """Totales del asesor desde el resumen diario, sin recorrer sus ventas"""
+    resumen = resumen_desde_rollups(ResumenDiarioVenta.objects.filter(asesor=usuario))
+    return {
+        'total_ventas': resumen.total,
+        'pendientes_bo': resumen.cantidad('PENDIENTE_BO'),
+        'pendientes_instalacion': resumen.cantidad('PENDIENTE_INSTALACION'),
+        'instaladas': resumen.cantidad('INSTALADA'),
+        'rechazadas': resumen.cantidad('RECHAZADA'),
+    }
+
+
+def _notificaciones_no_leidas(usuario):
+    """Las últimas no leídas, directas y de difusión a su rol (ver notificaciones.py)"""
+    return resumen_no_leidas(usuario)[1]
+
+
+async def _contexto_de_fragmentos(datos):
+    """
+    Contexto de un dashboard: ``datos`` es {variable: (fragmento, partes, función)}.
+
+    Las funciones de los fragmentos que no están en caché corren en paralelo.
+    Las demás quedan perezosas, por si la plantilla igual las necesita (si
+    una versión cambió mientras tanto, se calculan al renderizar).
+    """
+    en_cache = await sync_to_async(fragmentos_en_cache)(
+        *[(fragmento, partes) for fragmento, partes, _ in datos.values()]
+    )
+    contexto = {variable: SimpleLazyObject(funcion) for variable, (_, _, funcion) in datos.items()}
+    contexto.update(await en_paralelo(**{
+        variable: funcion for variable, (fragmento, _, funcion) in datos.items() if fragmento not in en_cache
+    }))
+    return contexto
+
+
+async def asesor_dashboard(request):
+    """Dashboard principal del asesor (las consultas que hagan falta, en paralelo)"""
+    usuario = await sync_to_async(_usuario_autenticado)(request)
+    if usuario is None:
+        return redirect_to_login(request.get_full_path())
+    if not usuario.es_asesor():
         messages.error(request, 'No tienes permisos para acceder a esta sección')
         return redirect('dashboard')
     
-    # Estadísticas del asesor
-    mis_ventas = Venta.objects.filter(asesor=request.user)
-    
-    stats = {
-        'total_ventas': mis_ventas.count(),
-        'pendientes_bo': mis_ventas.filter(estado='PENDIENTE_BO').count(),
-        'pendientes_instalacion': mis_ventas.filter(estado='PENDIENTE_INSTALACION').count(),
-        'instaladas': mis_ventas.filter(estado='INSTALADA').count(),
-        'rechazadas': mis_ventas.filter(estado='RECHAZADA').count(),
-    }
-    
-    # Últimas 5 ventas
-    ultimas_ventas = mis_ventas[:5]
-    
-    # Notificaciones no leídas
-    notificaciones = NotificacionVenta.objects.filter(
-        usuario_destinatario=request.user,
-        leida=False
-    )[:5]
-    
-    context = {
-        'stats': stats,
-        'ultimas_ventas': ultimas_ventas,
-        'notificaciones': notificaciones,
-    }
-    
-    return render(request, 'ventas/asesor_dashboard.html', context)
+    # Las mismas claves que los {% cache %} de la plantilla
+    version_ventas, version_notificaciones, version_rol = await sync_to_async(versiones)(
+        ('ventas', 'asesor', usuario.pk), ('notificaciones', usuario.pk), ('notificaciones', 'rol', usuario.rol),
+    )
+    context = await _contexto_de_fragmentos({
+        'stats': ('asesor_kpis', [usuario.pk, version_ventas], partial(_estadisticas_asesor, usuario)),
+        'ultimas_ventas': (
+            'asesor_ultimas_ventas', [usuario.pk, version_ventas],
+            lambda: list(Venta.objects.filter(asesor=usuario)[:5]),
+        ),
+        'notificaciones': (
+            'asesor_notificaciones', [usuario.pk, version_notificaciones, version_rol],
+            partial(_notificaciones_no_leidas, usuario),
+        ),
+    })
+    
+    return await sync_to_async(render)(request, 'ventas/asesor_dashboard.html', context)
 
 
 @login_required
@@ -94,33 +155,35 @@ def asesor_mis_ventas(request):
     if estado:
         ventas = ventas.filter(estado=estado)
     
-    if fecha_desde:
-        ventas = ventas.filter(fecha_creacion__date__gte=fecha_desde)
-    
-    if fecha_hasta:
-        ventas = ventas.filter(fecha_creacion__date__lte=fecha_hasta)
+    ventas = filtrar_por_fecha(
+        ventas, 'fecha_creacion',
+        desde=leer_fecha(fecha_desde),
+        hasta=leer_fecha(fecha_hasta),
+    )
     
     if buscar:
-        ventas = ventas.filter(
-            Q(cliente_nombre__icontains=buscar) |
-            Q(cliente_dni__icontains=buscar) |
-            Q(cliente_telefono__icontains=buscar)
-        )
+        ventas = buscar_ventas(ventas, buscar)
     
-    # Paginación
-    paginator = Paginator(ventas, 20)
-    page = request.GET.get('page', 1)
-    ventas_paginadas = paginator.get_page(page)
+    # Paginación por cursor (sin COUNT ni OFFSET por página)
+    paginador = PaginadorCursor(ventas, 20)
+    ventas_paginadas = paginador.get_page(
+        despues=request.GET.get('despues'),
+        antes=request.GET.get('antes'),
+    )
+    
+    filtros = {
+        'estado': estado,
+        'fecha_desde': fecha_desde,
+        'fecha_hasta': fecha_hasta,
+        'buscar': buscar,
+    }
     
     context = {
         'ventas': ventas_paginadas,
+        'total_ventas': conteo_en_cache(ventas),
         'estados': Venta.ESTADOS,
-        'filtros': {
-            'estado': estado,
-            'fecha_desde': fecha_desde,
-            'fecha_hasta': fecha_hasta,
-            'buscar': buscar,
-        }
+        'filtros': filtros,
+        'filtros_query': urlencode({k: v for k, v in filtros.items() if v}),
     }
     
     return render(request, 'ventas/asesor_mis_ventas.html', context)
@@ -137,53 +200,106 @@ def asesor_detalle_venta(request, venta_id):
         return redirect('ventas:asesor_mis_ventas')
     
     # Marcar notificaciones como leídas
-    NotificacionVenta.objects.filter(
-        venta=venta,
-        usuario_destinatario=request.user,
-        leida=False
-    ).update(leida=True)
+    marcar_venta_leida(request.user, venta)
     
     return render(request, 'ventas/asesor_detalle_venta.html', {'venta': venta})
 
 
 # ==================== VISTAS DE BACK OFFICE (JADIRA) ====================
 
-@login_required
-def jadira_dashboard(request):
-    """Dashboard de Back Office"""
-    if not request.user.es_back_office():
+def _etag_back_office(request, *partes):
+    """
+    ETag de una página de Back Office, o None si no se puede reutilizar.
+
+    Además de las versiones de los datos incluye la URL (filtros, cursor),
+    el usuario y su cookie CSRF, porque la página lleva el token en los
+    formularios. Con mensajes pendientes se renderiza siempre para mostrarlos.
+    """
+    if not request.user.es_back_office() or messages.get_messages(request):
+        return None
+    partes = (
+        request.get_full_path(),
+        request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ) + partes
+    return hashlib.sha1('|'.join(map(str, partes)).encode()).hexdigest()
+
+
+def _etag_jadira_dashboard(request):
+    # La fecha cambia "Completadas hoy" aunque no haya ventas nuevas
+    return _etag_back_office(
+        request,
+        timezone.localdate(),
+        *versiones(('ventas',), ('notificaciones', request.user.pk), ('notificaciones', 'rol', request.user.rol)),
+    )
+
+
+def _etag_jadira_pendientes(request):
+    # Las reservas vencen sin escribir nada: el próximo vencimiento también
+    # cambia la página (la marca "En proceso" deja de mostrarse)
+    proximo_vencimiento = Venta.objects.filter(
+        estado='PENDIENTE_BO', asignada_hasta__gt=timezone.now(),
+    ).aggregate(proximo=Min('asignada_hasta'))['proximo']
+    return _etag_back_office(
+        request, proximo_vencimiento, *versiones(('ventas',), ('usuarios',), ('asignaciones',)),
+    )
+
+
+def _estadisticas_back_office():
+    resumen = resumen_desde_rollups(ResumenDiarioVenta.objects.all())
+    inicio_hoy, fin_hoy = rango_del_dia(timezone.localdate())
+    return {
+        'pendientes': resumen.cantidad('PENDIENTE_BO'),
+        'completadas_hoy': entradas('PENDIENTE_AUDIO', inicio_hoy, fin_hoy, estado_anterior='PENDIENTE_BO'),
+        'total_procesadas': resumen.excluyendo('PENDIENTE_BO'),
+    }
+
+
+async def jadira_dashboard(request):
+    """Dashboard de Back Office (las consultas que hagan falta, en paralelo)"""
+    usuario = await sync_to_async(_usuario_autenticado)(request)
+    if usuario is None:
+        return redirect_to_login(request.get_full_path())
+    
+    # Lo que hacen @etag y @cache_control en las vistas síncronas
+    etag = await sync_to_async(_etag_jadira_dashboard)(request)
+    respuesta = get_conditional_response(request, etag=quote_etag(etag)) if etag else None
+    if respuesta is None:
+        respuesta = await _jadira_dashboard(request, usuario)
+    if etag and request.method in ('GET', 'HEAD'):
+        respuesta.headers.setdefault('ETag', quote_etag(etag))
+    patch_cache_control(respuesta, private=True, no_cache=True)
+    return respuesta
+
+
+async def _jadira_dashboard(request, usuario):
+    if not usuario.es_back_office():
         messages.error(request, 'No tienes permisos para acceder a esta sección')
         return redirect('dashboard')
     
-    # Estadísticas
-    stats = {
-        'pendientes': Venta.objects.filter(estado='PENDIENTE_BO').count(),
-        'completadas_hoy': Venta.objects.filter(
-            estado='PENDIENTE_AUDIO',
-            fecha_modificacion__date=timezone.now().date()
-        ).count(),
-        'total_procesadas': Venta.objects.exclude(estado='PENDIENTE_BO').count(),
-    }
-    
-    # Ventas pendientes recientes
-    ventas_pendientes = Venta.objects.filter(estado='PENDIENTE_BO')[:10]
-    
-    # Notificaciones no leídas
-    notificaciones = NotificacionVenta.objects.filter(
-        usuario_destinatario=request.user,
-        leida=False
-    )[:5]
-    
-    context = {
-        'stats': stats,
-        'ventas_pendientes': ventas_pendientes,
-        'notificaciones': notificaciones,
-    }
-    
-    return render(request, 'ventas/jadira_dashboard.html', context)
+    # Las mismas claves que los {% cache %} de la plantilla
+    version_ventas, version_usuarios, version_notificaciones, version_rol = await sync_to_async(versiones)(
+        ('ventas',), ('usuarios',), ('notificaciones', usuario.pk), ('notificaciones', 'rol', usuario.rol),
+    )
+    hoy = timezone.localdate().strftime('%Y-%m-%d')
+    context = await _contexto_de_fragmentos({
+        'stats': ('jadira_kpis', [version_ventas, hoy], _estadisticas_back_office),
+        'ventas_pendientes': (
+            'jadira_ventas_pendientes', [version_ventas, version_usuarios],
+            lambda: list(Venta.objects.filter(estado='PENDIENTE_BO').select_related('asesor')[:10]),
+        ),
+        'notificaciones': (
+            'jadira_notificaciones', [usuario.pk, version_notificaciones, version_rol],
+            partial(_notificaciones_no_leidas, usuario),
+        ),
+    })
+    
+    return await sync_to_async(render)(request, 'ventas/jadira_dashboard.html', context)
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@etag(_etag_jadira_pendientes)
 def jadira_pendientes(request):
     """Listado de ventas pendientes de completar"""
     if not request.user.es_back_office():
@@ -194,32 +310,36 @@ def jadira_pendientes(request):
     asesor_id = request.GET.get('asesor', '')
     buscar = request.GET.get('buscar', '')
     
-    ventas = Venta.objects.filter(estado='PENDIENTE_BO').select_related('asesor')
+    ventas = Venta.objects.filter(estado='PENDIENTE_BO').select_related('asesor', 'asignada_a')
     
     if asesor_id:
         ventas = ventas.filter(asesor_id=asesor_id)
     
     if buscar:
-        ventas = ventas.filter(
-            Q(cliente_nombre__icontains=buscar) |
-            Q(cliente_dni__icontains=buscar)
-        )
+        ventas = buscar_ventas(ventas, buscar, campos=('nombre', 'dni'))
     
-    # Paginación
-    paginator = Paginator(ventas, 20)
-    page = request.GET.get('page', 1)
-    ventas_paginadas = paginator.get_page(page)
+    # Paginación por cursor (sin COUNT ni OFFSET por página)
+    paginador = PaginadorCursor(ventas, 20)
+    ventas_paginadas = paginador.get_page(
+        despues=request.GET.get('despues'),
+        antes=request.GET.get('antes'),
+    )
     
     # Lista de asesores para filtro
     asesores = Usuario.objects.filter(rol='ASESOR', activo=True)
     
+    filtros = {
+        'asesor': asesor_id,
+        'buscar': buscar,
+    }
+    
     context = {
         'ventas': ventas_paginadas,
+        'total_ventas': conteo_en_cache(ventas, version=versiones(('ventas',))[0]),
         'asesores': asesores,
-        'filtros': {
-            'asesor': asesor_id,
-            'buscar': buscar,
-        }
+        'filtros': filtros,
+        'filtros_query': urlencode({k: v for k, v in filtros.items() if v}),
+        'ahora': timezone.now(),
     }
     
     return render(request, 'ventas/jadira_pendientes.html', context)
@@ -238,13 +358,26 @@ def jadira_completar_venta(request, venta_id):
         messages.error(request, 'Esta venta ya fue procesada')
         return redirect('ventas:jadira_pendientes')
     
+    # Reservar la venta antes de trabajarla, así nadie más la completa a la vez
+    if not reservar(venta, request.user):
+        venta.refresh_from_db(fields=['estado', 'asignada_a'])
+        if venta.puede_completar_backoffice() and venta.asignada_a:
+            messages.error(request, f'La venta #{venta.id} la está procesando {venta.asignada_a.get_full_name()}')
+        else:
+            messages.error(request, 'Esta venta ya fue procesada')
+        return redirect('ventas:jadira_pendientes')
+    
     if request.method == 'POST':
         form = VentaBackOfficeForm(request.POST, instance=venta)
         if form.is_valid():
-            venta = form.save(commit=False)
-            venta.estado = 'PENDIENTE_AUDIO'
-            venta.modificado_por = request.user
-            venta.save()
+            try:
+                venta = cambiar_estado(
+                    form.save(commit=False), 'PENDIENTE_AUDIO', request.user,
+                    asignada_a=None, asignada_hasta=None,
+                )
+            except TransicionInvalida as error:
+                messages.error(request, str(error))
+                return redirect('ventas:jadira_pendientes')
             
             messages.success(request, f'Venta #{venta.id} completada. El asesor {venta.asesor.get_full_name()} será notificado.')
             return redirect('ventas:jadira_pendientes')
@@ -252,11 +385,7 @@ def jadira_completar_venta(request, venta_id):
         form = VentaBackOfficeForm(instance=venta)
     
     # Marcar notificación como leída
-    NotificacionVenta.objects.filter(
-        venta=venta,
-        usuario_destinatario=request.user,
-        leida=False
-    ).update(leida=True)
+    marcar_venta_leida(request.user, venta)
     
     context = {
         'form': form,
@@ -266,29 +395,306 @@ def jadira_completar_venta(request, venta_id):
     return render(request, 'ventas/jadira_completar_venta.html', context)
 
 
+@login_required
+def jadira_completar_lote(request):
+    """Tomar las siguientes ventas pendientes y completarlas de una sola vez"""
+    if not request.user.es_back_office():
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('dashboard')
+    
+    asesor_id = request.GET.get('asesor', '')
+    buscar = request.GET.get('buscar', '')
+    filtros_query = urlencode({k: v for k, v in {'asesor': asesor_id, 'buscar': buscar}.items() if v})
+    pendientes = Venta.objects.filter(estado='PENDIENTE_BO').select_related('asesor')
+    
+    if request.method == 'POST' and 'liberar' in request.POST:
+        liberadas = liberar(request.user)
+        messages.info(request, f'{liberadas} venta(s) devuelta(s) a la cola')
+        return redirect('ventas:jadira_pendientes')
+    
+    if request.method == 'POST':
+        # Solo las ventas de las filas enviadas, en una consulta
+        ids = [
+            valor for clave, valor in request.POST.items()
+            if clave.startswith('form-') and clave.endswith('-id') and valor.isdigit()
+        ]
+        formset = CompletarLoteFormSet(request.POST, queryset=pendientes.filter(id__in=ids))
+        reservadas_hasta = None
+        if formset.is_valid():
+            ventas = formset.a_completar()
+            if not ventas:
+                messages.warning(request, 'No llenaste ninguna fila')
+                return redirect(request.get_full_path())
+            for venta in ventas:
+                venta.asignada_a = None
+                venta.asignada_hasta = None
+            try:
+                with transaction.atomic():
+                    # Solo si ningún otro usuario reservó alguna mientras tanto
+                    cambiar_estado_en_lote(
+                        ventas, 'PENDIENTE_AUDIO', request.user,
+                        campos=('sec', 'sot', 'fecha_instalacion_programada', 'asignada_a', 'asignada_hasta'),
+                        condicion=disponibles_para(request.user, timezone.now()),
+                    )
+                    encolar_varias('notificar_ventas_completadas', [{'venta_id': venta.id} for venta in ventas])
+            except TransicionInvalida as error:
+                messages.error(request, str(error))
+                return redirect(request.get_full_path())
+            
+            messages.success(request, f'{len(ventas)} venta(s) completada(s). Los asesores serán notificados.')
+            return redirect(request.get_full_path())
+    else:
+        if asesor_id:
+            pendientes = pendientes.filter(asesor_id=asesor_id)
+        if buscar:
+            pendientes = buscar_ventas(pendientes, buscar, campos=('nombre', 'dni'))
+        
+        # Las que el usuario ya tenía más las siguientes libres, reservadas a su nombre
+        reservadas = tomar_siguientes(request.user, CompletarLoteFormSet.max_num, pendientes)
+        reservadas_hasta = reservadas[0].asignada_hasta if reservadas else None
+        formset = CompletarLoteFormSet(
+            queryset=pendientes.filter(id__in=[venta.id for venta in reservadas]).order_by('fecha_creacion', 'id')
+        )
+    
+    context = {
+        'formset': formset,
+        'reservadas_hasta': reservadas_hasta,
+        'filtros_query': filtros_query,
+    }
+    
+    return render(request, 'ventas/jadira_completar_lote.html', context)
+
+
+# ==================== VISTAS DE SUPERVISIÓN ====================
+
+@login_required
+def supervisor_dashboard(request):
+    """Dashboard del equipo para supervisor y dueño (desde los resúmenes precalculados)"""
+    if not (request.user.es_supervisor() or request.user.es_dueño()):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('dashboard')
+    
+    semanas = request.GET.get('semanas', '')
+    semanas = int(semanas) if semanas.isdigit() and int(semanas) in RANGOS_SEMANAS else RANGO_POR_DEFECTO
+    
+    with lecturas_de_reportes(request):
+        context = tablero_supervisor(semanas)
+    context['rangos'] = RANGOS_SEMANAS
+    context['grafico'] = {
+        'dias': [punto['dia'].strftime('%d/%m') for punto in context['serie']],
+        'turnos': {
+            turno: [punto['turnos'][i] for punto in context['serie']]
+            for i, turno in enumerate(context['turnos'])
+        },
+    }
+    
+    return render(request, 'ventas/supervisor_dashboard.html', context)
+
+
 # ==================== VISTAS DE NOTIFICACIONES ====================
 
+def _redirigir_a_venta(usuario, venta_id):
+    """Back Office abre la venta para completarla; el asesor ve su detalle"""
+    if usuario.es_back_office():
+        return redirect('ventas:jadira_completar_venta', venta_id=venta_id)
+    return redirect('ventas:asesor_detalle_venta', venta_id=venta_id)
+
+
 @login_required
 def marcar_notificacion_leida(request, notificacion_id):
     """Marcar una notificación como leída"""
-    notificacion = get_object_or_404(
-        NotificacionVenta,
+    venta_id = NotificacionVenta.objects.filter(
         id=notificacion_id,
         usuario_destinatario=request.user
+    ).values_list('venta_id', flat=True).first()
+    if venta_id is None:
+        # Un enlace viejo a una notificación ya leída y archivada
+        venta_id = NotificacionVentaArchivada.objects.filter(
+            id=notificacion_id,
+            usuario_destinatario=request.user
+        ).values_list('venta_id', flat=True).first()
+        if venta_id is None:
+            raise Http404('Notificación no encontrada')
+        return _redirigir_a_venta(request.user, venta_id)
+    marcar_como_leidas(request.user, ids=[notificacion_id])
+    
+    return _redirigir_a_venta(request.user, venta_id)
+
+
+@login_required
+def marcar_difusion_leida(request, difusion_id):
+    """Marcar como leída una notificación de difusión para el usuario actual"""
+    difusion = get_object_or_404(
+        NotificacionDifusion,
+        id=difusion_id,
+        rol_destinatario=request.user.rol
     )
-    notificacion.leida = True
-    notificacion.save()
+    marcar_difusion_como_leida(request.user, difusion)
     
-    return redirect('ventas:asesor_detalle_venta', venta_id=notificacion.venta.id)
+    return _redirigir_a_venta(request.user, difusion.venta_id)
 
 
 @login_required
 def marcar_todas_leidas(request):
     """Marcar todas las notificaciones como leídas"""
-    NotificacionVenta.objects.filter(
-        usuario_destinatario=request.user,
-        leida=False
-    ).update(leida=True)
+    marcar_todas_como_leidas(request.user)
     
     messages.success(request, 'Todas las notificaciones marcadas como leídas')
-    return redirect(request.META.get('HTTP_REFERER', 'dashboard'))
\ No newline at end of file
+    return redirect(request.META.get('HTTP_REFERER', 'dashboard'))
+
+
+def _ids(valores):
+    """Lista de enteros a partir de lo recibido en el JSON; ValueError si no lo es"""
+    if not isinstance(valores, list):
+        raise ValueError
+    return [int(valor) for valor in valores]
+
+
+@login_required
+@require_POST
+def api_marcar_leida(request, notificacion_id):
+    """JSON: marca una notificación (o una difusión con ?difusion=1) como leída"""
+    if request.GET.get('difusion'):
+        marcadas = marcar_como_leidas(request.user, difusion_ids=[notificacion_id])
+    else:
+        marcadas = marcar_como_leidas(request.user, ids=[notificacion_id])
+    if not marcadas:
+        return JsonResponse({'error': 'Notificación no encontrada o ya leída'}, status=404)
+    
+    return JsonResponse({'marcadas': marcadas, 'no_leidas': resumen_no_leidas(request.user)[0]})
+
+
+@login_required
+@require_POST
+def api_marcar_leidas(request):
+    """JSON: {"ids": [...], "difusiones": [...]} o {"todas": true}"""
+    try:
+        datos = json.loads(request.body or b'{}')
+        if datos.get('todas'):
+            marcar_todas_como_leidas(request.user)
+            marcadas = None
+        else:
+            marcadas = marcar_como_leidas(
+                request.user,
+                ids=_ids(datos.get('ids', [])),
+                difusion_ids=_ids(datos.get('difusiones', [])),
+            )
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Cuerpo JSON inválido'}, status=400)
+    
+    return JsonResponse({'marcadas': marcadas, 'no_leidas': resumen_no_leidas(request.user)[0]})
+
+
+# ==================== NOTIFICACIONES EN VIVO (SSE) ====================
+
+# Sin eventos, cada cuántos segundos se manda un comentario para mantener la conexión
+INTERVALO_PING = 15
+# Duración máxima de un stream; EventSource se reconecta solo
+DURACION_STREAM = 300
+
+
+def _contador(usuario):
+    """Contador y últimas no leídas en el formato que espera notificaciones.js"""
+    cantidad, recientes = resumen_no_leidas(usuario)
+    return {
+        'no_leidas': cantidad,
+        'recientes': [
+            {
+                'mensaje': notif['mensaje'],
+                'hace': timesince(notif['fecha_creacion']),
+                'url': reverse(
+                    'ventas:marcar_difusion_leida' if notif['difusion'] else 'ventas:marcar_notificacion_leida',
+                    args=[notif['id']],
+                ),
+            }
+            for notif in recientes
+        ],
+    }
+
+
+def _usuario_autenticado(request):
+    return request.user if request.user.is_authenticated else None
+
+
+async def stream_notificaciones(request):
+    """
+    Server-Sent Events con las notificaciones nuevas y el contador de no leídas.
+
+    Al conectarse se envía el contador; después, cada evento del bus para el
+    usuario o su rol. Solo hace streaming servido por ASGI; bajo WSGI
+    (runserver) envía el contador y el navegador vuelve a conectarse.
+    """
+    usuario = await sync_to_async(_usuario_autenticado)(request)
+    if usuario is None:
+        # EventSource no reintenta ante un error HTTP
+        return HttpResponse(status=401)
+    
+    contador = sync_to_async(_contador)
+    
+    if not isinstance(request, ASGIRequest):
+        mensajes = [b'retry: 10000\n\n', formatear_sse('contador', await contador(usuario))]
+        return StreamingHttpResponse(mensajes, content_type='text/event-stream')
+    
+    async def eventos():
+        loop = asyncio.get_running_loop()
+        fin = loop.time() + DURACION_STREAM
+        async with obtener_bus().suscribir(canal_usuario(usuario.pk), canal_rol(usuario.rol)) as cola:
+            yield b'retry: 3000\n\n'
+            yield formatear_sse('contador', await contador(usuario))
+            while (restante := fin - loop.time()) > 0:
+                try:
+                    recibidos = [await asyncio.wait_for(cola.get(), min(INTERVALO_PING, restante))]
+                except asyncio.TimeoutError:
+                    yield b': ping\n\n'
+                    continue
+                # Una ráfaga de eventos se resume en un solo contador
+                while not cola.empty():
+                    recibidos.append(cola.get_nowait())
+                for evento in recibidos:
+                    if evento['tipo'] == 'notificacion':
+                        yield formatear_sse('notificacion', evento)
+                yield formatear_sse('contador', await contador(usuario))
+    
+    respuesta = StreamingHttpResponse(eventos(), content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    respuesta['X-Accel-Buffering'] = 'no'
+    return respuesta
+
+# ==================== EXPORTACIÓN ====================
+
+@login_required
+def exportar_ventas(request, formato):
+    """Descarga las ventas filtradas en CSV o Excel (streaming)"""
+    if formato not in EXPORTADORES:
+        raise Http404('Formato de exportación no disponible')
+    
+    usuario = request.user
+    if usuario.es_supervisor() or usuario.es_dueño() or usuario.es_back_office():
+        ventas = Venta.objects.all()
+        asesor_id = request.GET.get('asesor', '')
+        if asesor_id.isdigit():
+            ventas = ventas.filter(asesor_id=asesor_id)
+    elif usuario.es_asesor():
+        ventas = Venta.objects.filter(asesor=usuario)
+    else:
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('dashboard')
+    
+    # El queryset se evalúa al enviar la respuesta, fuera de lecturas_de_reportes
+    ventas = ventas.using(alias_para_reportes(request))
+    estado = request.GET.get('estado', '')
+    buscar = request.GET.get('buscar', '')
+    
+    if estado:
+        ventas = ventas.filter(estado=estado)
+    
+    ventas = filtrar_por_fecha(
+        ventas, 'fecha_creacion',
+        desde=leer_fecha(request.GET.get('fecha_desde', '')),
+        hasta=leer_fecha(request.GET.get('fecha_hasta', '')),
+    )
+    
+    if buscar:
+        ventas = buscar_ventas(ventas, buscar)
+    
+    return EXPORTADORES[formato](ventas)
@@ -0,0 +1,318 @@
+"""
+Lectura y escritura de archivos .xlsx fila por fila, sin cargar el libro en memoria.
+
+Un .xlsx es un zip con un XML por hoja; aquí se recorre ese XML con
+iterparse y se libera cada fila después de entregarla. Solo la tabla de
+textos compartidos (sharedStrings.xml) se carga completa, porque las celdas
+la referencian por posición. La escritura (``generar_xlsx``) produce el zip
+por bloques a medida que llegan las filas.
+"""
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape
+
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PAQUETE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+EPOCA_EXCEL = datetime(1899, 12, 30)
+
+
+def indice_columna(referencia):
+    """'A1' -> 0, 'AB12' -> 27"""
+    letras = re.match(r'[A-Z]+', referencia).group()
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + (ord(letra) - ord('A') + 1)
+    return indice - 1
+
+
+def fecha_excel(valor):
+    """Convierte un número de serie de Excel (p. ej. 45321.5) en datetime"""
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, datetime):
+        return valor
+    try:
+        return EPOCA_EXCEL + timedelta(days=float(valor))
+    except (TypeError, ValueError):
+        return None
+
+
+class LibroXlsx:
+    """Libro .xlsx de solo lectura; usar como context manager"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._zip = zipfile.ZipFile(ruta)
+        self._textos = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    def hojas(self):
+        """Lista de (nombre, ruta interna del XML) en el orden del libro"""
+        destinos = {}
+        with self._zip.open('xl/_rels/workbook.xml.rels') as rels:
+            for _, elem in iterparse(rels):
+                if elem.tag == f'{NS_PAQUETE}Relationship':
+                    destinos[elem.get('Id')] = posixpath.normpath(posixpath.join('xl', elem.get('Target')))
+
+        hojas = []
+        with self._zip.open('xl/workbook.xml') as libro:
+            for _, elem in iterparse(libro):
+                if elem.tag == f'{NS}sheet':
+                    hojas.append((elem.get('name'), destinos[elem.get(f'{NS_REL}id')]))
+        return hojas
+
+    def ruta_hoja(self, hoja):
+        """Acepta el nombre de la hoja o su posición (empezando en 0)"""
+        hojas = self.hojas()
+        if isinstance(hoja, int):
+            return hojas[hoja][1]
+        for nombre, ruta in hojas:
+            if nombre == hoja:
+                return ruta
+        raise KeyError(f'La hoja {hoja!r} no existe en {self.ruta}')
+
+    @property
+    def textos(self):
+        if self._textos is None:
+            self._textos = []
+            if 'xl/sharedStrings.xml' in self._zip.namelist():
+                with self._zip.open('xl/sharedStrings.xml') as archivo:
+                    for _, elem in iterparse(archivo):
+                        if elem.tag == f'{NS}si':
+                            self._textos.append(''.join(t.text or '' for t in elem.iter(f'{NS}t')))
+                            elem.clear()
+        return self._textos
+
+    def filas(self, hoja):
+        """
+        Genera cada fila de la hoja como lista de valores.
+
+        Las celdas vacías intermedias se devuelven como None; los números
+        como int o float (las fechas llegan como número de serie, ver
+        ``fecha_excel``).
+        """
+        textos = self.textos
+        with self._zip.open(self.ruta_hoja(hoja)) as archivo:
+            for _, elem in iterparse(archivo):
+                if elem.tag != f'{NS}row':
+                    continue
+
+                fila = []
+                for celda in elem.iter(f'{NS}c'):
+                    referencia = celda.get('r')
+                    if referencia:
+                        faltantes = indice_columna(referencia) - len(fila)
+                        fila.extend([None] * faltantes)
+                    fila.append(self._valor(celda, textos))
+
+                yield fila
+                elem.clear()
+
+    @staticmethod
+    def _valor(celda, textos):
+        tipo = celda.get('t')
+        if tipo == 'inlineStr':
+            return ''.join(t.text or '' for t in celda.iter(f'{NS}t'))
+
+        valor = celda.findtext(f'{NS}v')
+        if valor is None:
+            return None
+        if tipo == 's':
+            return textos[int(valor)]
+        if tipo in ('str', 'e'):
+            return valor
+        if tipo == 'b':
+            return valor == '1'
+
+        numero = float(valor)
+        return int(numero) if numero.is_integer() else numero
+
+
+# ==================== ESCRITURA ====================
+
+# Formatos de celda definidos en ESTILOS (posición en cellXfs)
+ESTILO_FECHA = 1
+ESTILO_FECHA_HORA = 2
+ESTILO_MONTO = 3
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+LIBRO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nombre}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+RELS_LIBRO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+ESTILOS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="4"><xf/>'
+    '<xf numFmtId="14" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+
+INICIO_HOJA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+FIN_HOJA = '</sheetData></worksheet>'
+
+CARACTERES_INVALIDOS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def letra_columna(indice):
+    """0 -> 'A', 27 -> 'AB'"""
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return letras
+
+
+def serial_excel(valor):
+    """Inversa de ``fecha_excel``: date o datetime (ingenuo) -> número de serie"""
+    if not isinstance(valor, datetime):
+        valor = datetime(valor.year, valor.month, valor.day)
+    diferencia = valor - EPOCA_EXCEL
+    return diferencia.days + diferencia.seconds / 86400
+
+
+def _celda_xml(referencia, valor):
+    if valor is None or valor == '':
+        return ''
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, datetime):
+        return f'<c r="{referencia}" s="{ESTILO_FECHA_HORA}"><v>{serial_excel(valor)}</v></c>'
+    if isinstance(valor, date):
+        return f'<c r="{referencia}" s="{ESTILO_FECHA}"><v>{serial_excel(valor)}</v></c>'
+    if isinstance(valor, Decimal):
+        return f'<c r="{referencia}" s="{ESTILO_MONTO}"><v>{valor}</v></c>'
+    if isinstance(valor, (int, float)):
+        return f'<c r="{referencia}"><v>{valor}</v></c>'
+
+    contenido = escape(CARACTERES_INVALIDOS.sub('', str(valor)))
+    return f'<c r="{referencia}" t="inlineStr"><is><t xml:space="preserve">{contenido}</t></is></c>'
+
+
+def fila_xml(numero, valores, columnas):
+    celdas = ''.join(
+        _celda_xml(f'{columna}{numero}', valor) for columna, valor in zip(columnas, valores)
+    )
+    return f'<row r="{numero}">{celdas}</row>'
+
+
+class _SalidaEnMemoria:
+    """
+    Destino de escritura para ZipFile que entrega lo escrito por partes.
+
+    No implementa tell() ni seek(): ZipFile lo trata como un flujo no
+    posicionable y escribe cada archivo con descriptor de datos, sin volver
+    atrás a corregir cabeceras.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def generar_xlsx(cabecera, filas, nombre_hoja='Hoja1', filas_por_bloque=500):
+    """
+    Genera un .xlsx de una hoja como una secuencia de bloques de bytes.
+
+    Solo se mantienen en memoria las filas de un bloque: sirve para
+    StreamingHttpResponse con exportaciones de cualquier tamaño. Los textos
+    se escriben como inlineStr para no tener que construir sharedStrings.
+    """
+    salida = _SalidaEnMemoria()
+    columnas = [letra_columna(i) for i in range(len(cabecera))]
+
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as libro:
+        libro.writestr('[Content_Types].xml', CONTENT_TYPES)
+        libro.writestr('_rels/.rels', RELS)
+        libro.writestr('xl/workbook.xml', LIBRO.format(nombre=escape(nombre_hoja[:31], {'"': '&quot;'})))
+        libro.writestr('xl/_rels/workbook.xml.rels', RELS_LIBRO)
+        libro.writestr('xl/styles.xml', ESTILOS)
+        yield salida.vaciar()
+
+        with libro.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write(INICIO_HOJA.encode())
+            hoja.write(fila_xml(1, cabecera, columnas).encode())
+            for numero, valores in enumerate(filas, start=2):
+                hoja.write(fila_xml(numero, valores, columnas).encode())
+                if numero % filas_por_bloque == 0:
+                    yield salida.vaciar()
+            hoja.write(FIN_HOJA.encode())
+
+    yield salida.vaciar()
@@ -3,6 +3,14 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Sirve las vistas normales, el stream SSE de notificaciones
+(``/ventas/notificaciones/stream/``) y los dashboards de asesor y Back
+Office, que son async y corren sus consultas en paralelo (bajo WSGI también
+funcionan, con un event loop por request). El bus de eventos por defecto
+vive en memoria, así que debe correr un solo proceso:
+
+    uvicorn config.asgi:application --workers 1
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
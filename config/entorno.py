@@ -0,0 +1,42 @@
+"""
+Lectura del archivo ``.env`` de la raíz del proyecto.
+
+Cada línea ``CLAVE=valor`` pasa a ``os.environ`` salvo que la variable ya
+exista, así lo que defina el sistema (systemd, docker, la terminal) manda
+sobre el archivo. Las líneas vacías y las que empiezan con ``#`` se ignoran.
+"""
+import os
+
+
+def cargar(ruta):
+    """Carga las variables de ``ruta`` si el archivo existe"""
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            lineas = archivo.readlines()
+    except FileNotFoundError:
+        return
+    for linea in lineas:
+        linea = linea.strip()
+        if not linea or linea.startswith('#') or '=' not in linea:
+            continue
+        clave, valor = linea.split('=', 1)
+        valor = valor.strip()
+        if len(valor) >= 2 and valor[0] == valor[-1] and valor[0] in '"\'':
+            valor = valor[1:-1]
+        os.environ.setdefault(clave.strip(), valor)
+
+
+def texto(nombre, defecto=''):
+    return os.environ.get(nombre, defecto)
+
+
+def entero(nombre, defecto):
+    valor = os.environ.get(nombre, '').strip()
+    return int(valor) if valor else defecto
+
+
+def booleano(nombre, defecto=False):
+    valor = os.environ.get(nombre, '').strip().lower()
+    if not valor:
+        return defecto
+    return valor in ('1', 'true', 'si', 'sí', 'yes', 'on')
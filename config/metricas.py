@@ -0,0 +1,279 @@
+"""
+Métricas por vista: latencia, consultas SQL, tiempo en base de datos, render
+de plantillas y costo de los context processors.
+
+- ``MetricasMiddleware`` (primero en MIDDLEWARE) abre una medición por
+  request y al terminar la suma a los histogramas de su vista (el nombre de
+  la URL resuelta, p. ej. ``ventas:jadira_pendientes``). Si la request pasa
+  ``METRICAS_LENTO_MS`` o ``METRICAS_MAX_CONSULTAS`` la deja en el log.
+- Cada conexión a la base de datos lleva un execute_wrapper que cuenta y
+  cronometra las consultas de la medición en curso (un ContextVar, así que
+  también sirve para las vistas async que consultan desde otro hilo).
+- ``PlantillasMedidas`` es el backend de plantillas de Django que además
+  cronometra cada render y cada context processor.
+
+Los histogramas viven en memoria de cada proceso y se exponen en formato de
+texto de Prometheus en /metricas/ (solo staff). El tiempo de plantillas
+incluye las consultas que hagan los querysets evaluados al renderizar, que
+también cuentan en el tiempo de base de datos.
+"""
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+_medicion_actual = ContextVar('medicion_actual', default=None)
+_candado = threading.Lock()
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+# ==================== HISTOGRAMAS ====================
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histograma:
+    """Histograma acumulado por combinación de etiquetas, al estilo de Prometheus"""
+
+    def __init__(self, nombre, ayuda, etiquetas, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = limites
+        self.series = {}
+
+    def observar(self, valor, *etiquetas):
+        with _candado:
+            serie = self.series.get(etiquetas)
+            if serie is None:
+                # Conteo por límite (más +Inf), suma y total
+                serie = self.series[etiquetas] = [0] * (len(self.limites) + 1) + [0, 0]
+            for indice in range(bisect_left(self.limites, valor), len(self.limites) + 1):
+                serie[indice] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        with _candado:
+            series = sorted((etiquetas, list(serie)) for etiquetas, serie in self.series.items())
+        for valores, serie in series:
+            etiquetas = ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(self.etiquetas, valores))
+            for limite, conteo in zip((*self.limites, '+Inf'), serie):
+                lineas.append(f'{self.nombre}_bucket{{{etiquetas},le="{limite}"}} {conteo}')
+            lineas.append(f'{self.nombre}_sum{{{etiquetas}}} {serie[-2]}')
+            lineas.append(f'{self.nombre}_count{{{etiquetas}}} {serie[-1]}')
+        return '\n'.join(lineas)
+
+
+LATENCIA = Histograma(
+    'jard_vista_segundos', 'Latencia de la request por vista',
+    ('vista', 'metodo'), LIMITES_SEGUNDOS,
+)
+CONSULTAS = Histograma(
+    'jard_vista_consultas', 'Consultas SQL por request',
+    ('vista',), LIMITES_CONSULTAS,
+)
+BASE_DE_DATOS = Histograma(
+    'jard_vista_db_segundos', 'Tiempo en la base de datos por request',
+    ('vista',), LIMITES_SEGUNDOS,
+)
+PLANTILLAS = Histograma(
+    'jard_vista_plantillas_segundos', 'Tiempo de render de plantillas por request',
+    ('vista',), LIMITES_SEGUNDOS,
+)
+PROCESADORES = Histograma(
+    'jard_vista_context_processors_segundos', 'Tiempo propio de cada context processor por request',
+    ('vista', 'procesador'), LIMITES_SEGUNDOS,
+)
+HISTOGRAMAS = [LATENCIA, CONSULTAS, BASE_DE_DATOS, PLANTILLAS, PROCESADORES]
+
+
+def exponer():
+    return '\n'.join(histograma.exponer() for histograma in HISTOGRAMAS) + '\n'
+
+
+# ==================== MEDICIÓN POR REQUEST ====================
+
+class Medicion:
+    __slots__ = ('inicio', 'consultas', 'segundos_db', 'segundos_plantillas', 'procesadores')
+
+    def __init__(self):
+        self.inicio = perf_counter()
+        self.consultas = 0
+        self.segundos_db = 0.0
+        self.segundos_plantillas = 0.0
+        self.procesadores = defaultdict(float)
+
+    def registrar(self, request, response):
+        segundos = perf_counter() - self.inicio
+        coincidencia = request.resolver_match
+        vista = coincidencia.view_name if coincidencia else 'sin_ruta'
+
+        LATENCIA.observar(segundos, vista, request.method)
+        CONSULTAS.observar(self.consultas, vista)
+        BASE_DE_DATOS.observar(self.segundos_db, vista)
+        PLANTILLAS.observar(self.segundos_plantillas, vista)
+        for procesador, segundos_procesador in self.procesadores.items():
+            PROCESADORES.observar(segundos_procesador, vista, procesador)
+
+        lento_ms = getattr(settings, 'METRICAS_LENTO_MS', 1000)
+        max_consultas = getattr(settings, 'METRICAS_MAX_CONSULTAS', 50)
+        if segundos * 1000 > lento_ms or self.consultas > max_consultas:
+            logger.warning(
+                '%s %s (%s) -> %s en %.0f ms: %d consultas (%.0f ms), plantillas %.0f ms',
+                request.method, request.get_full_path(), vista, response.status_code,
+                segundos * 1000, self.consultas, self.segundos_db * 1000, self.segundos_plantillas * 1000,
+            )
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.consultas += 1
+        medicion.segundos_db += perf_counter() - inicio
+
+
+def _instalar_en(conexion):
+    if _medir_consulta not in conexion.execute_wrappers:
+        conexion.execute_wrappers.append(_medir_consulta)
+
+
+def _conexion_creada(sender, connection, **kwargs):
+    _instalar_en(connection)
+
+
+def _request_iniciada(sender, **kwargs):
+    # Corre en el hilo donde la request usará la base de datos (también en
+    # ASGI), así que cubre las conexiones abiertas antes de cargar el middleware
+    for conexion in connections.all(initialized_only=True):
+        _instalar_en(conexion)
+
+
+class MetricasMiddleware:
+    """Mide cada request y la suma a los histogramas de su vista"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_conexion_creada, dispatch_uid='metricas_conexion_creada')
+        request_started.connect(_request_iniciada, dispatch_uid='metricas_request_iniciada')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        medicion.registrar(request, response)
+        return response
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        medicion.registrar(request, response)
+        return response
+
+
+# ==================== PLANTILLAS ====================
+
+def _procesador_medido(procesador):
+    nombre = f'{procesador.__module__}.{procesador.__qualname__}'
+
+    @wraps(procesador)
+    def medido(request):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return procesador(request)
+        inicio = perf_counter()
+        try:
+            return procesador(request)
+        finally:
+            medicion.procesadores[nombre] += perf_counter() - inicio
+
+    return medido
+
+
+class PlantillaMedida:
+    """Envuelve la plantilla del backend y cronometra su render"""
+
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+
+    @property
+    def origin(self):
+        return self.plantilla.origin
+
+    @property
+    def template(self):
+        return self.plantilla.template
+
+    def render(self, context=None, request=None):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return self.plantilla.render(context, request)
+        inicio = perf_counter()
+        try:
+            return self.plantilla.render(context, request)
+        finally:
+            medicion.segundos_plantillas += perf_counter() - inicio
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """Backend DjangoTemplates que mide renders y context processors"""
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.engine.template_context_processors = tuple(
+            _procesador_medido(procesador) for procesador in self.engine.template_context_processors
+        )
+
+    def from_string(self, template_code):
+        return PlantillaMedida(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return PlantillaMedida(super().get_template(template_name))
+
+
+# ==================== ENDPOINT ====================
+
+@login_required
+def metricas_view(request):
+    """Histogramas en formato de texto de Prometheus (solo staff)"""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
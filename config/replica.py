@@ -0,0 +1,153 @@
+"""
+Réplica de solo lectura para los reportes.
+
+Los reportes (dashboards de supervisión y exportaciones) leen de la base de
+datos ``replica``: una copia de la principal hecha con la API de backup de
+SQLite por ``manage.py refrescar_replica`` (una vez o cada N segundos). La
+copia se escribe aparte y reemplaza a la anterior de una vez, así que quien
+la está leyendo sigue con la suya hasta cerrar la conexión. La fecha de
+modificación del archivo es el momento en que empezó la copia: los datos son
+de ese instante.
+
+Solo van a la réplica las consultas hechas dentro de
+``lecturas_de_reportes(request)``; el resto de la request (menú,
+notificaciones, fragmentos en caché) sigue en la principal. Las escrituras
+siempre van a la principal. Se lee de la principal cuando:
+
+- no hay réplica, o tiene más de ``REPLICA_RETRASO_MAXIMO`` segundos;
+- el usuario escribió después de la copia (lee lo que acaba de escribir):
+  ``MarcaEscriturasMiddleware`` deja la hora de su última request
+  POST/PUT/PATCH/DELETE en una cookie.
+
+Después de ``migrate`` conviene refrescar la réplica, para que tenga las
+columnas nuevas.
+"""
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ALIAS = 'replica'
+COOKIE_ESCRITURA = 'ultima_escritura'
+METODOS_DE_ESCRITURA = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+_alias_lectura = ContextVar('alias_lectura', default=None)
+
+
+def retraso_maximo():
+    return getattr(settings, 'REPLICA_RETRASO_MAXIMO', 300)
+
+
+def fecha_de_la_copia():
+    """Hora (epoch) de los datos de la réplica, o None si no hay réplica"""
+    configuracion = settings.DATABASES.get(ALIAS)
+    if configuracion is None:
+        return None
+    try:
+        return os.stat(configuracion['NAME']).st_mtime
+    except OSError:
+        return None
+
+
+def alias_para_reportes(request):
+    """'replica' si sus datos sirven para este usuario; si no, la base principal"""
+    copia = fecha_de_la_copia()
+    if copia is None or time.time() - copia > retraso_maximo():
+        return DEFAULT_DB_ALIAS
+    try:
+        escritura = float(request.COOKIES.get(COOKIE_ESCRITURA, 0))
+    except ValueError:
+        escritura = 0
+    return DEFAULT_DB_ALIAS if escritura >= copia else ALIAS
+
+
+@contextmanager
+def lecturas_de_reportes(request):
+    """
+    Manda a la réplica las lecturas del bloque y devuelve el alias elegido,
+    para los querysets que se evalúan después (``.using(alias)``).
+    """
+    alias = alias_para_reportes(request)
+    token = _alias_lectura.set(alias)
+    try:
+        yield alias
+    finally:
+        _alias_lectura.reset(token)
+
+
+class RouterReplica:
+    """Lecturas de reportes a la réplica; todo lo demás a la base principal"""
+
+    def db_for_read(self, model, **hints):
+        return _alias_lectura.get()
+
+    def db_for_write(self, model, **hints):
+        # También para objetos leídos de la réplica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica es una copia: recibe el esquema al refrescarse
+        if db == ALIAS:
+            return False
+        return None
+
+
+class MarcaEscriturasMiddleware:
+    """Anota en una cookie cuándo escribió el usuario por última vez"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.marcar(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.marcar(request, await self.get_response(request))
+
+    def marcar(self, request, response):
+        if request.method in METODOS_DE_ESCRITURA and request.user.is_authenticated:
+            # La hora al terminar, con lo escrito ya confirmado: solo una copia
+            # empezada después lo tiene con seguridad
+            response.set_cookie(
+                COOKIE_ESCRITURA, f'{time.time():.3f}', max_age=retraso_maximo(), httponly=True, samesite='Lax',
+            )
+        return response
+
+
+def refrescar():
+    """Copia la base principal sobre la réplica; devuelve los segundos que tardó"""
+    origen = settings.DATABASES[DEFAULT_DB_ALIAS]['NAME']
+    destino = str(settings.DATABASES[ALIAS]['NAME'])
+    temporal = f'{destino}.nueva'
+    inicio = time.time()
+    if os.path.exists(temporal):
+        # Restos de una copia interrumpida
+        os.remove(temporal)
+
+    with closing(sqlite3.connect(origen)) as principal, closing(sqlite3.connect(temporal)) as copia:
+        # En un solo paso: la copia es una foto consistente y en WAL no frena
+        # a quienes escriben mientras tanto
+        principal.backup(copia)
+        # Sin WAL: los lectores de la réplica no necesitan archivos auxiliares
+        copia.execute('PRAGMA journal_mode = DELETE')
+
+    os.utime(temporal, (inicio, inicio))
+    os.replace(temporal, destino)
+    return time.time() - inicio
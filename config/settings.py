@@ -12,9 +12,15 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 
+from config import entorno
+from config.sqlite import perfil_produccion
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Variables del archivo .env (las del sistema tienen prioridad)
+entorno.cargar(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -41,17 +47,23 @@ INSTALLED_APPS = [
     # Apps propias
     'apps.usuarios',
     'apps.ventas',
+    'apps.seguimiento',
     
     # Third party
     'widget_tweaks',
 ]
 
 MIDDLEWARE = [
+    # Primero, para que la latencia incluya al resto de middlewares
+    'config.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Cookie con la hora de la última escritura: ese usuario lee sus reportes
+    # de la base principal hasta que la réplica lo alcance
+    'config.replica.MarcaEscriturasMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -60,7 +72,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide renders y context processors
+        'BACKEND': 'config.metricas.PlantillasMedidas',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,7 +82,6 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'apps.ventas.context_processors.notificaciones_pendientes',  # ← Agregar esta línea
             ],
         },
     },
@@ -77,15 +89,157 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Las notificaciones en vivo (SSE) necesitan un servidor ASGI:
+#   uvicorn config.asgi:application
+ASGI_APPLICATION = 'config.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Con DB_SQLITE_PRODUCCION=True (en producción) cada conexión usa WAL,
+# espera hasta DB_SQLITE_BUSY_TIMEOUT_MS por el bloqueo de escritura en vez
+# de fallar con "database is locked", abre las transacciones con BEGIN
+# IMMEDIATE y se reutiliza entre requests (config/sqlite). Por defecto quedan
+# los valores de Django: WAL cambia el encabezado del archivo y db.sqlite3
+# de desarrollo está en el repositorio. Todo se ajusta desde .env. Bajo ASGI
+# Django recomienda no reutilizar conexiones: DB_CONN_MAX_AGE=0.
+# `python manage.py benchmark_sqlite` compara ambos perfiles con una ráfaga
+# de ventas nuevas.
+
+if entorno.booleano('DB_SQLITE_PRODUCCION', False):
+    _opciones_sqlite, _conn_max_age = perfil_produccion()
+else:
+    _opciones_sqlite = {}
+    _conn_max_age = entorno.entero('DB_CONN_MAX_AGE', 0)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'ENGINE': 'config.sqlite',
+        'NAME': BASE_DIR / entorno.texto('DB_NAME', 'db.sqlite3'),
+        'OPTIONS': _opciones_sqlite,
+        'CONN_MAX_AGE': _conn_max_age,
+        'CONN_HEALTH_CHECKS': _conn_max_age > 0,
+    },
+    # Copia de solo lectura para los reportes (config/replica.py), refrescada
+    # con `python manage.py refrescar_replica --cada 60`. Conexión nueva en
+    # cada request para ver la última copia
+    'replica': {
+        'ENGINE': 'config.sqlite',
+        'NAME': BASE_DIR / entorno.texto('DB_REPLICA_NAME', 'db-replica.sqlite3'),
+        'OPTIONS': {
+            'pragmas': {
+                'query_only': 1,
+                'mmap_size': entorno.entero('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+                'cache_size': entorno.entero('DB_SQLITE_CACHE_SIZE', -64000),
+            },
+        },
+        'CONN_MAX_AGE': 0,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['config.replica.RouterReplica']
+
+# Segundos que una copia de la réplica sigue sirviendo para los reportes;
+# si el refresco se detiene, los reportes vuelven a la base principal
+REPLICA_RETRASO_MAXIMO = entorno.entero('DB_REPLICA_RETRASO_MAXIMO', 300)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# LocMem es por proceso; con varios workers usar Redis o Memcached
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jard-crm',
+    },
+    # Fragmentos de plantilla ({% cache ... using="fragmentos" %}); van aparte
+    # para que no desplacen a los contadores y versiones de 'default'
+    'fragmentos': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jard-crm-fragmentos',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Sesiones y el usuario de cada una (apps/usuarios/backends.py): una
+    # request autenticada no consulta la base de datos para saber quién es
+    'sesiones': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jard-crm-sesiones',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Sesiones en caché con respaldo en la base de datos (si la caché pierde una
+# sesión se vuelve a leer de django_session)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sesiones'
+
+# Cada sesión guarda la ruta del backend con el que se inició: cambiar esta
+# lista (o renombrar el backend) cierra todas las sesiones abiertas
+AUTHENTICATION_BACKENDS = ['apps.usuarios.backends.BackendUsuariosEnCache']
+
+# Segundos que el usuario de una sesión sigue en caché; guardarlo lo saca
+# antes. Con varios workers y LocMem, es lo que tarda un cambio de rol o
+# una deshabilitación en llegar a los otros procesos
+USUARIOS_CACHE_SEGUNDOS = 300
+
+# Segundos que vive un fragmento en caché. La clave lleva la versión de los
+# datos, así que un cambio lo reemplaza antes; los paneles con "hace X
+# minutos" usan TIEMPO_FRAGMENTOS_CORTO para que ese texto no envejezca.
+TIEMPO_FRAGMENTOS = 60 * 10
+TIEMPO_FRAGMENTOS_CORTO = 60
+
+
+# Notificaciones de ventas nuevas para Back Office:
+# 'lote' = una fila por usuario (bulk_create), 'difusion' = una fila por evento
+NOTIFICACIONES_ENTREGA = 'lote'
+
+# Días que una notificación leída sigue en NotificacionVenta; después
+# manage.py compactar_notificaciones la mueve a NotificacionVentaArchivada
+NOTIFICACIONES_RETENCION_DIAS = entorno.entero('NOTIFICACIONES_RETENCION_DIAS', 30)
+
+# Pub/sub de las notificaciones en vivo. BusEnMemoria funciona dentro de un
+# solo proceso; con varios workers, una clase con la misma interfaz sobre un broker
+NOTIFICACIONES_BUS = 'apps.ventas.eventos.BusEnMemoria'
+
+# Hilos compartidos por las vistas async para correr sus consultas
+# independientes en paralelo (apps/ventas/concurrencia.py); cada uno tiene
+# su propia conexión a la base de datos (0 = una tras otra, sin hilos)
+CONSULTAS_HILOS = 4
+
+# Cola de tareas de las ventas (apps/ventas/tareas.py): notificaciones e
+# índice de búsqueda se hacen después de la request. Cada proceso web las
+# procesa con TAREAS_HILOS hilos; con 0, solo manage.py procesar_tareas
+# (necesita la caché y el bus de notificaciones compartidos). False las
+# corre al confirmar la transacción, dentro de la request
+TAREAS_EN_SEGUNDO_PLANO = entorno.booleano('TAREAS_EN_SEGUNDO_PLANO', True)
+TAREAS_HILOS = entorno.entero('TAREAS_HILOS', 1)
+TAREAS_ESPERA_SEGUNDOS = 5
+# Los hilos esperan esto al despertar para procesar las de varias requests juntas
+TAREAS_AGRUPAR_SEGUNDOS = 0.5
+TAREAS_MAX_INTENTOS = 5
+
+# Minutos que una venta pendiente queda reservada para el usuario de Back
+# Office que la tomó; al vencer, cualquier otro la puede tomar
+BACK_OFFICE_RESERVA_MINUTOS = 15
+
+
+# Métricas por vista (config/metricas.py), en /metricas/ para staff. Las
+# requests que pasen cualquiera de estos umbrales quedan en el log
+METRICAS_LENTO_MS = 1000
+METRICAS_MAX_CONSULTAS = 50
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'consola': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'config.metricas': {'handlers': ['consola'], 'level': 'WARNING'},
+    },
 }
 
 
@@ -0,0 +1,24 @@
+"""
+Perfil de producción del backend SQLite (ver base.py).
+
+Se arma con las variables ``DB_SQLITE_*`` de .env; settings lo usa con
+``DB_SQLITE_PRODUCCION`` y ``manage.py benchmark_sqlite`` lo compara con los
+valores de Django.
+"""
+from config import entorno
+
+
+def perfil_produccion():
+    """(OPTIONS, CONN_MAX_AGE) del perfil de producción"""
+    opciones = {
+        'transaction_mode': entorno.texto('DB_SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        'pragmas': {
+            'busy_timeout': entorno.entero('DB_SQLITE_BUSY_TIMEOUT_MS', 15000),
+            'journal_mode': entorno.texto('DB_SQLITE_JOURNAL_MODE', 'WAL'),
+            'synchronous': entorno.texto('DB_SQLITE_SYNCHRONOUS', 'NORMAL'),
+            'mmap_size': entorno.entero('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+            # Negativo = KiB: 64 MB de caché de páginas por conexión
+            'cache_size': entorno.entero('DB_SQLITE_CACHE_SIZE', -64000),
+        },
+    }
+    return opciones, entorno.entero('DB_CONN_MAX_AGE', 600)
@@ -0,0 +1,53 @@
+"""
+Backend SQLite con pragmas por conexión y modo de transacción configurable.
+
+Es el backend ``django.db.backends.sqlite3`` con dos opciones más en
+``DATABASES[...]['OPTIONS']``:
+
+- ``pragmas``: diccionario ``{nombre: valor}`` que se aplica a cada conexión
+  nueva (``journal_mode``, ``busy_timeout``, ``synchronous``, ``mmap_size``,
+  ``cache_size``...). Van en orden: ``busy_timeout`` conviene primero para que
+  el cambio a WAL espere si otro proceso tiene la base bloqueada.
+- ``transaction_mode``: cómo abre ``transaction.atomic()`` sus transacciones
+  (``DEFERRED``, ``IMMEDIATE`` o ``EXCLUSIVE``). Con ``DEFERRED`` una
+  transacción que primero lee y después escribe no respeta ``busy_timeout``
+  al pedir el bloqueo de escritura y falla al instante con "database is
+  locked"; ``IMMEDIATE`` pide ese bloqueo al empezar y hace cola.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMAS_ADMITIDOS = {
+    'journal_mode', 'busy_timeout', 'synchronous', 'mmap_size', 'cache_size',
+    'temp_store', 'wal_autocheckpoint', 'journal_size_limit', 'query_only',
+}
+MODOS_DE_TRANSACCION = {'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'}
+VALOR_VALIDO = re.compile(r'^-?\w+$')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pragmas = {}
+    transaction_mode = 'DEFERRED'
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', None) or {}
+        self.transaction_mode = (params.pop('transaction_mode', None) or 'DEFERRED').upper()
+
+        if self.transaction_mode not in MODOS_DE_TRANSACCION:
+            raise ImproperlyConfigured(f'transaction_mode inválido para SQLite: {self.transaction_mode}')
+        for nombre, valor in self.pragmas.items():
+            if nombre not in PRAGMAS_ADMITIDOS or not VALOR_VALIDO.match(str(valor)):
+                raise ImproperlyConfigured(f'Pragma de SQLite no admitido: {nombre}={valor}')
+        return params
+
+    def get_new_connection(self, conn_params):
+        conexion = super().get_new_connection(conn_params)
+        for nombre, valor in self.pragmas.items():
+            conexion.execute(f'PRAGMA {nombre} = {valor}')
+        return conexion
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from apps.usuarios import views as auth_views
+from config.metricas import metricas_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -18,6 +19,12 @@ urlpatterns = [
 
     # Ventas
     path('ventas/', include('apps.ventas.urls')),
+
+    # Seguimiento de pagos
+    path('seguimiento/', include('apps.seguimiento.urls')),
+
+    # Métricas por vista en formato Prometheus (solo staff)
+    path('metricas/', metricas_view, name='metricas'),
 ]
 
 if settings.DEBUG:
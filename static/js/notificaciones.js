@@ -0,0 +1,98 @@
+// Notificaciones en vivo: escucha el stream SSE y actualiza la campana,
+// los contadores y el desplegable sin recargar la página.
+(function () {
+  const body = document.body;
+  const urlStream = body.dataset.notificacionesStream;
+  if (!urlStream || !window.EventSource) return;
+
+  const contadores = document.querySelectorAll("[data-notificaciones-contador]");
+  const botonesMarcarTodas = document.querySelectorAll("[data-notificaciones-marcar-todas]");
+  const lista = document.querySelector("[data-notificaciones-lista]");
+  const avisos = document.getElementById("notificacionesAvisos");
+  const csrf = document.querySelector('meta[name="csrf-token"]');
+
+  function pintarContador(cantidad) {
+    contadores.forEach(function (elemento) {
+      elemento.textContent = cantidad;
+      elemento.classList.toggle("d-none", cantidad === 0);
+    });
+    botonesMarcarTodas.forEach(function (boton) {
+      boton.classList.toggle("d-none", cantidad === 0);
+    });
+  }
+
+  function itemNotificacion(notif) {
+    const item = document.createElement("li");
+    const enlace = document.createElement("a");
+    enlace.className = "dropdown-item small text-wrap";
+    enlace.href = notif.url;
+    const mensaje = document.createElement("div");
+    mensaje.textContent = notif.mensaje;
+    const hace = document.createElement("div");
+    hace.className = "text-muted small";
+    hace.textContent = "hace " + notif.hace;
+    enlace.append(mensaje, hace);
+    item.append(enlace);
+    return item;
+  }
+
+  function pintarRecientes(recientes) {
+    if (!lista) return;
+    if (recientes.length === 0) {
+      const vacio = document.createElement("li");
+      vacio.innerHTML = '<span class="dropdown-item-text text-muted">No hay notificaciones nuevas</span>';
+      lista.replaceChildren(vacio);
+      return;
+    }
+    lista.replaceChildren.apply(lista, recientes.map(itemNotificacion));
+  }
+
+  function avisar(evento) {
+    if (!avisos || !window.bootstrap) return;
+    const aviso = document.createElement("div");
+    aviso.className = "toast align-items-center text-bg-primary border-0";
+    aviso.setAttribute("role", "status");
+    const contenido = document.createElement("div");
+    contenido.className = "d-flex";
+    const texto = document.createElement("div");
+    texto.className = "toast-body";
+    texto.textContent = evento.mensaje;
+    const cerrar = document.createElement("button");
+    cerrar.type = "button";
+    cerrar.className = "btn-close btn-close-white me-2 m-auto";
+    cerrar.setAttribute("data-bs-dismiss", "toast");
+    contenido.append(texto, cerrar);
+    aviso.append(contenido);
+    avisos.append(aviso);
+    aviso.addEventListener("hidden.bs.toast", function () { aviso.remove(); });
+    new bootstrap.Toast(aviso, { delay: 8000 }).show();
+  }
+
+  const fuente = new EventSource(urlStream);
+
+  fuente.addEventListener("contador", function (e) {
+    const datos = JSON.parse(e.data);
+    pintarContador(datos.no_leidas);
+    pintarRecientes(datos.recientes);
+  });
+
+  fuente.addEventListener("notificacion", function (e) {
+    const datos = JSON.parse(e.data);
+    avisar(datos);
+    // Para que cada página reaccione (p. ej. la bandeja de pendientes)
+    document.dispatchEvent(new CustomEvent("notificacion", { detail: datos }));
+  });
+
+  botonesMarcarTodas.forEach(function (boton) {
+    boton.addEventListener("click", function (e) {
+      e.preventDefault();
+      fetch(body.dataset.notificacionesLeer, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "X-CSRFToken": csrf ? csrf.content : "" },
+        body: JSON.stringify({ todas: true }),
+      })
+        .then(function (respuesta) { return respuesta.json(); })
+        .then(function (datos) { pintarContador(datos.no_leidas); pintarRecientes([]); });
+    });
+  });
+})();